@@ -0,0 +1,25 @@
+-- user-002: timeline materializzata (fan-out on write) per il feed following
+-- Poi: python -m app.services.timeline (ricostruisce le timeline)
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS fanout_on_read boolean NOT NULL DEFAULT false;
+
+CREATE TABLE IF NOT EXISTS timeline_entries (
+    id serial PRIMARY KEY,
+    user_id integer NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    content_id integer NOT NULL REFERENCES contents (id) ON DELETE CASCADE,
+    owner_id integer NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    created_at timestamp with time zone NOT NULL,
+    CONSTRAINT unique_timeline_entry UNIQUE (user_id, content_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_timeline_entries_id
+    ON timeline_entries (id);
+CREATE INDEX IF NOT EXISTS idx_timeline_user_created
+    ON timeline_entries (user_id, created_at, content_id);
+CREATE INDEX IF NOT EXISTS idx_timeline_user_owner
+    ON timeline_entries (user_id, owner_id);
+
+-- fan-out: follower di un creator (sostituito in 024)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_follows_following
+    ON follows (following_id);
@@ -0,0 +1,17 @@
+-- user-003: classifica discover condivisa fra i worker
+-- (i cursori restano validi su ogni worker per DISCOVER_CURSOR_TTL)
+
+CREATE TABLE IF NOT EXISTS discover_rankings (
+    version bigint PRIMARY KEY,
+    size integer NOT NULL,
+    ids bytea NOT NULL,
+    owner_ids bytea NOT NULL,
+    group_starts bytea NOT NULL,
+    built_at timestamp with time zone NOT NULL
+);
+
+-- turno di ricostruzione (una sola per giro); la crea anche 006
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    name character varying PRIMARY KEY,
+    last_run_at timestamp with time zone
+);
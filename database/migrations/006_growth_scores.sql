@@ -0,0 +1,32 @@
+-- user-006: ricalcolo periodico di growth_index / growth_percentage
+-- Poi: python -m app.services.growth (primo giro completo)
+
+ALTER TABLE contents
+    ADD COLUMN IF NOT EXISTS last_rated_at timestamp with time zone;
+
+-- ultima modifica della riga / del commento: da qui parte il giro
+-- incrementale (nullable: nessuna riscrittura delle tabelle esistenti)
+ALTER TABLE contents
+    ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone;
+ALTER TABLE comments
+    ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone;
+
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    name character varying PRIMARY KEY,
+    last_run_at timestamp with time zone
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contents_updated
+    ON contents (updated_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_updated
+    ON comments (updated_at);
+
+-- aggregati per blocco di contenuti e attività dopo il checkpoint
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_likes_content
+    ON likes (content_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_likes_created
+    ON likes (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_content_created
+    ON comments (content_id, created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_created
+    ON comments (created_at);
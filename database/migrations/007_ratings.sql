@@ -0,0 +1,27 @@
+-- user-007: un voto per utente (ratings) e aggregati aggiornati in SQL
+-- Poi: python -m app.services.ratings --backfill-sum (popola rating_sum)
+
+CREATE TABLE IF NOT EXISTS ratings (
+    id serial PRIMARY KEY,
+    user_id integer NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    content_id integer NOT NULL REFERENCES contents (id) ON DELETE CASCADE,
+    score integer NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    CONSTRAINT unique_rating UNIQUE (user_id, content_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_ratings_id
+    ON ratings (id);
+CREATE INDEX IF NOT EXISTS idx_ratings_content
+    ON ratings (content_id);
+
+-- colonna della prima versione del submit, non più usata
+ALTER TABLE ratings DROP COLUMN IF EXISTS previous_score;
+
+ALTER TABLE contents
+    ADD COLUMN IF NOT EXISTS rating_sum integer NOT NULL DEFAULT 0;
+
+-- la media non viene più troncata a intero
+ALTER TABLE contents
+    ALTER COLUMN rating_avg TYPE double precision;
@@ -0,0 +1,11 @@
+-- user-008: contents.like_count persistito a blocchi dal buffer dei like
+-- Poi: python -m app.services.counters --only likes (conteggio iniziale)
+
+ALTER TABLE contents
+    ADD COLUMN IF NOT EXISTS like_count integer NOT NULL DEFAULT 0;
+
+-- turno della riconciliazione (un worker per giro)
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    name character varying PRIMARY KEY,
+    last_run_at timestamp with time zone
+);
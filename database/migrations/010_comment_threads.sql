@@ -0,0 +1,9 @@
+-- user-010: commenti a thread con risposte paginate
+-- Poi: python -m app.services.comment_threads (riallinea reply_count)
+
+ALTER TABLE comments
+    ADD COLUMN IF NOT EXISTS reply_count integer NOT NULL DEFAULT 0;
+
+-- risposte di un thread in ordine (anteprima e "carica altre")
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_parent_created
+    ON comments (parent_id, created_at);
@@ -0,0 +1,9 @@
+-- user-012: moderazione asincrona dei commenti (coda su comments)
+
+ALTER TABLE comments
+    ADD COLUMN IF NOT EXISTS moderation_pending boolean NOT NULL DEFAULT false;
+
+-- la coda è minuscola rispetto alla tabella: indice parziale
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_moderation_queue
+    ON comments (id)
+    WHERE moderation_pending IS true;
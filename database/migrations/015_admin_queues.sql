@@ -0,0 +1,22 @@
+-- user-015: code admin con keyset pagination su (created_at, id)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contents_created
+    ON contents (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contents_approved_created
+    ON contents (approved, created_at, id);
+
+-- solo le righe da rivedere / segnalate: indici parziali
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_review_created
+    ON comments (created_at, id)
+    WHERE is_approved IS false AND moderation_pending IS false;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_flagged_created
+    ON comments (created_at, id)
+    WHERE is_flagged IS true;
+
+-- sostituisce l'indice sul solo status
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_creator_verifications_status_created
+    ON creator_verifications (status, created_at, id);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_creator_verifications_status;
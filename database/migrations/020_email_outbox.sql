@@ -0,0 +1,30 @@
+-- user-020: outbox delle email (codici di login) con invio in background
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id serial PRIMARY KEY,
+    to_address character varying NOT NULL,
+    subject character varying NOT NULL,
+    body text,
+    status character varying NOT NULL DEFAULT 'pending',
+    attempts integer NOT NULL DEFAULT 0,
+    last_error text,
+    next_attempt_at timestamp with time zone NOT NULL DEFAULT now(),
+    sent_at timestamp with time zone,
+    created_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+-- tabelle create dalla prima versione: il body si azzera dopo l'invio
+ALTER TABLE email_outbox ALTER COLUMN body DROP NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_email_outbox_id
+    ON email_outbox (id);
+
+-- il sender legge solo i pending scaduti
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_email_outbox_due
+    ON email_outbox (next_attempt_at)
+    WHERE status = 'pending';
+
+-- retention: lo sweeper cancella i conclusi più vecchi
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_email_outbox_done
+    ON email_outbox (next_attempt_at)
+    WHERE status <> 'pending';
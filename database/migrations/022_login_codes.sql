@@ -0,0 +1,13 @@
+-- user-022: login_codes indicizzata per verify_code e ripulita dallo sweeper
+
+-- verify_code: codici non usati di un'email, il più recente
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_login_codes_active
+    ON login_codes (email, created_at)
+    WHERE used IS false;
+
+-- sweeper: righe scadute in ordine di scadenza
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_login_codes_expires
+    ON login_codes (expires_at);
+
+-- coperto da idx_login_codes_active
+DROP INDEX CONCURRENTLY IF EXISTS ix_login_codes_email;
@@ -0,0 +1,8 @@
+-- user-023: users.followers_count / following_count persistiti dal buffer
+-- Poi: python -m app.services.counters --only follows (conteggio iniziale)
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS followers_count integer NOT NULL DEFAULT 0;
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS following_count integer NOT NULL DEFAULT 0;
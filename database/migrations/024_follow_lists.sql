@@ -0,0 +1,10 @@
+-- user-024: liste follower/following paginate per data del follow
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_follows_following_created
+    ON follows (following_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_follows_follower_created
+    ON follows (follower_id, created_at, id);
+
+-- prefisso di idx_follows_following_created (creato in 002)
+DROP INDEX CONCURRENTLY IF EXISTS idx_follows_following;
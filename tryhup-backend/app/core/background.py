@@ -0,0 +1,88 @@
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================
+# PERIODIC TASKS (THREAD)
+# ===============================
+class PeriodicTask:
+    """
+    Esegue `func` ogni `interval` secondi in un thread daemon.
+    wake() anticipa il prossimo giro (es. appena arriva lavoro nuovo).
+    stop() esegue un ultimo giro prima di uscire (es. flush dei buffer).
+    Un'eccezione viene loggata e non ferma il task.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], None],
+        interval: float,
+        run_on_start: bool = False,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_on_start = run_on_start
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"tryhup-{self.name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def run_once(self) -> None:
+        try:
+            self.func()
+        except Exception:
+            logger.exception("Background task %s failed", self.name)
+
+    def _run(self) -> None:
+        if self.run_on_start:
+            self.run_once()
+
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.run_once()
+
+
+# ===============================
+# REGISTRY
+# ===============================
+BACKGROUND_TASKS: List[PeriodicTask] = []
+
+
+def register_task(task: PeriodicTask) -> PeriodicTask:
+    BACKGROUND_TASKS.append(task)
+    return task
+
+
+def start_background_tasks() -> None:
+    for task in BACKGROUND_TASKS:
+        task.start()
+
+
+def stop_background_tasks() -> None:
+    for task in BACKGROUND_TASKS:
+        task.stop()
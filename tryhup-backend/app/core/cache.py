@@ -0,0 +1,276 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.database import run_blocking
+
+# ===============================
+# CONFIG
+# ===============================
+# backend di default per tutte le cache: memory | redis | none
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# processi worker (uvicorn/gunicorn --workers): con più di uno lo stato
+# che deve essere uguale per tutti non può restare in memoria
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+# ===============================
+# STATISTICHE
+# ===============================
+class _Stats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# ===============================
+# MEMORY BACKEND (LRU + TTL)
+# ===============================
+class MemoryCache:
+    """
+    Cache in-process limitata per numero di voci (LRU) e con TTL per voce.
+    Thread-safe: i router sync girano nel threadpool.
+    get(..., track=False) non conta nelle statistiche hit/miss.
+    """
+
+    backend = "memory"
+
+    def __init__(self, name: str, max_entries: int = 10000, ttl: int = 60):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = _Stats()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, track: bool = True) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is not None and expires_at <= time.monotonic():
+                    del self._data[key]
+                    entry = None
+                else:
+                    self._data.move_to_end(key)
+
+        if track:
+            self.stats.record(entry is not None)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """ttl=None usa il default della cache, ttl=0 significa senza scadenza."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            **self.stats.as_dict(),
+        }
+
+
+# ===============================
+# REDIS BACKEND (CONDIVISO)
+# ===============================
+class RedisCache:
+    """
+    Stesso contratto di MemoryCache su un client Redis-compatibile
+    (redis-py, fakeredis, ...). I valori viaggiano come JSON.
+    Le chiamate passano da run_blocking: mai sull'event loop.
+    """
+
+    backend = "redis"
+
+    def __init__(self, name: str, client, ttl: int = 60):
+        self.name = name
+        self.client = client
+        self.ttl = ttl
+        self.prefix = f"tryhup:{name}:"
+        self.stats = _Stats()
+
+    def get(self, key: str, track: bool = True) -> Optional[Any]:
+        raw = run_blocking(self.client.get, self.prefix + key)
+        if track:
+            self.stats.record(raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        run_blocking(
+            self.client.set,
+            self.prefix + key,
+            json.dumps(value, default=str),
+            ex=ttl or None,
+        )
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Un solo round trip (pipeline) per molte chiavi."""
+        ttl = self.ttl if ttl is None else ttl
+        pipe = self.client.pipeline()
+        for key, value in items.items():
+            pipe.set(
+                self.prefix + key,
+                json.dumps(value, default=str),
+                ex=ttl or None,
+            )
+        run_blocking(pipe.execute)
+
+    def delete(self, key: str) -> None:
+        run_blocking(self.client.delete, self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "ttl": self.ttl,
+            **self.stats.as_dict(),
+        }
+
+
+# ===============================
+# NULL BACKEND (CACHE DISATTIVATA)
+# ===============================
+class NullCache:
+    backend = "none"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = _Stats()
+
+    def get(self, key: str, track: bool = True) -> Optional[Any]:
+        if track:
+            self.stats.record(False)
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        pass
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def info(self) -> Dict[str, Any]:
+        return {"backend": self.backend, **self.stats.as_dict()}
+
+
+# ===============================
+# REGISTRY
+# ===============================
+CACHES: Dict[str, Any] = {}
+
+
+def get_redis_client():
+    # dipendenza opzionale: serve solo con backend redis
+    import redis
+
+    return redis.Redis.from_url(REDIS_URL)
+
+
+def shared_backend(name: str, configured: Optional[str]) -> str:
+    """
+    Backend per stato che deve essere uguale in tutti i worker
+    (invalidazioni, contatori). Con WEB_CONCURRENCY > 1 il default
+    diventa redis e un backend memory esplicito fa fallire l'avvio:
+    ogni worker vedrebbe solo il proprio stato.
+    """
+
+    if configured is None:
+        return "redis" if WEB_CONCURRENCY > 1 else "memory"
+
+    if configured == "memory" and WEB_CONCURRENCY > 1:
+        raise RuntimeError(
+            f"{name}: the memory backend is per-process, "
+            f"use redis with WEB_CONCURRENCY={WEB_CONCURRENCY}"
+        )
+
+    return configured
+
+
+def create_cache(
+    name: str,
+    max_entries: int = 10000,
+    ttl: int = 60,
+    backend: Optional[str] = None,
+    shared: bool = False,
+):
+    """
+    Crea e registra una cache. Il backend si sceglie con
+    <NAME>_CACHE_BACKEND (es. FEED_CACHE_BACKEND) o CACHE_BACKEND.
+    shared=True: la cache deve essere condivisa fra i worker
+    (vedi shared_backend).
+    """
+
+    backend = (
+        backend
+        or os.getenv(f"{name.upper()}_CACHE_BACKEND")
+        or os.getenv("CACHE_BACKEND")
+    )
+
+    if shared:
+        backend = shared_backend(name, backend)
+    else:
+        backend = backend or CACHE_BACKEND
+
+    if backend == "redis":
+        cache = RedisCache(name, get_redis_client(), ttl=ttl)
+    elif backend == "none":
+        cache = NullCache(name)
+    else:
+        cache = MemoryCache(name, max_entries=max_entries, ttl=ttl)
+
+    CACHES[name] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.info() for name, cache in CACHES.items()}
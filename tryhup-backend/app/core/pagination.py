@@ -0,0 +1,153 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from fastapi import Query as QueryParam
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Query, Session
+
+
+# code admin: pagine piccole anche con milioni di righe in attesa
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 200
+
+
+# ===============================
+# CURSOR OPACHI (KEYSET PAGINATION)
+# ===============================
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """
+    Serializza la posizione di pagina in una stringa opaca (base64 url-safe).
+    Il client la rimanda indietro così com'è.
+    """
+    raw = json.dumps(payload, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    return payload
+
+
+# ===============================
+# KEYSET (created_at, id)
+# ===============================
+def encode_keyset(created_at: datetime, row_id: int) -> str:
+    return encode_cursor({"k": [created_at.isoformat(), row_id]})
+
+
+def decode_keyset(cursor: str) -> Tuple[datetime, int]:
+    key = decode_cursor(cursor).get("k")
+    try:
+        return datetime.fromisoformat(key[0]), int(key[1])
+    except (TypeError, ValueError, IndexError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def keyset_page(
+    query: Query,
+    created_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Una pagina ordinata per (created_at, id): ogni pagina costa come la
+    prima perché parte da un indice composito, senza OFFSET.
+    """
+
+    if cursor:
+        key = tuple_(*decode_keyset(cursor))
+        position = tuple_(created_column, id_column)
+        query = query.filter(position < key if descending else position > key)
+
+    if descending:
+        query = query.order_by(created_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_column.asc(), id_column.asc())
+
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_keyset(
+            getattr(last, created_column.key),
+            getattr(last, id_column.key),
+        )
+
+    return rows, next_cursor
+
+
+# ===============================
+# COMPATIBILITÀ (LISTA SEMPLICE)
+# ===============================
+# Le liste paginate rispondono {items, next_cursor, approximate_total}.
+# I client scritti per la vecchia risposta (lista semplice) passano
+# ?legacy_list=true: ricevono la lista della pagina, con cursor e totale
+# negli header X-Next-Cursor / X-Approximate-Total.
+LEGACY_LIST_QUERY = QueryParam(
+    False,
+    alias="legacy_list",
+    description=(
+        "Vecchio formato: lista semplice; next_cursor e approximate_total "
+        "negli header X-Next-Cursor / X-Approximate-Total"
+    ),
+)
+
+
+def legacy_list(
+    response: Response,
+    items: List[Any],
+    next_cursor: Optional[str],
+    approximate_total: Optional[int] = None,
+) -> List[Any]:
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if approximate_total is not None:
+        response.headers["X-Approximate-Total"] = str(approximate_total)
+    return items
+
+
+# ===============================
+# CONTEGGI APPROSSIMATI
+# ===============================
+def approximate_count(db: Session, query: Query) -> int:
+    """
+    Dimensione della coda senza COUNT(*) esatto: su Postgres la stima
+    del planner (EXPLAIN, nessuna scansione); altrove conteggio esatto.
+    """
+
+    if db.get_bind().dialect.name != "postgresql":
+        return query.order_by(None).count()
+
+    statement = query.order_by(None).statement.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,268 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import get_redis_client
+from app.core.security import decode_access_token, verified_tokens
+
+
+# ===============================
+# CONFIG
+# ===============================
+# memory (per processo) | redis (condiviso fra worker) | none
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# chiavi tenute dal backend memory (LRU): i bucket espulsi ripartono pieni
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# dietro un proxy fidato l'IP del client è il primo di X-Forwarded-For
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY") == "true"
+# l'header X-DEV-EMAIL identifica l'utente solo in dev (come l'auth)
+DEV_MODE = os.getenv("DEV_MODE") == "true"
+
+PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+# ===============================
+# LIMITI
+# ===============================
+class Rate:
+    """
+    Token bucket: fino a `capacity` richieste di fila, poi una ogni
+    period/capacity secondi.
+    """
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.refill = capacity / period
+
+    def __repr__(self) -> str:
+        return f"{self.capacity}/{self.period:g}s"
+
+
+def parse_rate(value: str) -> Optional[Rate]:
+    """
+    "5/minute", "100/hour", "10/600" (secondi). "none" = nessun limite.
+    """
+
+    value = value.strip().lower()
+    if value in ("", "none", "off"):
+        return None
+
+    count, _, period = value.partition("/")
+    seconds = PERIODS.get(period) or float(period)
+    return Rate(int(count), seconds)
+
+
+def configured_rate(scope: str, default: str) -> Optional[Rate]:
+    """Il default del codice, sovrascrivibile con RATE_LIMIT_<SCOPE>."""
+    return parse_rate(os.getenv(f"RATE_LIMIT_{scope.upper()}", default))
+
+
+# ===============================
+# MEMORY BACKEND
+# ===============================
+class MemoryLimiter:
+    """Bucket in-process (LRU limitato), thread-safe."""
+
+    backend = "memory"
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, rate: Rate, cost: int = 1) -> float:
+        """0 se la richiesta passa, altrimenti i secondi da attendere."""
+
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (rate.capacity, now))
+            tokens = min(
+                rate.capacity,
+                tokens + (now - updated_at) * rate.refill,
+            )
+
+            retry_after = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / rate.refill
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# ===============================
+# REDIS BACKEND (CONDIVISO)
+# ===============================
+# stesso algoritmo, atomico lato server; l'orologio è quello di Redis
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * refill)
+
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / refill
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisLimiter:
+    backend = "redis"
+    blocking = True
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    def hit(self, key: str, rate: Rate, cost: int = 1) -> float:
+        return float(
+            self._script(
+                keys=[f"tryhup:ratelimit:{key}"],
+                args=[rate.capacity, rate.refill, cost],
+            )
+        )
+
+    def reset(self) -> None:
+        for key in self.client.scan_iter("tryhup:ratelimit:*"):
+            self.client.delete(key)
+
+
+def create_limiter(backend: str = RATE_LIMIT_BACKEND):
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return RedisLimiter(get_redis_client())
+    return MemoryLimiter(RATE_LIMIT_MAX_KEYS)
+
+
+limiter = create_limiter()
+
+
+# ===============================
+# CHIAVI
+# ===============================
+KeyFunc = Callable[[Request], Awaitable[Optional[str]]]
+
+
+async def client_ip(request: Request) -> Optional[str]:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+async def body_email(request: Request) -> Optional[str]:
+    """Campo `email` del body JSON (request-code / verify-code)."""
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        return None
+
+    email = payload.get("email") if isinstance(payload, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+async def client_subject(request: Request) -> Optional[str]:
+    """
+    L'utente del token (verifica in cache, nessuna query) o, solo in
+    DEV_MODE, l'header dev; senza credenziali valide si ricade sull'IP.
+    Fuori da DEV_MODE X-DEV-EMAIL è un header qualsiasi: fidarsene
+    darebbe a ogni richiesta anonima un bucket nuovo.
+    """
+
+    parts = request.headers.get("Authorization", "").split()
+    if len(parts) == 2 and parts[0].lower() == "bearer":
+        try:
+            if verified_tokens.backend == "redis":
+                # siamo sull'event loop: la cache Redis va nel threadpool
+                subject = await run_in_threadpool(
+                    decode_access_token, parts[1]
+                )
+            else:
+                subject = decode_access_token(parts[1])
+            return f"user:{subject}"
+        except ValueError:
+            pass
+
+    dev_email = request.headers.get("X-DEV-EMAIL") if DEV_MODE else None
+    if dev_email:
+        return f"user:{dev_email.lower()}"
+
+    ip = await client_ip(request)
+    return f"ip:{ip}" if ip else None
+
+
+# ===============================
+# DIPENDENZA FASTAPI
+# ===============================
+def rate_limit(scope: str, default: str, key: KeyFunc = client_ip):
+    """
+    Da mettere in `dependencies=[...]` della route: le dipendenze della
+    route girano prima dei parametri dell'handler, quindi una richiesta
+    rifiutata non apre nessuna sessione DB.
+
+        @router.post("/x", dependencies=[rate_limit("x_ip", "10/minute")])
+    """
+
+    rate = configured_rate(scope, default)
+
+    async def dependency(request: Request) -> None:
+        if rate is None or limiter is None:
+            return
+
+        identity = await key(request)
+        if identity is None:
+            return
+
+        bucket = f"{scope}:{identity}"
+        if limiter.blocking:
+            retry_after = await run_in_threadpool(limiter.hit, bucket, rate)
+        else:
+            retry_after = limiter.hit(bucket, rate)
+
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return Depends(dependency)
+
@@ -1,9 +1,14 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
+import hashlib
+import math
 import os
+import time
 
 from jose import jwt, JWTError
 
+from app.core.cache import create_cache
+
 # ===============================
 # CONFIG JWT
 # ===============================
@@ -12,10 +17,24 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 ore
 
 
+# token già verificati tenuti in memoria (LRU); "none" disattiva
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+JWT_CACHE_BACKEND = os.getenv("JWT_CACHE_BACKEND", "memory")
+
+
 if not JWT_SECRET_KEY:
     raise RuntimeError("JWT_SECRET_KEY non impostata nell'ambiente")
 
 
+# ttl per voce = vita residua del token (vedi decode_access_token)
+verified_tokens = create_cache(
+    "jwt",
+    max_entries=JWT_CACHE_MAX_ENTRIES,
+    ttl=0,
+    backend=JWT_CACHE_BACKEND,
+)
+
+
 # ===============================
 # CREATE ACCESS TOKEN
 # ===============================
@@ -43,7 +62,12 @@ def create_access_token(
 # ===============================
 # DECODE ACCESS TOKEN
 # ===============================
-def decode_access_token(token: str) -> str:
+def _token_key(token: str) -> str:
+    # mai il token in chiaro come chiave (stats, dump, redis)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _verify_token(token: str) -> Tuple[str, Optional[float]]:
     try:
         payload = jwt.decode(
             token,
@@ -55,7 +79,39 @@ def decode_access_token(token: str) -> str:
         if not subject:
             raise JWTError("Token senza subject")
 
-        return subject
+        return subject, payload.get("exp")
 
     except JWTError as e:
         raise ValueError("Token non valido o scaduto") from e
+
+
+def decode_access_token(token: str) -> str:
+    """
+    Lo stesso token arriva migliaia di volte nelle sue 24 ore: dopo la
+    prima verifica della firma il subject resta in cache fino a `exp`.
+    I token non validi non vengono memorizzati.
+    """
+
+    key = _token_key(token)
+
+    cached = verified_tokens.get(key)
+    if cached is not None:
+        subject, expires_at = cached
+        if expires_at > time.time():
+            return subject
+        verified_tokens.delete(key)
+        raise ValueError("Token non valido o scaduto")
+
+    subject, expires_at = _verify_token(token)
+
+    # senza exp il token non scade: si verifica ogni volta
+    if expires_at is not None:
+        remaining = expires_at - time.time()
+        if remaining > 0:
+            verified_tokens.set(
+                key,
+                (subject, expires_at),
+                ttl=math.ceil(remaining),
+            )
+
+    return subject
@@ -1,5 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from fastapi import Depends
+import functools
+import inspect
 import os
 from dotenv import load_dotenv
 
@@ -8,6 +12,9 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 # print("DEBUG DATABASE_URL =", DATABASE_URL)  # ⛔ togli in produzione
 
+# DB_ASYNC=true → router caldi serviti da AsyncSession (asyncpg / aiosqlite)
+DB_ASYNC = os.getenv("DB_ASYNC") == "true"
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
@@ -29,3 +36,122 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ===============================
+# ASYNC ENGINE (OPZIONALE)
+# ===============================
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str):
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    return parsed.set(drivername=driver) if driver else parsed
+
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import (
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+    from sqlalchemy.util import await_only
+    from sqlalchemy.util.concurrency import in_greenlet
+    from starlette.concurrency import run_in_threadpool
+
+    async_url = to_async_url(DATABASE_URL)
+
+    connect_args = {}
+    if async_url.drivername == "postgresql+asyncpg":
+        # il pooler Supabase (pgbouncer, transaction mode)
+        # non supporta i prepared statement in cache di asyncpg
+        async_url = async_url.update_query_dict(
+            {"prepared_statement_cache_size": "0"}
+        )
+        connect_args = {"statement_cache_size": 0}
+
+    async_engine = create_async_engine(
+        async_url,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        # gli oggetti ORM vengono serializzati fuori dalla sessione:
+        # niente lazy refresh dopo il commit
+        expire_on_commit=False,
+    )
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def async_db(func):
+    """
+    Decoratore per handler/dipendenze che ricevono `db = Depends(get_db)`.
+
+    Con DB_ASYNC=true l'handler diventa una coroutine: riceve un'AsyncSession
+    e il suo corpo sync gira dentro AsyncSession.run_sync, quindi l'attesa
+    su Postgres non occupa un thread del threadpool di AnyIO.
+    Con DB_ASYNC spento restituisce l'handler invariato.
+
+    Il corpo non deve fare I/O bloccante diverso dal DB (es. SMTP):
+    girerebbe sull'event loop. Le chiamate Redis di cache e contatori
+    passano da run_blocking.
+    """
+
+    if not DB_ASYNC:
+        return func
+
+    signature = inspect.signature(func)
+    db_params = [
+        name
+        for name, param in signature.parameters.items()
+        if getattr(param.default, "dependency", None) is get_db
+    ]
+
+    parameters = [
+        param.replace(
+            default=Depends(get_async_db),
+            annotation=AsyncSession,
+        )
+        if name in db_params
+        else param
+        for name, param in signature.parameters.items()
+    ]
+
+    @functools.wraps(func)
+    async def wrapper(**kwargs):
+        async_session = kwargs[db_params[0]]
+
+        def call(session):
+            for name in db_params:
+                kwargs[name] = session
+            return func(**kwargs)
+
+        return await async_session.run_sync(call)
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+
+def run_blocking(func, *args, **kwargs):
+    """
+    Per I/O bloccante non-DB (es. Redis) chiamato da codice sync.
+    Dentro un handler @async_db il corpo gira nel greenlet di run_sync,
+    cioè sull'event loop: la chiamata va nel threadpool e il greenlet
+    la attende. Altrove (threadpool, task in background) è diretta.
+    """
+
+    if DB_ASYNC and in_greenlet():
+        return await_only(run_in_threadpool(func, *args, **kwargs))
+    return func(*args, **kwargs)
@@ -2,9 +2,15 @@ import os
 from fastapi import Depends, HTTPException, status, Request, Header
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, async_db
 from app.models import User
 from app.core.security import decode_access_token
+from app.services.auth_cache import (
+    CachedUser,
+    get_cached_auth_user,
+    invalidate_auth_user,
+    remember_auth_user,
+)
 
 
 # ===============================
@@ -14,55 +20,37 @@ DEV_MODE = os.getenv("DEV_MODE") == "true"
 
 
 # ===============================
-# GET CURRENT USER
+# AUTH USER (CACHE, NESSUNA QUERY SU HIT)
 # ===============================
-def get_current_user(
-    request: Request,
-    db: Session = Depends(get_db),
-    x_dev_email: str | None = Header(default=None, alias="X-DEV-EMAIL"),
-    x_dev_role: str | None = Header(default=None, alias="X-DEV-ROLE"),
-) -> User:
-    """
-    PRIORITÀ:
-    1️⃣ DEV MODE + X-DEV-EMAIL (+ opzionale X-DEV-ROLE)
-    2️⃣ JWT Bearer
-    """
-
-    # ===============================
-    # DEV MODE (FAKE USERS)
-    # ===============================
-    if DEV_MODE and x_dev_email:
-        role = x_dev_role if x_dev_role in {"user", "admin"} else "user"
+def _dev_user(db: Session, email: str, role: str) -> User:
+    user = (
+        db.query(User)
+        .filter(User.email == email)
+        .first()
+    )
 
-        user = (
-            db.query(User)
-            .filter(User.email == x_dev_email)
-            .first()
+    if not user:
+        user = User(
+            email=email,
+            role=role,
+            is_active=True,
+            is_creator=False,
+            is_creator_verified=False,
         )
-
-        if not user:
-            user = User(
-                email=x_dev_email,
-                role=role,
-                is_active=True,
-                is_creator=False,
-                is_creator_verified=False,
-            )
-            db.add(user)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+    else:
+        # 🔁 aggiorna ruolo se cambiato
+        if user.role != role:
+            user.role = role
             db.commit()
             db.refresh(user)
-        else:
-            # 🔁 aggiorna ruolo se cambiato
-            if user.role != role:
-                user.role = role
-                db.commit()
-                db.refresh(user)
 
-        return user
+    return user
 
-    # ===============================
-    # JWT FLOW (PROD)
-    # ===============================
+
+def _token_subject(request: Request) -> str:
     auth_header = request.headers.get("Authorization")
 
     if not auth_header:
@@ -81,31 +69,94 @@ def get_current_user(
     token = parts[1]
 
     try:
-        email = decode_access_token(token)
+        return decode_access_token(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
 
-    user = (
-        db.query(User)
-        .filter(User.email == email)
-        .first()
-    )
 
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+@async_db
+def get_current_auth_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    x_dev_email: str | None = Header(default=None, alias="X-DEV-EMAIL"),
+    x_dev_role: str | None = Header(default=None, alias="X-DEV-ROLE"),
+) -> CachedUser:
+    """
+    PRIORITÀ:
+    1️⃣ DEV MODE + X-DEV-EMAIL (+ opzionale X-DEV-ROLE)
+    2️⃣ JWT Bearer
+
+    I campi auth vengono dalla cache (chiave = subject del token):
+    la SELECT su users parte solo al primo accesso o dopo un'invalidazione.
+    """
+
+    # ===============================
+    # DEV MODE (FAKE USERS)
+    # ===============================
+    if DEV_MODE and x_dev_email:
+        role = x_dev_role if x_dev_role in {"user", "admin"} else "user"
+
+        cached = get_cached_auth_user(x_dev_email)
+        if cached is not None and cached.role == role:
+            return cached
+
+        return remember_auth_user(_dev_user(db, x_dev_email, role))
+
+    # ===============================
+    # JWT FLOW (PROD)
+    # ===============================
+    email = _token_subject(request)
+
+    cached = get_cached_auth_user(email)
+    if cached is None:
+        user = (
+            db.query(User)
+            .filter(User.email == email)
+            .first()
         )
 
-    if not user.is_active:
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+
+        cached = remember_auth_user(user)
+
+    if not cached.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive",
         )
 
+    return cached
+
+
+# ===============================
+# GET CURRENT USER (RIGA COMPLETA)
+# ===============================
+@async_db
+def get_current_user(
+    auth_user: CachedUser = Depends(get_current_auth_user),
+    db: Session = Depends(get_db),
+) -> User:
+    """
+    Solo per gli handler che leggono o modificano il profilo:
+    lookup per primary key a partire dall'utente già autenticato.
+    """
+
+    user = db.get(User, auth_user.id)
+
+    if not user:
+        invalidate_auth_user(auth_user.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+
     return user
 
 
@@ -113,8 +164,8 @@ def get_current_user(
 # GET CURRENT ADMIN
 # ===============================
 def get_current_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: CachedUser = Depends(get_current_auth_user),
+) -> CachedUser:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
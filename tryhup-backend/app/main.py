@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -12,7 +14,25 @@ from app.routers.comments import router as comments_router
 from app.routers.admin import router as admin_router
 from app.routers.admin_comments import router as admin_comments_router
 from app.routers.admin_creators import router as admin_creators_router
+from app.routers.admin_exports import router as admin_exports_router
 from app.routers.meta import router as meta_router
+from app.core.background import (
+    start_background_tasks,
+    stop_background_tasks,
+)
+# registra i job periodici dei growth score
+import app.services.growth  # noqa: F401
+
+
+# ===============================
+# LIFESPAN (BACKGROUND TASKS)
+# ===============================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_background_tasks()
+    yield
+    # ultimo giro: flush dei buffer prima di spegnere
+    stop_background_tasks()
 
 
 # ===============================
@@ -22,6 +42,7 @@ app = FastAPI(
     title="TryHup API",
     description="Backend TryHup – social video platform",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -63,6 +84,7 @@ app.include_router(meta_router)
 app.include_router(admin_router)
 app.include_router(admin_comments_router)
 app.include_router(admin_creators_router)
+app.include_router(admin_exports_router)
 
 
 # ===============================
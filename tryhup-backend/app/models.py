@@ -8,6 +8,10 @@ from sqlalchemy import (
     UniqueConstraint,
     Text,
     Index,
+    Float,
+    false,
+    BigInteger,
+    LargeBinary,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -38,6 +42,14 @@ class User(Base):
 
     is_active = Column(Boolean, default=True, nullable=False)
 
+    # creator con troppi follower: niente fan-out on write,
+    # i suoi contenuti vengono letti al volo dal feed
+    fanout_on_read = Column(Boolean, default=False, nullable=False)
+
+    # denormalizzati da follows: scritti a blocchi da app/services/counters.py
+    followers_count = Column(Integer, default=0, nullable=False)
+    following_count = Column(Integer, default=0, nullable=False)
+
     created_at = Column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -130,7 +142,13 @@ class CreatorVerification(Base):
     user = relationship("User", back_populates="creator_verification")
 
     __table_args__ = (
-        Index("idx_creator_verifications_status", "status"),
+        # coda admin: filtro per status, ordine per created_at
+        Index(
+            "idx_creator_verifications_status_created",
+            "status",
+            "created_at",
+            "id",
+        ),
     )
 
 
@@ -178,6 +196,19 @@ class Follow(Base):
             "following_id",
             name="unique_follow",
         ),
+        # liste follower/following paginate per data del follow
+        Index(
+            "idx_follows_following_created",
+            "following_id",
+            "created_at",
+            "id",
+        ),
+        Index(
+            "idx_follows_follower_created",
+            "follower_id",
+            "created_at",
+            "id",
+        ),
     )
 
 
@@ -196,11 +227,30 @@ class Content(Base):
 
     approved = Column(Boolean, default=False, nullable=False)
 
-    rating_avg = Column(Integer, default=0, nullable=False)
+    # aggregati mantenuti in SQL dalla tabella ratings
+    rating_avg = Column(Float, default=0, nullable=False)
+    # nuova colonna: popolarla con `python -m app.services.ratings
+    # --backfill-sum` prima del deploy del submit incrementale
+    rating_sum = Column(Integer, default=0, nullable=False)
     rating_count = Column(Integer, default=0, nullable=False)
+
+    # persistito a blocchi dal buffer dei like (app/services/counters.py)
+    like_count = Column(Integer, default=0, nullable=False)
     growth_index = Column(Integer, default=1, nullable=False)
     growth_percentage = Column(Integer, default=25, nullable=False)
 
+    # ultimo voto ricevuto (ricalcolo incrementale dei growth score)
+    last_rated_at = Column(DateTime(timezone=True), nullable=True)
+
+    # ultima modifica della riga (like persistiti, voti, approvazione):
+    # il ricalcolo incrementale dei growth score parte da qui
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=True,
+    )
+
     owner_id = Column(
         Integer,
         ForeignKey("users.id", ondelete="SET NULL"),
@@ -227,6 +277,64 @@ class Content(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("idx_contents_created", "created_at", "id"),
+        Index("idx_contents_updated", "updated_at"),
+        Index(
+            "idx_contents_approved_created",
+            "approved",
+            "created_at",
+            "id",
+        ),
+    )
+
+
+# ===============================
+# TIMELINE (FAN-OUT ON WRITE)
+# ===============================
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # proprietario della timeline (chi segue)
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    content_id = Column(
+        Integer,
+        ForeignKey("contents.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # autore del contenuto (per ripulire la timeline all'unfollow)
+    owner_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # copia di contents.created_at: la timeline è già ordinata per chiave
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "content_id",
+            name="unique_timeline_entry",
+        ),
+        Index(
+            "idx_timeline_user_created",
+            "user_id",
+            "created_at",
+            "content_id",
+        ),
+        Index("idx_timeline_user_owner", "user_id", "owner_id"),
+    )
+
 
 # ===============================
 # LIKES
@@ -263,6 +371,52 @@ class Like(Base):
             "content_id",
             name="unique_like",
         ),
+        Index("idx_likes_content", "content_id"),
+        Index("idx_likes_created", "created_at"),
+    )
+
+
+# ===============================
+# RATINGS (UN VOTO PER UTENTE)
+# ===============================
+class Rating(Base):
+    __tablename__ = "ratings"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    content_id = Column(
+        Integer,
+        ForeignKey("contents.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    score = Column(Integer, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "content_id",
+            name="unique_rating",
+        ),
+        Index("idx_ratings_content", "content_id"),
     )
 
 
@@ -300,15 +454,67 @@ class Comment(Base):
     moderation_score = Column(Integer, default=0, nullable=False)
     moderation_note = Column(Text, nullable=True)
 
+    # risposte approvate (denormalizzato, solo sui commenti top-level)
+    reply_count = Column(Integer, default=0, nullable=False)
+
+    # in coda per la moderazione asincrona
+    moderation_pending = Column(
+        Boolean,
+        default=False,
+        server_default=false(),
+        nullable=False,
+    )
+
     created_at = Column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
 
+    # approvazione / rifiuto cambiano il conteggio dei commenti visibili
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=True,
+    )
+
     author = relationship("User", back_populates="comments")
     content = relationship("Content", back_populates="comments")
 
+    __table_args__ = (
+        Index("idx_comments_content_created", "content_id", "created_at"),
+        Index("idx_comments_parent_created", "parent_id", "created_at"),
+        Index("idx_comments_created", "created_at"),
+        Index("idx_comments_updated", "updated_at"),
+        # la coda è minuscola rispetto alla tabella: indice parziale
+        Index(
+            "idx_comments_moderation_queue",
+            "id",
+            postgresql_where=moderation_pending.is_(True),
+            sqlite_where=moderation_pending.is_(True),
+        ),
+        # code admin: solo le righe da rivedere / segnalate
+        Index(
+            "idx_comments_review_created",
+            "created_at",
+            "id",
+            postgresql_where=(
+                is_approved.is_(False) & moderation_pending.is_(False)
+            ),
+            sqlite_where=(
+                is_approved.is_(False) & moderation_pending.is_(False)
+            ),
+        ),
+        Index(
+            "idx_comments_flagged_created",
+            "created_at",
+            "id",
+            postgresql_where=is_flagged.is_(True),
+            sqlite_where=is_flagged.is_(True),
+        ),
+    )
+
 
 # ===============================
 # LOGIN CODE
@@ -318,7 +524,7 @@ class LoginCode(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    email = Column(String, index=True, nullable=False)
+    email = Column(String, nullable=False)
     code = Column(String, nullable=False)
 
     expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -329,3 +535,104 @@ class LoginCode(Base):
         default=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+
+    __table_args__ = (
+        # verify_code: codici non usati di un'email, il più recente
+        Index(
+            "idx_login_codes_active",
+            "email",
+            "created_at",
+            postgresql_where=used.is_(False),
+            sqlite_where=used.is_(False),
+        ),
+        # sweeper: righe scadute in ordine di scadenza
+        Index("idx_login_codes_expires", "expires_at"),
+    )
+
+
+# ===============================
+# EMAIL OUTBOX
+# ===============================
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    to_address = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    # azzerato quando il messaggio è inviato o fallito: può contenere
+    # il codice di login in chiaro
+    body = Column(Text, nullable=True)
+
+    # pending | sent | failed
+    status = Column(String, default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    # prossimo tentativo (anche lease del sender che l'ha preso)
+    next_attempt_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        # il sender legge solo i pending scaduti
+        Index(
+            "idx_email_outbox_due",
+            "next_attempt_at",
+            postgresql_where=(status == "pending"),
+            sqlite_where=(status == "pending"),
+        ),
+        # retention: lo sweeper cancella i conclusi più vecchi
+        Index(
+            "idx_email_outbox_done",
+            "next_attempt_at",
+            postgresql_where=(status != "pending"),
+            sqlite_where=(status != "pending"),
+        ),
+    )
+
+
+# ===============================
+# JOB CHECKPOINTS (BATCH)
+# ===============================
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String, primary_key=True)
+
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# ===============================
+# DISCOVER (CLASSIFICA CONDIVISA)
+# ===============================
+class DiscoverRanking(Base):
+    """
+    Una versione della classifica discover: array int32 impacchettati
+    (id, owner e inizio dei gruppi di pari merito). Ogni worker legge la
+    stessa versione, quindi un cursore resta valido ovunque.
+    """
+
+    __tablename__ = "discover_rankings"
+
+    version = Column(BigInteger, primary_key=True, autoincrement=False)
+
+    size = Column(Integer, nullable=False)
+    ids = Column(LargeBinary, nullable=False)
+    owner_ids = Column(LargeBinary, nullable=False)
+    group_starts = Column(LargeBinary, nullable=False)
+
+    built_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
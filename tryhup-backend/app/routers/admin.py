@@ -1,10 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Content, User
-from app.schemas import ContentOut
-from app.dependencies import get_current_user
+from app.database import get_db, async_db
+from app.models import Content
+from app.schemas import (
+    AdminContentPage,
+    ContentOut,
+    BulkModerationRequest,
+    BulkModerationResult,
+)
+from app.core.pagination import (
+    ADMIN_MAX_PAGE_SIZE,
+    ADMIN_PAGE_SIZE,
+    LEGACY_LIST_QUERY,
+    approximate_count,
+    keyset_page,
+    legacy_list,
+)
+from app.dependencies import get_current_auth_user
+from app.services.auth_cache import CachedUser
+from app.services.timeline import fan_out_content
+from app.services.feed_cache import invalidate_followers
+from app.services.bulk_moderation import bulk_approve_contents, resolve_ids
+from app.core.cache import cache_stats
+from app.services.email_outbox import outbox_stats
+from app.services.follow_graph import follow_graph
 
 router = APIRouter(
     prefix="/admin",
@@ -15,7 +37,7 @@ router = APIRouter(
 # ===============================
 # ADMIN CHECK
 # ===============================
-def require_admin(user: User):
+def require_admin(user: CachedUser):
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -29,16 +51,20 @@ def require_admin(user: User):
 
 @router.get(
     "/contents",
-    response_model=list[ContentOut],
+    response_model=Union[AdminContentPage, List[ContentOut]],
     status_code=status.HTTP_200_OK,
 )
 def get_all_contents(
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
     approved: bool | None = Query(
         None,
         description="Filter by approval status",
     ),
+    cursor: str | None = Query(None),
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    legacy: bool = LEGACY_LIST_QUERY,
 ):
     require_admin(current_user)
 
@@ -47,7 +73,40 @@ def get_all_contents(
     if approved is not None:
         query = query.filter(Content.approved == approved)
 
-    return query.order_by(Content.created_at.desc()).all()
+    items, next_cursor = keyset_page(
+        query,
+        Content.created_at,
+        Content.id,
+        cursor=cursor,
+        limit=limit,
+    )
+
+    total = approximate_count(db, query)
+
+    if legacy:
+        return legacy_list(response, items, next_cursor, total)
+
+    return AdminContentPage(
+        items=items,
+        next_cursor=next_cursor,
+        approximate_total=total,
+    )
+
+
+@router.post(
+    "/contents/bulk/approve",
+    response_model=BulkModerationResult,
+    status_code=status.HTTP_200_OK,
+)
+def bulk_approve(
+    payload: BulkModerationRequest,
+    db: Session = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_auth_user),
+):
+    require_admin(current_user)
+
+    ids = resolve_ids(db, payload, Content, Content.approved.is_(False))
+    return bulk_approve_contents(db, ids)
 
 
 @router.post(
@@ -57,7 +116,7 @@ def get_all_contents(
 def approve_content(
     content_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     require_admin(current_user)
 
@@ -73,7 +132,64 @@ def approve_content(
             detail="Content not found",
         )
 
-    content.approved = True
+    newly_approved = not content.approved
+    if newly_approved:
+        content.approved = True
+        fan_out_content(db, content)
+
     db.commit()
 
+    if newly_approved and content.owner_id is not None:
+        invalidate_followers(db, [content.owner_id])
+
     return {"message": "Content approved successfully"}
+
+
+# ===============================
+# CACHE STATS
+# GET /admin/cache/stats
+# ===============================
+@router.get(
+    "/cache/stats",
+    status_code=status.HTTP_200_OK,
+)
+def get_cache_stats(
+    current_user: CachedUser = Depends(get_current_auth_user),
+):
+    require_admin(current_user)
+
+    return cache_stats()
+
+
+# ===============================
+# EMAIL OUTBOX STATS
+# GET /admin/email/stats
+# ===============================
+@router.get(
+    "/email/stats",
+    status_code=status.HTTP_200_OK,
+)
+@async_db
+def get_email_stats(
+    db: Session = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_auth_user),
+):
+    require_admin(current_user)
+
+    return outbox_stats(db)
+
+
+# ===============================
+# FOLLOW GRAPH STATS
+# GET /admin/follow-graph/stats
+# ===============================
+@router.get(
+    "/follow-graph/stats",
+    status_code=status.HTTP_200_OK,
+)
+def get_follow_graph_stats(
+    current_user: CachedUser = Depends(get_current_auth_user),
+):
+    require_admin(current_user)
+
+    return follow_graph.stats()
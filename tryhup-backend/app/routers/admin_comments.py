@@ -1,10 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import Comment, User
-from app.schemas import CommentOut
-from app.dependencies import get_current_user
+from app.models import Comment
+from app.schemas import (
+    AdminCommentPage,
+    BulkModerationRequest,
+    BulkModerationResult,
+    CommentOut,
+)
+from app.core.pagination import (
+    ADMIN_MAX_PAGE_SIZE,
+    ADMIN_PAGE_SIZE,
+    LEGACY_LIST_QUERY,
+    approximate_count,
+    keyset_page,
+    legacy_list,
+)
+from app.dependencies import get_current_auth_user
+from app.services.auth_cache import CachedUser
+from app.services.comment_threads import adjust_reply_counts
+from app.services.moderation_queue import moderation_queue_stats
+from app.services.bulk_moderation import (
+    bulk_approve_comments,
+    bulk_reject_comments,
+    resolve_ids,
+)
 
 
 router = APIRouter(
@@ -16,7 +39,9 @@ router = APIRouter(
 # ===============================
 # ADMIN GUARD
 # ===============================
-def require_admin(current_user: User = Depends(get_current_user)):
+def require_admin(
+    current_user: CachedUser = Depends(get_current_auth_user),
+):
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -31,23 +56,98 @@ def require_admin(current_user: User = Depends(get_current_user)):
 # ===============================
 @router.get(
     "",
-    response_model=list[CommentOut],
+    response_model=Union[AdminCommentPage, List[CommentOut]],
 )
 def list_comments(
+    response: Response,
     status: str = Query("pending", enum=["pending", "approved", "flagged"]),
+    cursor: str | None = Query(None),
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    legacy: bool = LEGACY_LIST_QUERY,
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: CachedUser = Depends(require_admin),
 ):
     query = db.query(Comment)
 
     if status == "pending":
-        query = query.filter(Comment.is_approved.is_(False))
+        # quelli ancora in coda li valuta prima il worker
+        query = query.filter(
+            Comment.is_approved.is_(False),
+            Comment.moderation_pending.is_(False),
+        )
     elif status == "approved":
         query = query.filter(Comment.is_approved.is_(True))
     elif status == "flagged":
         query = query.filter(Comment.is_flagged.is_(True))
 
-    return query.order_by(Comment.created_at.desc()).all()
+    items, next_cursor = keyset_page(
+        query,
+        Comment.created_at,
+        Comment.id,
+        cursor=cursor,
+        limit=limit,
+    )
+
+    total = approximate_count(db, query)
+
+    if legacy:
+        return legacy_list(response, items, next_cursor, total)
+
+    return AdminCommentPage(
+        items=items,
+        next_cursor=next_cursor,
+        approximate_total=total,
+    )
+
+
+# ===============================
+# MODERATION QUEUE STATS
+# GET /admin/comments/moderation/stats
+# ===============================
+@router.get("/moderation/stats")
+def get_moderation_stats(
+    db: Session = Depends(get_db),
+    _: CachedUser = Depends(require_admin),
+):
+    return moderation_queue_stats(db)
+
+
+# ===============================
+# BULK APPROVE / REJECT
+# POST /admin/comments/bulk/approve
+# POST /admin/comments/bulk/reject
+# ===============================
+def _review_queue():
+    return (
+        Comment.is_approved.is_(False),
+        Comment.moderation_pending.is_(False),
+    )
+
+
+@router.post(
+    "/bulk/approve",
+    response_model=BulkModerationResult,
+)
+def bulk_approve(
+    payload: BulkModerationRequest,
+    db: Session = Depends(get_db),
+    _: CachedUser = Depends(require_admin),
+):
+    ids = resolve_ids(db, payload, Comment, *_review_queue())
+    return bulk_approve_comments(db, ids)
+
+
+@router.post(
+    "/bulk/reject",
+    response_model=BulkModerationResult,
+)
+def bulk_reject(
+    payload: BulkModerationRequest,
+    db: Session = Depends(get_db),
+    _: CachedUser = Depends(require_admin),
+):
+    ids = resolve_ids(db, payload, Comment, *_review_queue())
+    return bulk_reject_comments(db, ids)
 
 
 # ===============================
@@ -61,15 +161,19 @@ def list_comments(
 def approve_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: CachedUser = Depends(require_admin),
 ):
     comment = db.query(Comment).filter(Comment.id == comment_id).first()
 
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
+    if not comment.is_approved and comment.parent_id is not None:
+        adjust_reply_counts(db, {comment.parent_id: 1})
+
     comment.is_approved = True
     comment.is_flagged = False
+    comment.moderation_pending = False
 
     db.commit()
     db.refresh(comment)
@@ -88,15 +192,19 @@ def approve_comment(
 def reject_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_admin),
+    _: CachedUser = Depends(require_admin),
 ):
     comment = db.query(Comment).filter(Comment.id == comment_id).first()
 
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
+    if comment.is_approved and comment.parent_id is not None:
+        adjust_reply_counts(db, {comment.parent_id: -1})
+
     comment.is_approved = False
     comment.is_flagged = True
+    comment.moderation_pending = False
 
     db.commit()
     db.refresh(comment)
@@ -1,11 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
+from typing import List, Optional, Union
 
 from app.database import get_db
 from app.models import User, CreatorVerification
 from app.dependencies import get_current_admin
+from app.services.auth_cache import CachedUser, invalidate_auth_user
+from app.schemas import (
+    BulkCreatorRejectRequest,
+    BulkModerationRequest,
+    BulkModerationResult,
+)
+from app.services.bulk_moderation import (
+    bulk_approve_creators,
+    bulk_reject_creators,
+    resolve_ids,
+)
+from app.core.pagination import (
+    ADMIN_MAX_PAGE_SIZE,
+    ADMIN_PAGE_SIZE,
+    LEGACY_LIST_QUERY,
+    approximate_count,
+    keyset_page,
+    legacy_list,
+)
 
 
 router = APIRouter(
@@ -21,29 +41,125 @@ class RejectCreatorPayload(BaseModel):
     admin_note: str = Field(..., min_length=5, max_length=500)
 
 
+class CreatorVerificationOut(BaseModel):
+    id: int
+    user_id: int
+
+    category: str
+    degree_title: str
+    professional_register: Optional[str]
+
+    identity_document_path: str
+    degree_document_path: str
+    register_document_path: Optional[str]
+
+    status: str
+    admin_note: Optional[str]
+
+    created_at: datetime
+    reviewed_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class CreatorRequestPage(BaseModel):
+    items: List[CreatorVerificationOut]
+    next_cursor: Optional[str] = None
+    approximate_total: int
+
+
 # ===============================
 # GET CREATOR REQUESTS
 # GET /admin/creators?status_filter=pending
 # ===============================
 @router.get(
     "",
+    response_model=Union[CreatorRequestPage, List[CreatorVerificationOut]],
     status_code=status.HTTP_200_OK,
 )
 def get_creator_requests(
+    response: Response,
     status_filter: str = Query(
         "pending",
         description="pending | verified | rejected",
     ),
+    cursor: str | None = Query(None),
+    limit: int = Query(ADMIN_PAGE_SIZE, ge=1, le=ADMIN_MAX_PAGE_SIZE),
+    legacy: bool = LEGACY_LIST_QUERY,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: CachedUser = Depends(get_current_admin),
 ):
-    return (
+    query = (
         db.query(CreatorVerification)
         .filter(CreatorVerification.status == status_filter)
-        .order_by(CreatorVerification.created_at.asc())
-        .all()
     )
 
+    # le richieste più vecchie per prime (FIFO)
+    items, next_cursor = keyset_page(
+        query,
+        CreatorVerification.created_at,
+        CreatorVerification.id,
+        cursor=cursor,
+        limit=limit,
+        descending=False,
+    )
+
+    total = approximate_count(db, query)
+
+    if legacy:
+        return legacy_list(response, items, next_cursor, total)
+
+    return CreatorRequestPage(
+        items=items,
+        next_cursor=next_cursor,
+        approximate_total=total,
+    )
+
+
+# ===============================
+# BULK APPROVE / REJECT
+# POST /admin/creators/bulk/approve
+# POST /admin/creators/bulk/reject
+# (prima delle rotte /{verification_id}/...)
+# ===============================
+@router.post(
+    "/bulk/approve",
+    response_model=BulkModerationResult,
+    status_code=status.HTTP_200_OK,
+)
+def bulk_approve(
+    payload: BulkModerationRequest,
+    db: Session = Depends(get_db),
+    admin: CachedUser = Depends(get_current_admin),
+):
+    ids = resolve_ids(
+        db,
+        payload,
+        CreatorVerification,
+        CreatorVerification.status == "pending",
+    )
+    return bulk_approve_creators(db, ids)
+
+
+@router.post(
+    "/bulk/reject",
+    response_model=BulkModerationResult,
+    status_code=status.HTTP_200_OK,
+)
+def bulk_reject(
+    payload: BulkCreatorRejectRequest,
+    db: Session = Depends(get_db),
+    admin: CachedUser = Depends(get_current_admin),
+):
+    ids = resolve_ids(
+        db,
+        payload,
+        CreatorVerification,
+        CreatorVerification.status == "pending",
+    )
+    return bulk_reject_creators(db, ids, payload.admin_note)
+
 
 # ===============================
 # APPROVE CREATOR
@@ -56,7 +172,7 @@ def get_creator_requests(
 def approve_creator(
     verification_id: int,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: CachedUser = Depends(get_current_admin),
 ):
     verification = (
         db.query(CreatorVerification)
@@ -100,6 +216,8 @@ def approve_creator(
     db.refresh(verification)
     db.refresh(user)
 
+    invalidate_auth_user(user.email)
+
     return verification
 
 
@@ -115,7 +233,7 @@ def reject_creator(
     verification_id: int,
     payload: RejectCreatorPayload,
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin),
+    admin: CachedUser = Depends(get_current_admin),
 ):
     verification = (
         db.query(CreatorVerification)
@@ -159,4 +277,6 @@ def reject_creator(
     db.refresh(verification)
     db.refresh(user)
 
+    invalidate_auth_user(user.email)
+
     return verification
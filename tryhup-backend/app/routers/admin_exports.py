@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models import Comment, Content, CreatorVerification, Follow
+from app.dependencies import get_current_admin
+from app.services.auth_cache import CachedUser
+
+
+router = APIRouter(
+    prefix="/admin/export",
+    tags=["admin-export"],
+)
+
+
+# ===============================
+# CONFIG
+# ===============================
+# righe per giro di fetch dal cursore server-side (= per chunk HTTP)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+EXPORT_DATASETS = {
+    "contents": Content.__table__,
+    "comments": Comment.__table__,
+    "follows": Follow.__table__,
+    "verifications": CreatorVerification.__table__,
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+# ===============================
+# STREAM
+# ===============================
+def _ndjson(columns, rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=str) + "\n"
+        for row in rows
+    )
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(v) for v in row] for row in rows)
+    return buffer.getvalue()
+
+
+def stream_dataset(dataset: str, fmt: str, after_id: int) -> Iterator[str]:
+    """
+    Legge la tabella in ordine di id con un cursore server-side
+    (yield_per → stream_results) ed emette un chunk per blocco di righe:
+    in memoria c'è sempre un solo blocco, qualunque sia la dimensione
+    della tabella. Sessione propria: quella della richiesta è già chiusa
+    quando parte lo streaming.
+    """
+
+    table = EXPORT_DATASETS[dataset]
+    columns = [column.name for column in table.columns]
+
+    if fmt == "csv":
+        yield _csv([columns])
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(table)
+            .where(table.c.id > after_id)
+            .order_by(table.c.id)
+            .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+        )
+
+        for rows in result.partitions():
+            if fmt == "csv":
+                yield _csv(rows)
+            else:
+                yield _ndjson(columns, rows)
+    finally:
+        db.close()
+
+
+# ===============================
+# EXPORT
+# GET /admin/export/{dataset}?format=ndjson&after_id=0
+# ===============================
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", enum=["ndjson", "csv"]),
+    after_id: int = Query(
+        0,
+        ge=0,
+        description="Riprende dopo l'ultimo id ricevuto",
+    ),
+    admin: CachedUser = Depends(get_current_admin),
+):
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown dataset",
+        )
+
+    filename = f"{dataset}-after-{after_id}.{format}"
+
+    return StreamingResponse(
+        stream_dataset(dataset, format, after_id),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta, timezone
-import random
-import smtplib
+from datetime import datetime, timezone
 import os
 import logging
-from email.message import EmailMessage
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_db, async_db
 from app.models import User, LoginCode
 from app.schemas import AuthRequestCode, AuthVerifyCode, AuthTokenOut
 from app.core.security import create_access_token
+from app.services.email_outbox import enqueue_email, wake_sender
+from app.services.login_codes import issue_login_code
+from app.core.rate_limit import body_email, rate_limit
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger(__name__)
@@ -22,54 +22,42 @@ DEV_MODE = os.getenv("DEV_MODE") == "true"
 # ===============================
 # EMAIL SENDER
 # ===============================
-def send_login_code(email: str, code: str):
-    msg = EmailMessage()
-    msg["Subject"] = "TryHup – Codice di accesso"
-    msg["From"] = os.getenv("EMAIL_FROM", "TryHup <noreply@tryhup.com>")
-    msg["To"] = email
-    msg.set_content(f"Il tuo codice di accesso TryHup è: {code}")
-
-    with smtplib.SMTP(
-        os.getenv("SMTP_HOST"),
-        int(os.getenv("SMTP_PORT")),
-    ) as server:
-        server.starttls()
-        server.login(
-            os.getenv("SMTP_USER"),
-            os.getenv("SMTP_PASSWORD"),
-        )
-        server.send_message(msg)
+def send_login_code(db: Session, email: str, code: str):
+    """
+    Mette l'email in outbox nella transazione del codice: la consegna
+    SMTP la fa il sender in background (app/services/email_outbox.py).
+    """
+
+    enqueue_email(
+        db,
+        to_address=email,
+        subject="TryHup – Codice di accesso",
+        body=f"Il tuo codice di accesso TryHup è: {code}",
+    )
 
 
 # ===============================
 # REQUEST LOGIN CODE (PROD)
 # ===============================
-@router.post("/request-code", status_code=status.HTTP_200_OK)
+@router.post(
+    "/request-code",
+    status_code=status.HTTP_200_OK,
+    dependencies=[
+        rate_limit("auth_request_code_ip", "20/hour"),
+        rate_limit("auth_request_code_email", "5/hour", key=body_email),
+    ],
+)
+@async_db
 def request_code(
     payload: AuthRequestCode,
     db: Session = Depends(get_db),
 ):
-    db.query(LoginCode).filter(
-        LoginCode.email == payload.email,
-        LoginCode.used.is_(False),
-    ).update({"used": True})
-
-    db.commit()
-
-    code = str(random.randint(100000, 999999))
-    expires_at = datetime.now(timezone.utc) + timedelta(minutes=10)
-
-    login_code = LoginCode(
-        email=payload.email,
-        code=code,
-        expires_at=expires_at,
-        used=False,
-    )
-
-    db.add(login_code)
+    # invalidazione, nuovo codice ed email in outbox: un solo commit
+    code = issue_login_code(db, payload.email)
+    send_login_code(db, payload.email, code)
     db.commit()
 
-    send_login_code(payload.email, code)
+    wake_sender()
 
     return {"message": "Login code sent"}
 
@@ -81,7 +69,14 @@ def request_code(
     "/verify-code",
     response_model=AuthTokenOut,
     status_code=status.HTTP_200_OK,
+    # il codice ha 6 cifre e vale 10 minuti: il limite per email
+    # rende impraticabile il brute force anche da molti IP
+    dependencies=[
+        rate_limit("auth_verify_code_ip", "60/hour"),
+        rate_limit("auth_verify_code_email", "10/600", key=body_email),
+    ],
 )
+@async_db
 def verify_code(
     payload: AuthVerifyCode,
     db: Session = Depends(get_db),
@@ -137,7 +132,9 @@ class DevLoginPayload(BaseModel):
     "/dev-login",
     response_model=AuthTokenOut,
     status_code=status.HTTP_200_OK,
+    dependencies=[rate_limit("auth_dev_login_ip", "60/minute")],
 )
+@async_db
 def dev_login(
     payload: DevLoginPayload,
     db: Session = Depends(get_db),
@@ -1,11 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Comment, Content, User
-from app.schemas import CommentCreate, CommentOut
-from app.dependencies import get_current_user
+from app.database import get_db, async_db
+from app.models import Comment, Content
+from app.schemas import (
+    CommentCreate,
+    CommentOut,
+    CommentPage,
+    CommentThreadOut,
+    CommentThreadPage,
+)
+from app.dependencies import get_current_auth_user
+from app.core.rate_limit import client_subject, rate_limit
+from app.services.auth_cache import CachedUser
 from app.services.moderation import moderate_comment
+from app.services.moderation_queue import (
+    MODERATION_ASYNC,
+    PENDING_NOTE,
+    enqueue_wakeup,
+)
+from app.services.comment_threads import (
+    THREAD_MAX_PREVIEW_REPLIES,
+    THREAD_PREVIEW_REPLIES,
+    THREADS_MAX_PAGE_SIZE,
+    THREADS_PAGE_SIZE,
+    adjust_reply_counts,
+    comment_cursor,
+    load_replies,
+    load_threads,
+)
 
 
 router = APIRouter(
@@ -22,12 +45,16 @@ router = APIRouter(
     "/{content_id}",
     response_model=CommentOut,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[
+        rate_limit("comments_create", "30/minute", key=client_subject),
+    ],
 )
+@async_db
 def create_comment(
     content_id: int,
     payload: CommentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     content = (
         db.query(Content)
@@ -44,22 +71,58 @@ def create_comment(
             detail="Content not found or not approved",
         )
 
-    moderation = moderate_comment(payload.text)
+    parent_id = None
+    if payload.parent_id is not None:
+        parent = (
+            db.query(Comment)
+            .filter(
+                Comment.id == payload.parent_id,
+                Comment.content_id == content_id,
+            )
+            .first()
+        )
+
+        if not parent:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parent comment not found",
+            )
+
+        # un solo livello: la risposta a una risposta va nel thread top-level
+        parent_id = parent.parent_id or parent.id
 
     comment = Comment(
         content_id=content_id,
         user_id=current_user.id,
         text=payload.text,
-        is_approved=moderation["is_approved"],
-        is_flagged=moderation["is_flagged"],
-        moderation_score=moderation["score"],
-        moderation_note=moderation["note"],
+        parent_id=parent_id,
     )
 
+    if MODERATION_ASYNC:
+        # scritto subito come pending: lo valuta il worker di moderazione
+        comment.is_approved = False
+        comment.is_flagged = False
+        comment.moderation_score = 0
+        comment.moderation_note = PENDING_NOTE
+        comment.moderation_pending = True
+    else:
+        moderation = moderate_comment(payload.text)
+        comment.is_approved = moderation["is_approved"]
+        comment.is_flagged = moderation["is_flagged"]
+        comment.moderation_score = moderation["score"]
+        comment.moderation_note = moderation["note"]
+
     db.add(comment)
+
+    if comment.is_approved and parent_id is not None:
+        adjust_reply_counts(db, {parent_id: 1})
+
     db.commit()
     db.refresh(comment)
 
+    if comment.moderation_pending:
+        enqueue_wakeup()
+
     return comment
 
 
@@ -71,6 +134,7 @@ def create_comment(
     "/{content_id}",
     response_model=list[CommentOut],
 )
+@async_db
 def get_comments_for_content(
     content_id: int,
     db: Session = Depends(get_db),
@@ -84,3 +148,91 @@ def get_comments_for_content(
         .order_by(Comment.created_at.asc())
         .all()
     )
+
+
+# ===============================
+# THREADED COMMENTS (CURSOR)
+# GET /comments/{content_id}/threads
+# ===============================
+@router.get(
+    "/{content_id}/threads",
+    response_model=CommentThreadPage,
+)
+@async_db
+def get_comment_threads(
+    content_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(THREADS_PAGE_SIZE, ge=1, le=THREADS_MAX_PAGE_SIZE),
+    replies: int = Query(
+        THREAD_PREVIEW_REPLIES,
+        ge=1,
+        le=THREAD_MAX_PREVIEW_REPLIES,
+        description="Risposte caricate subito per ogni thread",
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Commenti top-level a pagine (cursor) con le prime `replies` risposte
+    di ciascun thread, tutto in una query. Le altre risposte si caricano
+    con replies_cursor su /comments/{content_id}/replies/{comment_id}.
+    """
+
+    threads, next_cursor = load_threads(
+        db,
+        content_id=content_id,
+        cursor=cursor,
+        limit=limit,
+        replies=replies,
+    )
+
+    items = []
+    for top, top_replies in threads:
+        thread = CommentThreadOut.model_validate(top)
+        thread.replies = [CommentOut.model_validate(r) for r in top_replies]
+        if top_replies and top.reply_count > len(top_replies):
+            thread.replies_cursor = comment_cursor(top_replies[-1])
+        items.append(thread)
+
+    return CommentThreadPage(items=items, next_cursor=next_cursor)
+
+
+# ===============================
+# MORE REPLIES
+# GET /comments/{content_id}/replies/{comment_id}
+# ===============================
+@router.get(
+    "/{content_id}/replies/{comment_id}",
+    response_model=CommentPage,
+)
+@async_db
+def get_comment_replies(
+    content_id: int,
+    comment_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(THREADS_PAGE_SIZE, ge=1, le=THREADS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    parent = (
+        db.query(Comment)
+        .filter(
+            Comment.id == comment_id,
+            Comment.content_id == content_id,
+            Comment.is_approved.is_(True),
+        )
+        .first()
+    )
+
+    if not parent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Comment not found",
+        )
+
+    items, next_cursor = load_replies(
+        db,
+        parent_id=comment_id,
+        cursor=cursor,
+        limit=limit,
+    )
+
+    return CommentPage(items=items, next_cursor=next_cursor)
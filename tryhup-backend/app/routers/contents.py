@@ -1,11 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc, tuple_
+from datetime import datetime
 
-from app.database import get_db
-from app.models import Content, Follow, User
-from app.schemas import ContentCreate, ContentOut, RatingIn, FeedResponse
-from app.dependencies import get_current_user
+from app.database import get_db, async_db
+from app.models import Content, Follow
+from app.schemas import (
+    ContentCreate,
+    ContentOut,
+    RatingIn,
+    FeedResponse,
+    ViewerStateRequest,
+    ViewerStateResponse,
+)
+from app.dependencies import get_current_auth_user
+from app.services.auth_cache import CachedUser
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.rate_limit import client_subject, rate_limit
+from app.services.timeline import following_source
+from app.services.discover import get_snapshot, session_seed
+from app.services.feed_cache import feed_key, get_feed, store_feed
+from app.services.ratings import submit_rating
+from app.services.counters import like_counter
+from app.services.viewer_state import resolve_viewer_state
 
 router = APIRouter(
     prefix="/contents",
@@ -21,11 +38,15 @@ router = APIRouter(
     "/",
     response_model=ContentOut,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[
+        rate_limit("contents_create", "20/hour", key=client_subject),
+    ],
 )
+@async_db
 def create_content(
     payload: ContentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     content = Content(
         media_type=payload.media_type,
@@ -50,35 +71,97 @@ def create_content(
 @router.post(
     "/{content_id}/rate",
     status_code=status.HTTP_200_OK,
+    dependencies=[
+        rate_limit("contents_rate", "60/minute", key=client_subject),
+    ],
 )
+@async_db
 def rate_content(
     content_id: int,
     payload: RatingIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
-    content = (
-        db.query(Content)
-        .filter(
-            Content.id == content_id,
-            Content.approved.is_(True),
-        )
-        .first()
+    # un voto per utente (upsert) + aggregati aggiornati in SQL
+    aggregate = submit_rating(
+        db,
+        user_id=current_user.id,
+        content_id=content_id,
+        score=payload.rating,
     )
 
-    if not content:
+    if aggregate is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Content not found",
         )
 
-    total_score = content.rating_avg * content.rating_count
-    content.rating_count += 1
-    content.rating_avg = (total_score + payload.rating) / content.rating_count
+    return {"message": "Rating submitted successfully", **aggregate}
 
-    db.commit()
 
-    return {"message": "Rating submitted successfully"}
+# ===============================
+# VIEWER STATE (BATCH)
+# POST /contents/viewer-state
+# ===============================
+@router.post(
+    "/viewer-state",
+    response_model=ViewerStateResponse,
+    status_code=status.HTTP_200_OK,
+)
+@async_db
+def get_viewer_state(
+    payload: ViewerStateRequest,
+    db: Session = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_auth_user),
+):
+    """
+    Stato dell'utente corrente su un blocco di contenuti (max 100 id):
+    un numero fisso di query qualunque sia il numero di card.
+    """
+
+    return ViewerStateResponse(
+        items=resolve_viewer_state(db, current_user.id, payload.content_ids),
+    )
+
+
+# ===============================
+# FEED CURSORS
+# ===============================
+def _following_cursor(content: Content) -> str:
+    return encode_cursor({
+        "m": "following",
+        "k": [content.created_at.isoformat(), content.id],
+    })
+
+
+def _discover_cursor(version: int, position: int) -> str:
+    return encode_cursor({
+        "m": "discover",
+        "v": version,
+        "p": position,
+    })
+
+
+def _cursor_key(state: dict, size: int) -> list | None:
+    key = state.get("k")
+    if key is None:
+        return None
+
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    return key
+
+
+def _with_pending_likes(feed: FeedResponse) -> FeedResponse:
+    """like_count = valore persistito + delta ancora nel buffer."""
+    pending = like_counter.pending_many(item.id for item in feed.items)
+    for item in feed.items:
+        item.like_count = max(item.like_count + pending[item.id], 0)
+    return feed
 
 
 # ===============================
@@ -90,81 +173,221 @@ def rate_content(
     response_model=FeedResponse,
     status_code=status.HTTP_200_OK,
 )
+@async_db
 def unified_feed(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
     limit: int = Query(20, ge=1, le=50),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(
+        None,
+        description="Cursor opaco restituito in next_cursor (ignora offset)",
+    ),
+    include_total: bool = Query(
+        True,
+        description="False per saltare il COUNT (consigliato con cursor)",
+    ),
+    include_viewer_state: bool = Query(
+        False,
+        description="Aggiunge liked/rated/following_owner per ogni item",
+    ),
 ):
     """
     Feed unico:
     1️⃣ Contenuti degli utenti seguiti
     2️⃣ Fallback automatico su Discover
+
+    Due modalità di paginazione:
+    - offset/limit (client storici)
+    - cursor (keyset): ogni pagina costa come la prima
+
+    Le pagine passano da una cache per utente, invalidata da
+    follow/unfollow e approvazioni.
     """
 
-    following_subquery = (
-        db.query(Follow.following_id)
-        .filter(Follow.follower_id == current_user.id)
-        .subquery()
-    )
+    key = feed_key(current_user.id, cursor, limit, offset, include_total)
+
+    cached = get_feed(key)
+    if cached is not None:
+        feed = FeedResponse.model_validate(cached)
+    else:
+        feed = _build_feed(
+            db,
+            current_user.id,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            include_total=include_total,
+        )
+        store_feed(key, feed.model_dump(mode="json"))
+
+    # flag per utente: mai in cache, cambiano a ogni like/voto
+    if include_viewer_state:
+        feed.viewer_state = resolve_viewer_state(
+            db,
+            current_user.id,
+            [item.id for item in feed.items],
+            owners={item.id: item.owner_id for item in feed.items},
+        )
+
+    return feed
+
+
+def _build_feed(
+    db: Session,
+    user_id: int,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    include_total: bool,
+) -> FeedResponse:
+    state = decode_cursor(cursor) if cursor else None
+    phase = state.get("m") if state else None
+
+    if phase not in (None, "following", "discover"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    page_offset = None if state else offset
 
     # ---------------------------
     # 1️⃣ FOLLOWING FEED
     # ---------------------------
-    following_query = (
-        db.query(Content)
-        .filter(
-            Content.approved.is_(True),
-            Content.owner_id.in_(following_subquery),
+    if phase != "discover":
+        # timeline materializzata (fan-out on write) + creator in pull
+        source = following_source(user_id)
+
+        following_query = (
+            db.query(Content)
+            .join(source, source.c.id == Content.id)
         )
-        .order_by(desc(Content.created_at))
-    )
 
-    following_total = following_query.count()
+        following_total = (
+            following_query.count() if include_total else None
+        )
 
-    following_items = (
-        following_query
-        .limit(limit)
-        .offset(offset)
-        .all()
-    )
+        page_query = following_query
 
-    if following_items:
-        return FeedResponse(
-            items=following_items,
-            limit=limit,
-            offset=offset,
-            total=following_total,
+        if state:
+            key = _cursor_key(state, 2)
+            try:
+                created_at = datetime.fromisoformat(key[0])
+                last_id = int(key[1])
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor",
+                )
+            page_query = page_query.filter(
+                tuple_(source.c.created_at, source.c.id)
+                < tuple_(created_at, last_id)
+            )
+
+        page_query = page_query.order_by(
+            desc(source.c.created_at),
+            desc(source.c.id),
         )
 
+        if not state:
+            page_query = page_query.offset(offset)
+
+        following_rows = page_query.limit(limit + 1).all()
+
+        following_items = following_rows[:limit]
+
+        if following_items:
+            if len(following_rows) > limit:
+                next_cursor = _following_cursor(following_items[-1])
+            else:
+                # following esaurito: si prosegue su discover
+                next_cursor = encode_cursor({"m": "discover", "p": 0})
+
+            return _with_pending_likes(FeedResponse(
+                items=following_items,
+                limit=limit,
+                offset=page_offset,
+                total=following_total,
+                next_cursor=next_cursor,
+            ))
+
     # ---------------------------
     # 2️⃣ DISCOVER FALLBACK
     # ---------------------------
-    discover_query = (
-        db.query(Content)
-        .filter(
-            Content.approved.is_(True),
-            Content.owner_id.not_in(following_subquery),
+    # classifica precalcolata: pagina = O(limit) letture in memoria
+    followed_ids = {
+        row.following_id
+        for row in (
+            db.query(Follow.following_id)
+            .filter(Follow.follower_id == user_id)
         )
-        .order_by(
-            desc(Content.growth_index),
-            desc(Content.rating_avg),
-            func.random(),
+    }
+
+    version = None
+    position = 0
+    if phase == "discover":
+        try:
+            version = state.get("v")
+            if version is not None:
+                version = int(version)
+            position = max(int(state.get("p", 0)), 0)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    snapshot = get_snapshot(db, version)
+    if snapshot is None:
+        if version is not None:
+            # classifica scaduta: riprendere con un'altra versione
+            # mescolerebbe le pagine (duplicati e buchi)
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Cursor expired, restart the feed",
+            )
+        # la prima classifica si costruisce in background, mai qui
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Discover ranking not ready",
+            headers={"Retry-After": "5"},
         )
+
+    seed = session_seed(user_id, snapshot.version)
+
+    discover_ids, next_position = snapshot.scan(
+        seed,
+        followed_ids,
+        position=position,
+        skip=offset if state is None else 0,
+        limit=limit,
     )
 
-    discover_total = discover_query.count()
+    by_id = {
+        content.id: content
+        for content in (
+            db.query(Content)
+            .filter(
+                Content.id.in_(discover_ids),
+                Content.approved.is_(True),
+            )
+        )
+    }
+    discover_items = [by_id[i] for i in discover_ids if i in by_id]
 
-    discover_items = (
-        discover_query
-        .limit(limit)
-        .offset(offset)
-        .all()
+    discover_total = (
+        snapshot.visible_total(followed_ids) if include_total else None
     )
 
-    return FeedResponse(
+    next_cursor = None
+    if next_position is not None:
+        next_cursor = _discover_cursor(snapshot.version, next_position)
+
+    return _with_pending_likes(FeedResponse(
         items=discover_items,
         limit=limit,
-        offset=offset,
+        offset=page_offset,
         total=discover_total,
-    )
+        next_cursor=next_cursor,
+    ))
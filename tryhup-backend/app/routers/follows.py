@@ -1,15 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, async_db
 from app.models import User, Follow
-from app.dependencies import get_current_user
+from app.schemas import FollowUserOut, FollowUserPage
+from app.core.pagination import LEGACY_LIST_QUERY, keyset_page, legacy_list
+from app.dependencies import get_current_auth_user
+from app.services.auth_cache import CachedUser
+from app.services.timeline import on_follow, on_unfollow
+from app.services.feed_cache import invalidate_user
+from app.services.counters import follower_counter, following_counter
+from app.services.follow_graph import (
+    common_follower_ids,
+    follow_graph,
+    is_following,
+    mutual_ids,
+)
+from app.core.rate_limit import client_subject, rate_limit
 
 router = APIRouter(
     prefix="/follows",
     tags=["follows"],
 )
 
+FOLLOWS_PAGE_SIZE = 50
+FOLLOWS_MAX_PAGE_SIZE = 200
+
+# follow e unfollow consumano lo stesso bucket per utente
+FOLLOWS_RATE_LIMIT = rate_limit(
+    "follows_write",
+    "60/minute",
+    key=client_subject,
+)
+
 # ===============================
 # FOLLOW USER
 # POST /follows/{user_id}
@@ -17,11 +42,13 @@ router = APIRouter(
 @router.post(
     "/{user_id}",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[FOLLOWS_RATE_LIMIT],
 )
+@async_db
 def follow_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     if user_id == current_user.id:
         raise HTTPException(
@@ -60,8 +87,16 @@ def follow_user(
     )
 
     db.add(follow)
+    on_follow(db, current_user.id, target_user)
     db.commit()
 
+    # contatori su users scritti a blocchi (write-behind)
+    follower_counter.add(user_id, 1)
+    following_counter.add(current_user.id, 1)
+    follow_graph.on_follow(current_user.id, user_id)
+
+    invalidate_user(current_user.id)
+
     return {"message": "User followed successfully"}
 
 
@@ -72,11 +107,13 @@ def follow_user(
 @router.delete(
     "/{user_id}",
     status_code=status.HTTP_200_OK,
+    dependencies=[FOLLOWS_RATE_LIMIT],
 )
+@async_db
 def unfollow_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     follow = (
         db.query(Follow)
@@ -94,72 +131,194 @@ def unfollow_user(
         )
 
     db.delete(follow)
+    on_unfollow(db, current_user.id, user_id)
     db.commit()
 
+    follower_counter.add(user_id, -1)
+    following_counter.add(current_user.id, -1)
+    follow_graph.on_unfollow(current_user.id, user_id)
+
+    invalidate_user(current_user.id)
+
     return {"message": "User unfollowed successfully"}
 
 
+# ===============================
+# LISTE PAGINATE (PROIEZIONE)
+# ===============================
+def _follow_page(
+    db: Session,
+    response: Response,
+    user_id: int,
+    user_column,
+    owner_column,
+    cursor: Optional[str],
+    limit: int,
+    legacy: bool,
+):
+    """
+    Solo le colonne pubbliche dell'utente + il follow per il cursore,
+    in ordine di follow dal più recente: l'indice (owner, created_at, id)
+    serve filtro, ordinamento e keyset.
+    Con legacy_list la vecchia lista semplice (stessa proiezione, niente
+    email) e il cursor nell'header X-Next-Cursor.
+    """
+
+    exists = db.query(User.id).filter(User.id == user_id).first()
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+
+    followed_at = Follow.created_at.label("followed_at")
+    follow_id = Follow.id.label("follow_id")
+
+    query = (
+        db.query(
+            User.id,
+            User.username,
+            User.display_name,
+            User.profile_image_url,
+            followed_at,
+            follow_id,
+        )
+        .join(Follow, user_column == User.id)
+        .filter(owner_column == user_id)
+    )
+
+    rows, next_cursor = keyset_page(
+        query,
+        followed_at,
+        follow_id,
+        cursor,
+        limit,
+    )
+
+    items = [FollowUserOut.model_validate(row) for row in rows]
+
+    if legacy:
+        return legacy_list(response, items, next_cursor)
+
+    return FollowUserPage(items=items, next_cursor=next_cursor)
+
+
 # ===============================
 # LIST FOLLOWERS
-# GET /follows/{user_id}/followers
+# GET /follows/{user_id}/followers?cursor=...&limit=50
 # ===============================
 @router.get(
     "/{user_id}/followers",
+    response_model=Union[FollowUserPage, List[FollowUserOut]],
     status_code=status.HTTP_200_OK,
 )
+@async_db
 def list_followers(
     user_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    legacy: bool = LEGACY_LIST_QUERY,
     db: Session = Depends(get_db),
 ):
-    user = (
-        db.query(User)
-        .filter(User.id == user_id)
-        .first()
-    )
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-
-    followers = (
-        db.query(User)
-        .join(Follow, Follow.follower_id == User.id)
-        .filter(Follow.following_id == user_id)
-        .all()
+    return _follow_page(
+        db,
+        response,
+        user_id,
+        Follow.follower_id,
+        Follow.following_id,
+        cursor,
+        limit,
+        legacy,
     )
 
-    return followers
-
 
 # ===============================
 # LIST FOLLOWING
-# GET /follows/{user_id}/following
+# GET /follows/{user_id}/following?cursor=...&limit=50
 # ===============================
 @router.get(
     "/{user_id}/following",
+    response_model=Union[FollowUserPage, List[FollowUserOut]],
     status_code=status.HTTP_200_OK,
 )
+@async_db
 def list_following(
     user_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    legacy: bool = LEGACY_LIST_QUERY,
     db: Session = Depends(get_db),
 ):
-    user = (
-        db.query(User)
-        .filter(User.id == user_id)
-        .first()
+    return _follow_page(
+        db,
+        response,
+        user_id,
+        Follow.following_id,
+        Follow.follower_id,
+        cursor,
+        limit,
+        legacy,
     )
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
 
-    following = (
-        db.query(User)
-        .join(Follow, Follow.following_id == User.id)
-        .filter(Follow.follower_id == user_id)
-        .all()
-    )
 
-    return following
+# ===============================
+# RELAZIONE FRA DUE UTENTI
+# GET /follows/{user_id}/relationship/{other_id}
+# ===============================
+@router.get(
+    "/{user_id}/relationship/{other_id}",
+    status_code=status.HTTP_200_OK,
+)
+@async_db
+def get_relationship(
+    user_id: int,
+    other_id: int,
+    db: Session = Depends(get_db),
+):
+    following = is_following(db, user_id, other_id)
+    followed_by = is_following(db, other_id, user_id)
+
+    return {
+        "user_id": user_id,
+        "other_id": other_id,
+        "following": following,
+        "followed_by": followed_by,
+        "mutual": following and followed_by,
+    }
+
+
+# ===============================
+# FOLLOW RECIPROCI
+# GET /follows/{user_id}/mutuals
+# ===============================
+@router.get(
+    "/{user_id}/mutuals",
+    status_code=status.HTTP_200_OK,
+)
+@async_db
+def list_mutuals(
+    user_id: int,
+    limit: int = Query(FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    return {"user_ids": mutual_ids(db, user_id, limit)}
+
+
+# ===============================
+# FOLLOWER IN COMUNE
+# GET /follows/{user_id}/common-followers/{other_id}
+# ===============================
+@router.get(
+    "/{user_id}/common-followers/{other_id}",
+    status_code=status.HTTP_200_OK,
+)
+@async_db
+def list_common_followers(
+    user_id: int,
+    other_id: int,
+    limit: int = Query(FOLLOWS_PAGE_SIZE, ge=1, le=FOLLOWS_MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    return {"user_ids": common_follower_ids(db, user_id, other_id, limit)}
@@ -1,15 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Like, Content, User
-from app.dependencies import get_current_user
+from app.database import get_db, async_db
+from app.models import Like, Content
+from app.dependencies import get_current_auth_user
+from app.services.auth_cache import CachedUser
+from app.services.counters import like_counter
+from app.core.rate_limit import client_subject, rate_limit
 
 router = APIRouter(
     prefix="/likes",
     tags=["likes"],
 )
 
+# like e unlike consumano lo stesso bucket per utente
+LIKES_RATE_LIMIT = rate_limit(
+    "likes_write",
+    "120/minute",
+    key=client_subject,
+)
+
 
 # ===============================
 # LIKE CONTENT
@@ -18,11 +28,13 @@ router = APIRouter(
 @router.post(
     "/{content_id}",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[LIKES_RATE_LIMIT],
 )
+@async_db
 def like_content(
     content_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     content = db.query(Content).filter(Content.id == content_id).first()
     if not content:
@@ -48,12 +60,16 @@ def like_content(
         content_id=content_id,
     )
 
-    content.like_count += 1
-
     db.add(like)
     db.commit()
 
-    return {"message": "Content liked"}
+    # il contatore su contents viene scritto a blocchi (write-behind)
+    like_counter.add(content_id, 1)
+
+    return {
+        "message": "Content liked",
+        "like_count": like_counter.current(content_id, content.like_count),
+    }
 
 
 # ===============================
@@ -63,11 +79,13 @@ def like_content(
 @router.delete(
     "/{content_id}",
     status_code=status.HTTP_200_OK,
+    dependencies=[LIKES_RATE_LIMIT],
 )
+@async_db
 def unlike_content(
     content_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CachedUser = Depends(get_current_auth_user),
 ):
     like = (
         db.query(Like)
@@ -85,10 +103,17 @@ def unlike_content(
         )
 
     content = db.query(Content).filter(Content.id == content_id).first()
-    if content:
-        content.like_count = max(content.like_count - 1, 0)
 
     db.delete(like)
     db.commit()
 
-    return {"message": "Content unliked"}
+    like_counter.add(content_id, -1)
+
+    response = {"message": "Content unliked"}
+    if content:
+        response["like_count"] = like_counter.current(
+            content_id,
+            content.like_count,
+        )
+
+    return response
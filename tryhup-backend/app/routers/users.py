@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import User, Follow, CreatorVerification
+from app.database import get_db, async_db
+from app.models import User, CreatorVerification
 from app.schemas import (
     UserOut,
     UserUpdate,
     CreatorVerificationCreate,
 )
 from app.dependencies import get_current_user
+from app.services.auth_cache import invalidate_auth_user
+from app.services.counters import follower_counter, following_counter
 
 router = APIRouter(
     prefix="/users",
@@ -36,18 +38,18 @@ SENSITIVE_CATEGORIES = {
 # ===============================
 # UTILITY
 # ===============================
-def build_user_response(user: User, db: Session) -> dict:
-    followers_count = (
-        db.query(Follow)
-        .filter(Follow.following_id == user.id)
-        .count()
+def follow_counts(user: User) -> tuple[int, int]:
+    # colonne denormalizzate + delta non ancora scritti: nessuna query.
+    # Con più worker i delta stanno nello store condiviso (redis):
+    # counters rifiuta il backend memory, che ne vedrebbe solo una parte
+    return (
+        follower_counter.current(user.id, user.followers_count),
+        following_counter.current(user.id, user.following_count),
     )
 
-    following_count = (
-        db.query(Follow)
-        .filter(Follow.follower_id == user.id)
-        .count()
-    )
+
+def build_user_response(user: User, db: Session) -> dict:
+    followers_count, following_count = follow_counts(user)
 
     return {
         "id": user.id,
@@ -72,6 +74,7 @@ def build_user_response(user: User, db: Session) -> dict:
 # GET /users/me
 # ===============================
 @router.get("/me", response_model=UserOut)
+@async_db
 def get_my_profile(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -84,6 +87,7 @@ def get_my_profile(
 # PATCH /users/me
 # ===============================
 @router.patch("/me", response_model=UserOut)
+@async_db
 def update_my_profile(
     payload: UserUpdate,
     db: Session = Depends(get_db),
@@ -108,6 +112,8 @@ def update_my_profile(
     db.commit()
     db.refresh(current_user)
 
+    invalidate_auth_user(current_user.email)
+
     return build_user_response(current_user, db)
 
 
@@ -120,6 +126,7 @@ def update_my_profile(
     response_model=UserOut,
     status_code=status.HTTP_200_OK,
 )
+@async_db
 def become_creator(
     payload: CreatorVerificationCreate,
     db: Session = Depends(get_db),
@@ -157,6 +164,9 @@ def become_creator(
     db.commit()
     db.refresh(current_user)
 
+    # ruolo e flag creator cambiati: la cache auth va riletta
+    invalidate_auth_user(current_user.email)
+
     return build_user_response(current_user, db)
 
 
@@ -165,6 +175,7 @@ def become_creator(
 # GET /users/{username}
 # ===============================
 @router.get("/{username}", response_model=UserOut)
+@async_db
 def get_user_profile(
     username: str,
     db: Session = Depends(get_db),
@@ -192,6 +203,7 @@ def get_user_profile(
     "/{username}/stats",
     status_code=status.HTTP_200_OK,
 )
+@async_db
 def get_user_stats(
     username: str,
     db: Session = Depends(get_db),
@@ -208,17 +220,7 @@ def get_user_stats(
             detail="User not found",
         )
 
-    followers_count = (
-        db.query(Follow)
-        .filter(Follow.following_id == user.id)
-        .count()
-    )
-
-    following_count = (
-        db.query(Follow)
-        .filter(Follow.follower_id == user.id)
-        .count()
-    )
+    followers_count, following_count = follow_counts(user)
 
     return {
         "user_id": user.id,
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from typing import Optional, List
 
@@ -35,10 +35,31 @@ class UserOut(BaseModel):
     is_active: bool
     created_at: datetime
 
+    followers_count: int = 0
+    following_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class FollowUserOut(BaseModel):
+    """Voce delle liste follower/following: solo campi pubblici."""
+
+    id: int
+    username: Optional[str]
+    display_name: Optional[str]
+    profile_image_url: Optional[str]
+    followed_at: datetime
+
     class Config:
         from_attributes = True
 
 
+class FollowUserPage(BaseModel):
+    items: List[FollowUserOut]
+    next_cursor: Optional[str] = None
+
+
 class UserUpdate(BaseModel):
     username: Optional[str] = Field(
         None,
@@ -93,6 +114,7 @@ class ContentOut(BaseModel):
     approved: bool
     rating_avg: float
     rating_count: int
+    like_count: int = 0
     growth_index: int
     growth_percentage: int
 
@@ -102,6 +124,32 @@ class ContentOut(BaseModel):
         from_attributes = True
 
 
+class AdminContentPage(BaseModel):
+    items: List[ContentOut]
+    next_cursor: Optional[str] = None
+    approximate_total: int
+
+
+# ===============================
+# VIEWER STATE (FLAG PER CARD)
+# ===============================
+
+class ViewerStateRequest(BaseModel):
+    content_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+
+class ViewerStateOut(BaseModel):
+    content_id: int
+    liked: bool
+    rated: bool
+    my_rating: Optional[int] = None
+    following_owner: bool
+
+
+class ViewerStateResponse(BaseModel):
+    items: List[ViewerStateOut]
+
+
 # ===============================
 # FEED
 # ===============================
@@ -109,8 +157,16 @@ class ContentOut(BaseModel):
 class FeedResponse(BaseModel):
     items: List[ContentOut]
     limit: int
-    offset: int
-    total: int
+
+    # modalità offset (client storici)
+    offset: Optional[int] = None
+    total: Optional[int] = None
+
+    # modalità cursor: None = fine del feed
+    next_cursor: Optional[str] = None
+
+    # solo con include_viewer_state=true
+    viewer_state: Optional[List[ViewerStateOut]] = None
 
 
 # ===============================
@@ -134,6 +190,9 @@ class CommentOut(BaseModel):
     is_flagged: bool
     moderation_score: int
     moderation_note: Optional[str]
+    moderation_pending: bool = False
+
+    reply_count: int = 0
 
     created_at: datetime
 
@@ -141,6 +200,28 @@ class CommentOut(BaseModel):
         from_attributes = True
 
 
+class CommentThreadOut(CommentOut):
+    # prime K risposte, il resto con replies_cursor
+    replies: List[CommentOut] = []
+    replies_cursor: Optional[str] = None
+
+
+class CommentThreadPage(BaseModel):
+    items: List[CommentThreadOut]
+    next_cursor: Optional[str] = None
+
+
+class CommentPage(BaseModel):
+    items: List[CommentOut]
+    next_cursor: Optional[str] = None
+
+
+class AdminCommentPage(BaseModel):
+    items: List[CommentOut]
+    next_cursor: Optional[str] = None
+    approximate_total: int
+
+
 # ===============================
 # AUTH
 # ===============================
@@ -158,3 +239,30 @@ class AuthTokenOut(BaseModel):
     access_token: str
     token_type: str = "bearer"
     profile_completed: bool
+
+
+# ===============================
+# ADMIN BULK MODERATION
+# ===============================
+
+class BulkModerationRequest(BaseModel):
+    # id espliciti, oppure tutta la coda creata prima di pending_before
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=5000)
+    pending_before: Optional[datetime] = None
+    max_rows: int = Field(1000, ge=1, le=5000)
+
+    @model_validator(mode="after")
+    def _one_selector(self):
+        if (self.ids is None) == (self.pending_before is None):
+            raise ValueError("Provide either ids or pending_before")
+        return self
+
+
+class BulkCreatorRejectRequest(BulkModerationRequest):
+    admin_note: str = Field(..., min_length=5, max_length=500)
+
+
+class BulkModerationResult(BaseModel):
+    updated: List[int] = []
+    not_found: List[int] = []
+    already_processed: List[int] = []
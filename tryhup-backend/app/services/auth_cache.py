@@ -0,0 +1,63 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.core.cache import create_cache
+from app.models import User
+
+
+# ===============================
+# CONFIG
+# ===============================
+# con backend memory ogni worker ha la sua copia: il TTL limita per
+# quanto un cambio fatto su un altro worker resta invisibile
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(
+    os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "50000")
+)
+
+
+auth_user_cache = create_cache(
+    "auth_users",
+    max_entries=AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl=AUTH_USER_CACHE_TTL,
+)
+
+
+# ===============================
+# UTENTE AUTENTICATO (SOLO CAMPI AUTH)
+# ===============================
+class CachedUser(BaseModel):
+    """
+    Quello che serve ad auth e alla maggior parte degli handler.
+    Chi deve leggere/modificare il profilo usa get_current_user,
+    che carica la riga completa.
+    """
+
+    id: int
+    email: str
+    role: str
+    is_active: bool
+    is_creator: bool
+    is_creator_verified: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
+def get_cached_auth_user(email: str) -> Optional[CachedUser]:
+    data = auth_user_cache.get(email)
+    return CachedUser(**data) if data is not None else None
+
+
+def remember_auth_user(user: User) -> CachedUser:
+    cached = CachedUser.model_validate(user)
+    auth_user_cache.set(user.email, cached.model_dump())
+    return cached
+
+
+def invalidate_auth_user(email: str) -> None:
+    """Da chiamare dopo ogni commit che cambia ruolo, stato o flag creator."""
+    auth_user_cache.delete(email)
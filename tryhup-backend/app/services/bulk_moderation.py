@@ -0,0 +1,255 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import Comment, Content, CreatorVerification, User
+from app.schemas import BulkModerationRequest, BulkModerationResult
+from app.services.auth_cache import invalidate_auth_user
+from app.services.comment_threads import adjust_reply_counts
+from app.services.feed_cache import invalidate_followers
+from app.services.timeline import fan_out_contents
+
+
+# ===============================
+# CONFIG
+# ===============================
+BULK_MAX_IDS = 5000
+# id per singolo UPDATE ... RETURNING (resta sotto i limiti di parametri)
+BULK_BATCH_SIZE = 500
+
+
+def _batches(ids: List[int]):
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        yield ids[start:start + BULK_BATCH_SIZE]
+
+
+def resolve_ids(
+    db: Session,
+    payload: BulkModerationRequest,
+    model,
+    *queue_filters,
+) -> List[int]:
+    """
+    Gli id espliciti (deduplicati, in ordine) oppure le prime max_rows
+    righe della coda create prima di `pending_before`.
+    """
+
+    if payload.ids is not None:
+        return list(dict.fromkeys(payload.ids))
+
+    return db.execute(
+        select(model.id)
+        .where(*queue_filters, model.created_at < payload.pending_before)
+        .order_by(model.created_at, model.id)
+        .limit(payload.max_rows)
+    ).scalars().all()
+
+
+def _apply(
+    db: Session,
+    model,
+    ids: List[int],
+    pending,
+    values: dict,
+    state_columns=(),
+) -> Tuple[BulkModerationResult, list]:
+    """
+    Per ogni batch: lo stato attuale delle righe (FOR UPDATE) per gli
+    esiti per-id, poi un solo UPDATE ... RETURNING sulle righe che
+    cambiano davvero. Nessun commit: tutto in un'unica transazione.
+
+    Restituisce anche lo stato *precedente* (state_columns) delle righe
+    aggiornate, per i side effect (reply_count, fan-out, utenti).
+    """
+
+    result = BulkModerationResult()
+    changed = []
+
+    for batch in _batches(ids):
+        state = {
+            row.id: row
+            for row in db.execute(
+                select(model.id, pending.label("pending"), *state_columns)
+                .where(model.id.in_(batch))
+                .with_for_update()
+            )
+        }
+
+        to_change = [i for i in batch if i in state and state[i].pending]
+
+        if to_change:
+            updated = db.execute(
+                update(model)
+                .where(model.id.in_(to_change))
+                .values(**values)
+                .returning(model.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            result.updated.extend(updated)
+            changed.extend(state[i] for i in updated)
+
+        for i in batch:
+            if i not in state:
+                result.not_found.append(i)
+            elif not state[i].pending:
+                result.already_processed.append(i)
+
+    return result, changed
+
+
+def _reply_deltas(rows, delta: int) -> Dict[int, int]:
+    deltas: Dict[int, int] = {}
+    for row in rows:
+        if row.parent_id is not None:
+            deltas[row.parent_id] = deltas.get(row.parent_id, 0) + delta
+    return deltas
+
+
+# ===============================
+# COMMENTI
+# ===============================
+def bulk_approve_comments(
+    db: Session,
+    ids: List[int],
+) -> BulkModerationResult:
+    result, rows = _apply(
+        db,
+        Comment,
+        ids,
+        Comment.is_approved.is_(False),
+        {
+            "is_approved": True,
+            "is_flagged": False,
+            "moderation_pending": False,
+        },
+        state_columns=(Comment.parent_id,),
+    )
+
+    adjust_reply_counts(db, _reply_deltas(rows, 1))
+
+    db.commit()
+    return result
+
+
+def bulk_reject_comments(
+    db: Session,
+    ids: List[int],
+) -> BulkModerationResult:
+    result, rows = _apply(
+        db,
+        Comment,
+        ids,
+        Comment.is_approved.is_(True) | Comment.is_flagged.is_(False),
+        {
+            "is_approved": False,
+            "is_flagged": True,
+            "moderation_pending": False,
+        },
+        state_columns=(Comment.parent_id, Comment.is_approved),
+    )
+
+    # reply_count scende solo per le risposte che erano visibili
+    adjust_reply_counts(
+        db,
+        _reply_deltas([row for row in rows if row.is_approved], -1),
+    )
+
+    db.commit()
+    return result
+
+
+# ===============================
+# CONTENUTI
+# ===============================
+def bulk_approve_contents(
+    db: Session,
+    ids: List[int],
+) -> BulkModerationResult:
+    result, rows = _apply(
+        db,
+        Content,
+        ids,
+        Content.approved.is_(False),
+        {"approved": True},
+        state_columns=(Content.owner_id,),
+    )
+
+    # ✅ TIMELINE: un INSERT ... SELECT per batch, non uno per contenuto
+    for batch in _batches(rows):
+        fan_out_contents(
+            db,
+            [row.id for row in batch],
+            [row.owner_id for row in batch if row.owner_id is not None],
+        )
+
+    db.commit()
+
+    # ✅ FEED: solo i follower degli autori approvati
+    invalidate_followers(
+        db,
+        [row.owner_id for row in rows if row.owner_id is not None],
+    )
+
+    return result
+
+
+# ===============================
+# CREATOR
+# ===============================
+def _review_creators(
+    db: Session,
+    ids: List[int],
+    status: str,
+    admin_note: Optional[str],
+    is_creator: bool,
+) -> BulkModerationResult:
+    result, rows = _apply(
+        db,
+        CreatorVerification,
+        ids,
+        CreatorVerification.status == "pending",
+        {
+            "status": status,
+            "admin_note": admin_note,
+            "reviewed_at": datetime.now(timezone.utc),
+        },
+        state_columns=(CreatorVerification.user_id,),
+    )
+
+    # ✅ ALLINEAMENTO STATO UTENTE (in blocco)
+    emails: List[str] = []
+    user_ids = [row.user_id for row in rows]
+    for batch in _batches(user_ids):
+        emails.extend(
+            db.execute(
+                update(User)
+                .where(User.id.in_(batch))
+                .values(is_creator=is_creator, is_creator_verified=is_creator)
+                .returning(User.email)
+                .execution_options(synchronize_session=False)
+            ).scalars()
+        )
+
+    db.commit()
+
+    for email in emails:
+        invalidate_auth_user(email)
+
+    return result
+
+
+def bulk_approve_creators(
+    db: Session,
+    ids: List[int],
+) -> BulkModerationResult:
+    return _review_creators(db, ids, "verified", None, True)
+
+
+def bulk_reject_creators(
+    db: Session,
+    ids: List[int],
+    admin_note: str,
+) -> BulkModerationResult:
+    return _review_creators(db, ids, "rejected", admin_note, False)
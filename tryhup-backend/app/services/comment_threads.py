@@ -0,0 +1,211 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    bindparam,
+    case,
+    func,
+    select,
+    true,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from app.core.pagination import decode_keyset, encode_keyset
+from app.models import Comment
+
+
+# ===============================
+# CONFIG
+# ===============================
+THREADS_PAGE_SIZE = 20
+THREADS_MAX_PAGE_SIZE = 50
+THREAD_PREVIEW_REPLIES = 3
+THREAD_MAX_PREVIEW_REPLIES = 10
+
+
+# ===============================
+# CURSOR (created_at, id)
+# ===============================
+def comment_cursor(comment: Comment) -> str:
+    return encode_keyset(comment.created_at, comment.id)
+
+
+def _cursor_key(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    return decode_keyset(cursor) if cursor else None
+
+
+def _after(key: Optional[Tuple[datetime, int]]):
+    if key is None:
+        return true()
+    return tuple_(Comment.created_at, Comment.id) > tuple_(*key)
+
+
+# ===============================
+# THREAD (UNA QUERY)
+# ===============================
+def load_threads(
+    db: Session,
+    content_id: int,
+    cursor: Optional[str],
+    limit: int,
+    replies: int,
+):
+    """
+    Pagina di commenti top-level + prime `replies` risposte di ciascuno,
+    in un'unica query: CTE con la pagina dei top-level, ROW_NUMBER()
+    partizionato per thread sulle risposte, UNION degli id.
+
+    Restituisce (threads, next_cursor) con threads = [(top, [risposte])].
+    """
+
+    key = _cursor_key(cursor)
+
+    # limit + 1: la riga in più dice solo se esiste una pagina dopo
+    top_level = (
+        select(Comment.id)
+        .where(
+            Comment.content_id == content_id,
+            Comment.parent_id.is_(None),
+            Comment.is_approved.is_(True),
+            _after(key),
+        )
+        .order_by(Comment.created_at, Comment.id)
+        .limit(limit + 1)
+        .cte("top_level")
+    )
+
+    ranked = (
+        select(
+            Comment.id,
+            func.row_number().over(
+                partition_by=Comment.parent_id,
+                order_by=(Comment.created_at, Comment.id),
+            ).label("rn"),
+        )
+        .where(
+            Comment.parent_id.in_(select(top_level.c.id)),
+            Comment.is_approved.is_(True),
+        )
+        .subquery("ranked")
+    )
+
+    wanted = union_all(
+        select(top_level.c.id),
+        select(ranked.c.id).where(ranked.c.rn <= replies),
+    ).subquery("wanted")
+
+    rows = db.execute(
+        select(Comment)
+        .where(Comment.id.in_(select(wanted.c.id)))
+        .order_by(Comment.created_at, Comment.id)
+    ).scalars().all()
+
+    tops: List[Comment] = []
+    children: Dict[int, List[Comment]] = defaultdict(list)
+    for comment in rows:
+        if comment.parent_id is None:
+            tops.append(comment)
+        else:
+            children[comment.parent_id].append(comment)
+
+    next_cursor = None
+    if len(tops) > limit:
+        tops = tops[:limit]
+        next_cursor = comment_cursor(tops[-1])
+
+    return [(top, children.get(top.id, [])) for top in tops], next_cursor
+
+
+def load_replies(
+    db: Session,
+    parent_id: int,
+    cursor: Optional[str],
+    limit: int,
+):
+    """Pagina "carica altre risposte" di un thread, keyset su (created_at, id)."""
+
+    key = _cursor_key(cursor)
+
+    rows = db.execute(
+        select(Comment)
+        .where(
+            Comment.parent_id == parent_id,
+            Comment.is_approved.is_(True),
+            _after(key),
+        )
+        .order_by(Comment.created_at, Comment.id)
+        .limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = comment_cursor(rows[-1])
+
+    return rows, next_cursor
+
+
+# ===============================
+# REPLY COUNT (DENORMALIZZATO)
+# ===============================
+def adjust_reply_counts(db: Session, deltas: Dict[int, int]) -> None:
+    """
+    Applica i delta a comments.reply_count con un UPDATE relativo in bulk.
+    Da chiamare nella stessa transazione che cambia is_approved.
+    """
+
+    deltas = {k: v for k, v in deltas.items() if k is not None and v}
+    if not deltas:
+        return
+
+    table = Comment.__table__
+    updated_value = table.c.reply_count + bindparam("b_delta")
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(reply_count=case((updated_value < 0, 0), else_=updated_value)),
+        [
+            {"b_id": parent_id, "b_delta": delta}
+            for parent_id, delta in sorted(deltas.items())
+        ],
+    )
+
+
+def rebuild_reply_counts(db: Session) -> int:
+    """Riallinea reply_count alle risposte approvate (job di riparazione)."""
+
+    reply = Comment.__table__.alias("reply")
+    true_count = (
+        select(func.count(reply.c.id))
+        .where(
+            reply.c.parent_id == Comment.id,
+            reply.c.is_approved.is_(True),
+        )
+        .scalar_subquery()
+    )
+
+    result = db.execute(
+        update(Comment)
+        .where(Comment.reply_count != true_count)
+        .values(reply_count=true_count)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        fixed = rebuild_reply_counts(db)
+    finally:
+        db.close()
+
+    print(f"✅ reply_count riallineati: {fixed}")
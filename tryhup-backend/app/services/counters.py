@@ -0,0 +1,515 @@
+import argparse
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask, register_task
+from app.core.cache import CACHE_BACKEND, get_redis_client, shared_backend
+from app.database import SessionLocal, run_blocking
+from app.models import Content, Follow, Like, User
+from app.services.jobs import claim_job_run
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================
+# CONFIG
+# ===============================
+def _counters_backend() -> str:
+    """
+    memory | redis (buffer condiviso fra i worker). Con WEB_CONCURRENCY > 1
+    il default è redis e memory fa fallire l'avvio: la riconciliazione
+    sottrarrebbe solo i delta del proprio processo.
+    """
+
+    return shared_backend(
+        "counters",
+        os.getenv("COUNTERS_BACKEND")
+        or (CACHE_BACKEND if CACHE_BACKEND == "redis" else None),
+    )
+
+
+COUNTERS_BACKEND = _counters_backend()
+COUNTERS_FLUSH_INTERVAL = float(os.getenv("COUNTERS_FLUSH_INTERVAL", "5"))
+LIKE_RECONCILE_INTERVAL = float(os.getenv("LIKE_RECONCILE_INTERVAL", "3600"))
+FOLLOW_RECONCILE_INTERVAL = float(
+    os.getenv("FOLLOW_RECONCILE_INTERVAL", "3600")
+)
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "5000"))
+# batch Redis in volo da più di così: il worker che li aveva è morto
+COUNTERS_ORPHAN_AFTER = float(os.getenv("COUNTERS_ORPHAN_AFTER", "300"))
+
+
+# ===============================
+# STORE DEI DELTA
+# ===============================
+# Un drain sposta i delta in un batch "in volo" identificato da un id:
+# resta visibile in pending() finché il flush non fa commit (ack) o
+# fallisce (restore). Così riconciliazione e letture non perdono né
+# contano due volte i delta che stanno per essere scritti.
+class MemoryCounterStore:
+    """
+    Delta accumulati nel processo: solo con un worker (vedi
+    COUNTERS_BACKEND), altrimenti la riconciliazione vedrebbe solo il
+    buffer del proprio processo.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._deltas: Dict[int, int] = defaultdict(int)
+        self._inflight: Dict[str, Dict[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: int, delta: int) -> None:
+        with self._lock:
+            self._deltas[key] += delta
+
+    def pending(self, key: int) -> int:
+        return self.pending_many([key])[key]
+
+    def pending_many(self, keys: Iterable[int]) -> Dict[int, int]:
+        with self._lock:
+            return {
+                k: self._deltas.get(k, 0)
+                + sum(batch.get(k, 0) for batch in self._inflight.values())
+                for k in keys
+            }
+
+    def drain(self) -> Tuple[Optional[str], Dict[int, int]]:
+        with self._lock:
+            deltas = {k: v for k, v in self._deltas.items() if v}
+            self._deltas = defaultdict(int)
+            if not deltas:
+                return None, {}
+            batch_id = uuid.uuid4().hex
+            self._inflight[batch_id] = deltas
+        return batch_id, deltas
+
+    def ack(self, batch_id: str) -> None:
+        with self._lock:
+            self._inflight.pop(batch_id, None)
+
+    def restore(self, batch_id: str) -> None:
+        with self._lock:
+            for key, delta in self._inflight.pop(batch_id, {}).items():
+                self._deltas[key] += delta
+
+
+# KEYS[1] = hash dei delta, KEYS[2] = set dei batch in volo,
+# KEYS[3] = hash del nuovo batch
+_DRAIN_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {}
+end
+redis.call('RENAME', KEYS[1], KEYS[3])
+redis.call('SADD', KEYS[2], KEYS[3])
+return redis.call('HGETALL', KEYS[3])
+"""
+
+# KEYS[1] = hash dei delta, KEYS[2] = set dei batch, KEYS[3] = batch
+_RESTORE_LUA = """
+local raw = redis.call('HGETALL', KEYS[3])
+for i = 1, #raw, 2 do
+    redis.call('HINCRBY', KEYS[1], raw[i], raw[i + 1])
+end
+redis.call('DEL', KEYS[3])
+redis.call('SREM', KEYS[2], KEYS[3])
+return #raw / 2
+"""
+
+# KEYS[1] = hash dei delta, KEYS[2] = set dei batch; ARGV = chiavi
+_PENDING_LUA = """
+local totals = redis.call('HMGET', KEYS[1], unpack(ARGV))
+for _, batch in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    local values = redis.call('HMGET', batch, unpack(ARGV))
+    for i = 1, #ARGV do
+        totals[i] = (tonumber(totals[i]) or 0) + (tonumber(values[i]) or 0)
+    end
+end
+for i = 1, #ARGV do
+    totals[i] = tonumber(totals[i]) or 0
+end
+return totals
+"""
+
+
+class RedisCounterStore:
+    """
+    Delta in un hash Redis condiviso da tutti i worker.
+    drain() rinomina l'hash in una chiave unica per batch (atomicamente,
+    con il batch registrato nel set degli in volo): due worker non si
+    sovrascrivono il batch e i delta restano in Redis fino al commit.
+    Un batch rimasto orfano (worker morto prima di ack/restore) torna
+    nell'hash dopo COUNTERS_ORPHAN_AFTER secondi.
+    """
+
+    def __init__(self, name: str, client):
+        self.name = name
+        self.client = client
+        self.key = f"tryhup:counters:{name}"
+        self.inflight_key = f"{self.key}:inflight"
+        self._drain = client.register_script(_DRAIN_LUA)
+        self._restore = client.register_script(_RESTORE_LUA)
+        self._pending = client.register_script(_PENDING_LUA)
+
+    # add / pending_many girano anche nei router @async_db: run_blocking
+    def add(self, key: int, delta: int) -> None:
+        run_blocking(self.client.hincrby, self.key, key, delta)
+
+    def pending(self, key: int) -> int:
+        return self.pending_many([key])[key]
+
+    def pending_many(self, keys: Iterable[int]) -> Dict[int, int]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = run_blocking(
+            self._pending,
+            keys=[self.key, self.inflight_key],
+            args=keys,
+        )
+        return {k: int(v) for k, v in zip(keys, values)}
+
+    def _recover_orphans(self) -> None:
+        cutoff = time.time() - COUNTERS_ORPHAN_AFTER
+        for raw in self.client.smembers(self.inflight_key):
+            batch = raw.decode() if isinstance(raw, bytes) else raw
+            started_at = float(batch.rsplit(":", 2)[-2])
+            if started_at < cutoff:
+                logger.warning("Restoring orphaned counter batch %s", batch)
+                self.restore(batch)
+
+    def drain(self) -> Tuple[Optional[str], Dict[int, int]]:
+        self._recover_orphans()
+
+        batch_id = f"{self.key}:draining:{time.time():.0f}:{uuid.uuid4().hex}"
+        raw = self._drain(keys=[self.key, self.inflight_key, batch_id])
+        if not raw:
+            return None, {}
+
+        deltas = {
+            int(raw[i]): int(raw[i + 1])
+            for i in range(0, len(raw), 2)
+        }
+        return batch_id, {k: v for k, v in deltas.items() if v}
+
+    def ack(self, batch_id: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(batch_id)
+        pipe.srem(self.inflight_key, batch_id)
+        pipe.execute()
+
+    def restore(self, batch_id: str) -> None:
+        self._restore(keys=[self.key, self.inflight_key, batch_id])
+
+
+# ===============================
+# CONTATORI BUFFERIZZATI
+# ===============================
+class BufferedCounter:
+    """
+    Contatore write-behind su una colonna intera: le richieste registrano
+    solo un delta, il flush periodico lo somma alla riga con un UPDATE
+    relativo in bulk. Il valore reale = colonna persistita + delta in sospeso.
+    """
+
+    def __init__(self, name: str, column):
+        self.name = name
+        self.column = column
+        self.table = column.table
+
+        if COUNTERS_BACKEND == "redis":
+            self.store = RedisCounterStore(name, get_redis_client())
+        else:
+            self.store = MemoryCounterStore(name)
+
+    def add(self, key: int, delta: int = 1) -> None:
+        self.store.add(key, delta)
+
+    def pending(self, key: int) -> int:
+        return self.store.pending(key)
+
+    def pending_many(self, keys: Iterable[int]) -> Dict[int, int]:
+        return self.store.pending_many(keys)
+
+    def current(self, key: int, persisted: int) -> int:
+        return max(persisted + self.pending(key), 0)
+
+    def flush(self, db: Session) -> int:
+        batch_id, deltas = self.store.drain()
+        if batch_id is None:
+            return 0
+
+        if not deltas:
+            self.store.ack(batch_id)
+            return 0
+
+        updated_value = self.column + bindparam("b_delta")
+        statement = (
+            update(self.table)
+            .where(self.table.c.id == bindparam("b_id"))
+            .values({
+                self.column.name: case(
+                    (updated_value < 0, 0),
+                    else_=updated_value,
+                ),
+            })
+        )
+
+        try:
+            db.execute(
+                statement,
+                [
+                    {"b_id": key, "b_delta": delta}
+                    for key, delta in sorted(deltas.items())
+                ],
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # i delta tornano nel buffer: verranno riprovati al prossimo giro
+            self.store.restore(batch_id)
+            raise
+
+        self.store.ack(batch_id)
+        return len(deltas)
+
+
+COUNTERS: Dict[str, BufferedCounter] = {}
+
+
+def create_counter(name: str, column) -> BufferedCounter:
+    counter = BufferedCounter(name, column)
+    COUNTERS[name] = counter
+    return counter
+
+
+like_counter = create_counter("likes", Content.__table__.c.like_count)
+# chiave = id dell'utente seguito / dell'utente che segue
+follower_counter = create_counter(
+    "followers",
+    User.__table__.c.followers_count,
+)
+following_counter = create_counter(
+    "following",
+    User.__table__.c.following_count,
+)
+
+
+def flush_counters() -> None:
+    db = SessionLocal()
+    try:
+        for counter in COUNTERS.values():
+            counter.flush(db)
+    finally:
+        db.close()
+
+
+# ===============================
+# RICONCILIAZIONE (CRASH-SAFE)
+# ===============================
+def _reconcile_columns(db: Session, model, targets) -> int:
+    """
+    Riallinea ogni colonna di `targets` (colonna, conteggio vero,
+    contatore) al conteggio vero, a blocchi di id e in un solo giro
+    sulla tabella: una SELECT, un UPDATE per colonna e un commit per
+    blocco, solo sulle righe che divergono.
+    Recupera i delta persi se un worker muore prima del flush.
+
+    Il valore giusto da persistere è conteggio vero − delta ancora nel
+    buffer (anche quelli degli altri worker e quelli in volo): il flush
+    successivo li sommerà. Conteggio e buffer non stanno nello stesso
+    snapshot, quindi il buffer si legge prima e dopo il conteggio e le
+    righe il cui delta cambia nel mezzo vengono saltate (un like
+    committato durante il COUNT potrebbe esserci o no). L'UPDATE è
+    condizionato al valore letto, così una riga toccata da un flush
+    concorrente viene saltata invece di perdere quel flush.
+    Le righe saltate le rimette a posto il giro dopo.
+    """
+
+    table = model.__table__
+    fixed = 0
+    last_id = 0
+
+    columns = []
+    for column, true_count, _ in targets:
+        columns += [column, true_count]
+
+    while True:
+        ids = db.execute(
+            select(model.id)
+            .where(model.id > last_id)
+            .order_by(model.id)
+            .limit(RECONCILE_BATCH_SIZE)
+        ).scalars().all()
+
+        if not ids:
+            break
+
+        before = [counter.pending_many(ids) for _, _, counter in targets]
+
+        rows = db.execute(
+            select(model.id, *columns)
+            .where(model.id >= ids[0], model.id <= ids[-1])
+            .order_by(model.id)
+        ).all()
+
+        last_id = ids[-1]
+
+        for index, (column, _, counter) in enumerate(targets):
+            pending = counter.pending_many(ids)
+            offset = 1 + index * 2
+
+            changes = []
+            for row in rows:
+                if pending.get(row[0], 0) != before[index].get(row[0], 0):
+                    continue
+                stored, true_value = row[offset], row[offset + 1]
+                target = max(true_value - pending.get(row[0], 0), 0)
+                if stored != target:
+                    changes.append(
+                        {"b_id": row[0], "b_seen": stored, "b_value": target}
+                    )
+
+            if not changes:
+                continue
+
+            result = db.execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam("b_id"),
+                    table.c[column.name] == bindparam("b_seen"),
+                )
+                .values({column.name: bindparam("b_value")}),
+                changes,
+            )
+            fixed += result.rowcount
+
+        db.commit()
+
+    return fixed
+
+
+def reconcile_like_counts(db: Session) -> int:
+    """Riallinea contents.like_count alla tabella likes."""
+
+    true_count = (
+        select(func.count(Like.id))
+        .where(Like.content_id == Content.id)
+        .scalar_subquery()
+    )
+
+    return _reconcile_columns(
+        db,
+        Content,
+        [(Content.like_count, true_count, like_counter)],
+    )
+
+
+def reconcile_follow_counts(db: Session) -> int:
+    """
+    Riallinea users.followers_count / following_count a follows, con un
+    solo giro su users (i due COUNT usano gli indici di follows).
+    """
+
+    followers = (
+        select(func.count(Follow.id))
+        .where(Follow.following_id == User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count(Follow.id))
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+
+    return _reconcile_columns(
+        db,
+        User,
+        [
+            (User.followers_count, followers, follower_counter),
+            (User.following_count, following, following_counter),
+        ],
+    )
+
+
+RECONCILERS = {
+    "likes": reconcile_like_counts,
+    "follows": reconcile_follow_counts,
+}
+
+
+RECONCILE_INTERVALS = {
+    "likes": LIKE_RECONCILE_INTERVAL,
+    "follows": FOLLOW_RECONCILE_INTERVAL,
+}
+
+
+def _reconcile(name: str, force: bool = False) -> int:
+    db = SessionLocal()
+    try:
+        if not force and not claim_job_run(
+            db,
+            f"reconcile_{name}",
+            RECONCILE_INTERVALS[name],
+        ):
+            return 0
+
+        # i delta locali vanno in tabella; quelli rimasti (altri worker)
+        # vengono sottratti dal conteggio vero
+        flush_counters()
+        fixed = RECONCILERS[name](db)
+    finally:
+        db.close()
+
+    if fixed:
+        logger.info("Reconciled %s counters on %s rows", name, fixed)
+    return fixed
+
+
+register_task(
+    PeriodicTask("counters-flush", flush_counters, COUNTERS_FLUSH_INTERVAL)
+)
+register_task(
+    PeriodicTask(
+        "likes-reconcile",
+        lambda: _reconcile("likes"),
+        LIKE_RECONCILE_INTERVAL,
+        # all'avvio recupera i delta persi da un eventuale crash
+        # (lo fa il primo worker che prende il turno, non tutti)
+        run_on_start=True,
+    )
+)
+register_task(
+    PeriodicTask(
+        "follows-reconcile",
+        lambda: _reconcile("follows"),
+        FOLLOW_RECONCILE_INTERVAL,
+        run_on_start=True,
+    )
+)
+
+
+# ===============================
+# RIPARAZIONE MANUALE
+# python -m app.services.counters --only follows
+# ===============================
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ricalcolo contatori")
+    parser.add_argument("--only", choices=sorted(RECONCILERS))
+    args = parser.parse_args(argv)
+
+    for name in [args.only] if args.only else RECONCILERS:
+        fixed = _reconcile(name, force=True)
+        print(f"✅ {name}: {fixed} righe corrette")
+
+
+if __name__ == "__main__":
+    main()
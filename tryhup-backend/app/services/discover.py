@@ -0,0 +1,323 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from math import gcd
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask, register_task
+from app.database import SessionLocal
+from app.models import Content, DiscoverRanking
+from app.services.jobs import claim_job_run
+
+
+# ===============================
+# CONFIG
+# ===============================
+# ogni quanto (secondi) la classifica discover viene ricostruita
+DISCOVER_SNAPSHOT_TTL = int(os.getenv("DISCOVER_SNAPSHOT_TTL", "300"))
+
+# versioni tenute in discover_rankings: un cursore vale per tutto questo
+# tempo, su qualunque worker; poi la risposta è 410 e il client riparte
+DISCOVER_CURSOR_TTL = int(os.getenv("DISCOVER_CURSOR_TTL", "3600"))
+
+# versioni già decodificate tenute in memoria da ogni worker
+DISCOVER_SNAPSHOT_CACHE = int(os.getenv("DISCOVER_SNAPSHOT_CACHE", "3"))
+
+# ogni quanto (secondi) un worker controlla se c'è una versione nuova
+DISCOVER_LATEST_CHECK = float(os.getenv("DISCOVER_LATEST_CHECK", "5"))
+
+
+# ===============================
+# SNAPSHOT
+# ===============================
+class DiscoverSnapshot:
+    """
+    Classifica discover precalcolata: id dei contenuti approvati ordinati
+    per (growth_index, rating_avg) decrescenti, divisi in gruppi di pari
+    merito. L'ordine dentro un gruppo è una permutazione affine derivata
+    dal seed di sessione: deterministica, calcolabile in O(1) per posizione.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        rows: Iterable[Tuple[int, int, float, float]],
+    ):
+        self.version = version
+
+        self.ids = array("i")
+        self.owner_ids = array("i")
+        self.group_starts = array("i")
+
+        last_rank = None
+        for content_id, owner_id, growth_index, rating_avg in rows:
+            rank = (growth_index, rating_avg)
+            if rank != last_rank:
+                self.group_starts.append(len(self.ids))
+                last_rank = rank
+            self.ids.append(content_id)
+            self.owner_ids.append(owner_id)
+
+        self.owner_counts = Counter(self.owner_ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- persistenza (discover_rankings) ----------
+
+    @staticmethod
+    def _pack(values: array) -> bytes:
+        if sys.byteorder == "big":
+            values = array("i", values)
+            values.byteswap()
+        return values.tobytes()
+
+    @staticmethod
+    def _unpack(raw: bytes) -> array:
+        values = array("i")
+        values.frombytes(raw)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    def to_record(self) -> DiscoverRanking:
+        return DiscoverRanking(
+            version=self.version,
+            size=len(self.ids),
+            ids=self._pack(self.ids),
+            owner_ids=self._pack(self.owner_ids),
+            group_starts=self._pack(self.group_starts),
+        )
+
+    @classmethod
+    def from_record(cls, record: DiscoverRanking) -> "DiscoverSnapshot":
+        snapshot = cls(record.version, ())
+        snapshot.ids = cls._unpack(record.ids)
+        snapshot.owner_ids = cls._unpack(record.owner_ids)
+        snapshot.group_starts = cls._unpack(record.group_starts)
+        snapshot.owner_counts = Counter(snapshot.owner_ids)
+        return snapshot
+
+    def _group_bounds(self, position: int) -> Tuple[int, int, int]:
+        group = bisect_right(self.group_starts, position) - 1
+        start = self.group_starts[group]
+        if group + 1 < len(self.group_starts):
+            end = self.group_starts[group + 1]
+        else:
+            end = len(self.ids)
+        return group, start, end
+
+    def index_at(self, position: int, seed: int) -> int:
+        group, start, end = self._group_bounds(position)
+        size = end - start
+        if size == 1:
+            return start
+
+        digest = hashlib.blake2b(
+            f"{seed}:{group}".encode(),
+            digest_size=16,
+        ).digest()
+        step = int.from_bytes(digest[:8], "big") % size or 1
+        while gcd(step, size) != 1:
+            step += 1
+        shift = int.from_bytes(digest[8:], "big") % size
+
+        return start + (step * (position - start) + shift) % size
+
+    def visible_total(self, excluded_owner_ids: Iterable[int]) -> int:
+        hidden = sum(self.owner_counts.get(o, 0) for o in excluded_owner_ids)
+        return len(self.ids) - hidden
+
+    def scan(
+        self,
+        seed: int,
+        excluded_owner_ids: set,
+        position: int,
+        skip: int,
+        limit: int,
+    ) -> Tuple[List[int], Optional[int]]:
+        """
+        Restituisce fino a `limit` id a partire da `position`, saltando
+        i creator esclusi e i primi `skip` elementi visibili (modalità offset).
+        Il secondo valore è la posizione della pagina successiva (None = fine).
+        """
+
+        ids: List[int] = []
+        total = len(self.ids)
+
+        while position < total:
+            index = self.index_at(position, seed)
+            if self.owner_ids[index] not in excluded_owner_ids:
+                if skip:
+                    skip -= 1
+                elif len(ids) == limit:
+                    return ids, position
+                else:
+                    ids.append(self.ids[index])
+            position += 1
+
+        return ids, None
+
+
+# ===============================
+# STORE (TABELLA + CACHE PER WORKER)
+# ===============================
+_snapshots: "OrderedDict[int, DiscoverSnapshot]" = OrderedDict()
+_latest: Optional[int] = None
+_latest_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _remember(snapshot: DiscoverSnapshot) -> None:
+    with _lock:
+        _snapshots[snapshot.version] = snapshot
+        _snapshots.move_to_end(snapshot.version)
+        while len(_snapshots) > DISCOVER_SNAPSHOT_CACHE:
+            _snapshots.popitem(last=False)
+
+
+def reset_local_cache() -> None:
+    """Dimentica le versioni decodificate (come un worker appena partito)."""
+    global _latest, _latest_checked_at
+    with _lock:
+        _snapshots.clear()
+        _latest = None
+        _latest_checked_at = 0.0
+
+
+def build_snapshot(db: Session) -> DiscoverSnapshot:
+    """
+    Calcola una nuova versione, la salva in discover_rankings e cancella
+    quelle più vecchie di DISCOVER_CURSOR_TTL (la più recente resta).
+    """
+
+    rows = (
+        db.query(
+            Content.id,
+            Content.owner_id,
+            Content.growth_index,
+            Content.rating_avg,
+        )
+        .filter(
+            Content.approved.is_(True),
+            Content.owner_id.is_not(None),
+        )
+        .order_by(
+            Content.growth_index.desc(),
+            Content.rating_avg.desc(),
+            Content.id.desc(),
+        )
+        .yield_per(10000)
+    )
+
+    # versione = millisecondi, sempre crescente anche fra due build vicine
+    previous = db.execute(select(func.max(DiscoverRanking.version))).scalar()
+    version = max(time.time_ns() // 1_000_000, (previous or 0) + 1)
+
+    snapshot = DiscoverSnapshot(version, rows)
+
+    db.add(snapshot.to_record())
+    db.flush()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        seconds=DISCOVER_CURSOR_TTL
+    )
+    db.execute(
+        delete(DiscoverRanking)
+        .where(
+            DiscoverRanking.built_at < cutoff,
+            DiscoverRanking.version != snapshot.version,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    _remember(snapshot)
+    return snapshot
+
+
+def _rebuild() -> None:
+    db = SessionLocal()
+    try:
+        # una sola ricostruzione per giro, qualunque sia il numero di worker
+        if claim_job_run(db, "discover_snapshot", DISCOVER_SNAPSHOT_TTL):
+            build_snapshot(db)
+    finally:
+        db.close()
+
+
+snapshot_task = register_task(
+    PeriodicTask(
+        "discover-snapshot",
+        _rebuild,
+        DISCOVER_SNAPSHOT_TTL,
+        run_on_start=True,
+    )
+)
+
+
+def _latest_version(db: Session) -> Optional[int]:
+    global _latest, _latest_checked_at
+
+    now = time.monotonic()
+    with _lock:
+        fresh = now - _latest_checked_at < DISCOVER_LATEST_CHECK
+        if _latest is not None and fresh:
+            return _latest
+
+    latest = db.execute(
+        select(func.max(DiscoverRanking.version))
+    ).scalar()
+
+    with _lock:
+        _latest = latest
+        _latest_checked_at = now
+    return latest
+
+
+def get_snapshot(
+    db: Session,
+    version: Optional[int] = None,
+) -> Optional[DiscoverSnapshot]:
+    """
+    La versione richiesta dal cursore o, senza versione, la più recente.
+    Mai costruita sulla richiesta: None se la versione del cursore non
+    esiste più (scaduta) o se non ne è ancora stata costruita nessuna
+    (in quel caso il task viene svegliato).
+    """
+
+    if version is None:
+        version = _latest_version(db)
+        if version is None:
+            snapshot_task.wake()
+            return None
+
+    with _lock:
+        snapshot = _snapshots.get(version)
+    if snapshot is not None:
+        return snapshot
+
+    record = db.get(DiscoverRanking, version)
+    if record is None:
+        return None
+
+    snapshot = DiscoverSnapshot.from_record(record)
+    # i blob non servono più alla sessione
+    db.expunge(record)
+    _remember(snapshot)
+    return snapshot
+
+
+def session_seed(user_id: int, version: int) -> int:
+    """Seed stabile per utente e snapshot: stesse pagine, stesso ordine."""
+    digest = hashlib.blake2b(f"{user_id}:{version}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
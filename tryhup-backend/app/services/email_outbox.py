@@ -0,0 +1,470 @@
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask, register_task
+from app.database import SessionLocal
+from app.models import EmailOutbox
+
+
+# ===============================
+# CONFIG
+# ===============================
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+# false per server locali senza TLS (es. aiosmtpd in sviluppo)
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true") == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+
+EMAIL_FROM = os.getenv("EMAIL_FROM", "TryHup <noreply@tryhup.com>")
+
+# connessioni SMTP persistenti (= thread di invio)
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", "2"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "5"))
+EMAIL_MAX_BATCHES = int(os.getenv("EMAIL_MAX_BATCHES", "20"))
+
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_RETRY_BASE = float(os.getenv("EMAIL_RETRY_BASE", "10"))
+EMAIL_RETRY_MAX = float(os.getenv("EMAIL_RETRY_MAX", "3600"))
+# un batch preso da un sender che muore torna disponibile dopo il lease
+EMAIL_SEND_LEASE = float(os.getenv("EMAIL_SEND_LEASE", "120"))
+# connessioni ferme da più di così vengono verificate con NOOP
+EMAIL_IDLE_CHECK = float(os.getenv("EMAIL_IDLE_CHECK", "30"))
+# messaggi inviati/falliti tenuti per le statistiche e il supporto
+EMAIL_RETENTION = int(os.getenv("EMAIL_RETENTION", "604800"))
+EMAIL_SWEEP_BATCH = int(os.getenv("EMAIL_SWEEP_BATCH", "1000"))
+EMAIL_SWEEP_MAX_BATCHES = int(os.getenv("EMAIL_SWEEP_MAX_BATCHES", "50"))
+
+
+# ===============================
+# ENQUEUE
+# ===============================
+def enqueue_email(db: Session, to_address: str, subject: str, body: str):
+    """
+    Aggiunge il messaggio all'outbox nella transazione del chiamante:
+    nessun commit qui. Dopo il commit chiamare wake_sender().
+    """
+
+    message = EmailOutbox(
+        to_address=to_address,
+        subject=subject,
+        body=body,
+    )
+    db.add(message)
+    return message
+
+
+# ===============================
+# POOL SMTP
+# ===============================
+class SMTPPool:
+    """
+    Connessioni SMTP già autenticate riusate fra un batch e l'altro:
+    connect + STARTTLS + login si pagano una volta, non per messaggio.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if SMTP_USER:
+                server.login(SMTP_USER, SMTP_PASSWORD)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    @staticmethod
+    def _alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @property
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def acquire(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, released_at = self._idle.pop()
+
+            if time.monotonic() - released_at < EMAIL_IDLE_CHECK:
+                return server
+            if self._alive(server):
+                return server
+            self._close(server)
+
+        return self._connect()
+
+    def release(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._close(server)
+
+    def discard(self, server: smtplib.SMTP) -> None:
+        self._close(server)
+
+
+smtp_pool = SMTPPool(EMAIL_POOL_SIZE)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=EMAIL_POOL_SIZE,
+                thread_name_prefix="tryhup-email",
+            )
+        return _executor
+
+
+# ===============================
+# INVIO
+# ===============================
+# (id, errore o None, errore permanente)
+SendResult = Tuple[int, Optional[str], bool]
+
+
+def _build_message(row) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = row.subject
+    message["From"] = EMAIL_FROM
+    message["To"] = row.to_address
+    message.set_content(row.body)
+    return message
+
+
+def _send_chunk(rows) -> List[SendResult]:
+    """
+    Invia i messaggi su una sola connessione del pool. Se la connessione
+    cade viene scartata e il messaggio successivo ne apre un'altra.
+    """
+
+    results: List[SendResult] = []
+    server = None
+
+    for row in rows:
+        if server is None:
+            try:
+                server = smtp_pool.acquire()
+            except (smtplib.SMTPException, OSError) as e:
+                # server irraggiungibile: riprova tutto il resto più tardi
+                error = f"connect: {e!r}"
+                pending = rows[len(results):]
+                results.extend((r.id, error, False) for r in pending)
+                return results
+
+        try:
+            server.send_message(_build_message(row))
+            results.append((row.id, None, False))
+        except smtplib.SMTPRecipientsRefused as e:
+            results.append((row.id, repr(e.recipients), True))
+        except smtplib.SMTPResponseException as e:
+            # 5xx = rifiuto definitivo, 4xx = riprovare
+            error = f"{e.smtp_code} {e.smtp_error!r}"
+            results.append((row.id, error, e.smtp_code >= 500))
+        except (smtplib.SMTPException, OSError) as e:
+            results.append((row.id, repr(e), False))
+            smtp_pool.discard(server)
+            server = None
+
+    if server is not None:
+        smtp_pool.release(server)
+    return results
+
+
+def _send(rows) -> List[SendResult]:
+    """Divide il batch fra le connessioni del pool."""
+
+    if EMAIL_POOL_SIZE <= 1 or len(rows) <= 1:
+        return _send_chunk(rows)
+
+    size = -(-len(rows) // EMAIL_POOL_SIZE)
+    chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+
+    results: List[SendResult] = []
+    for chunk_results in _get_executor().map(_send_chunk, chunks):
+        results.extend(chunk_results)
+    return results
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff esponenziale: 10s, 20s, 40s, ... fino a EMAIL_RETRY_MAX."""
+    return min(EMAIL_RETRY_BASE * 2 ** (attempts - 1), EMAIL_RETRY_MAX)
+
+
+# ===============================
+# METRICHE
+# ===============================
+class _Metrics:
+    def __init__(self):
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_ms: Optional[float] = None
+        self.last_run_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def record(self, sent: int, retried: int, failed: int, elapsed: float):
+        with self._lock:
+            self.batches += 1
+            self.sent += sent
+            self.retried += retried
+            self.failed += failed
+            self.last_batch_ms = round(elapsed * 1000, 2)
+            self.last_run_at = datetime.now(timezone.utc)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_batch_ms": self.last_batch_ms,
+                "last_run_at": self.last_run_at,
+            }
+
+
+metrics = _Metrics()
+
+
+# ===============================
+# BATCH
+# ===============================
+def process_batch(db: Session) -> int:
+    """
+    Prende i messaggi pronti (FOR UPDATE SKIP LOCKED), sposta in avanti
+    next_attempt_at come lease e fa commit prima di parlare con SMTP:
+    nessuna transazione resta aperta durante l'invio. Gli esiti vengono
+    scritti con un solo UPDATE executemany, che azzera il body dei
+    messaggi conclusi (inviati o falliti).
+    """
+
+    now = datetime.now(timezone.utc)
+
+    rows = db.execute(
+        select(
+            EmailOutbox.id,
+            EmailOutbox.to_address,
+            EmailOutbox.subject,
+            EmailOutbox.body,
+            EmailOutbox.attempts,
+        )
+        .where(
+            EmailOutbox.status == "pending",
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(EMAIL_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    if not rows:
+        db.rollback()
+        return 0
+
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_([row.id for row in rows]))
+        .values(next_attempt_at=now + timedelta(seconds=EMAIL_SEND_LEASE))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    started = time.perf_counter()
+    results = _send(rows)
+
+    attempts = {row.id: row.attempts + 1 for row in rows}
+    finished = datetime.now(timezone.utc)
+    params = []
+    sent = retried = failed = 0
+
+    for message_id, error, permanent in results:
+        tries = attempts[message_id]
+        if error is None:
+            state, next_attempt_at, sent_at = "sent", finished, finished
+            sent += 1
+        elif permanent or tries >= EMAIL_MAX_ATTEMPTS:
+            state, next_attempt_at, sent_at = "failed", finished, None
+            failed += 1
+        else:
+            state, sent_at = "pending", None
+            next_attempt_at = finished + timedelta(seconds=retry_delay(tries))
+            retried += 1
+
+        params.append({
+            "b_id": message_id,
+            "b_status": state,
+            "b_attempts": tries,
+            "b_error": error,
+            "b_next": next_attempt_at,
+            "b_sent": sent_at,
+        })
+
+    table = EmailOutbox.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            status=bindparam("b_status"),
+            attempts=bindparam("b_attempts"),
+            last_error=bindparam("b_error"),
+            next_attempt_at=bindparam("b_next"),
+            sent_at=bindparam("b_sent"),
+            body=case(
+                (bindparam("b_status") == "pending", table.c.body),
+                else_=None,
+            ),
+        ),
+        params,
+    )
+    db.commit()
+
+    metrics.record(sent, retried, failed, time.perf_counter() - started)
+    return len(rows)
+
+
+def drain_outbox() -> int:
+    db = SessionLocal()
+    processed = 0
+    try:
+        for _ in range(EMAIL_MAX_BATCHES):
+            try:
+                count = process_batch(db)
+            except Exception:
+                db.rollback()
+                raise
+            processed += count
+            if count < EMAIL_BATCH_SIZE:
+                break
+    finally:
+        db.close()
+    return processed
+
+
+def sweep_outbox() -> int:
+    """
+    Cancella i messaggi conclusi da più di EMAIL_RETENTION secondi
+    (next_attempt_at = momento dell'esito), EMAIL_SWEEP_BATCH righe per
+    volta. Gira nello sweeper dei codici di login.
+    """
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=EMAIL_RETENTION)
+
+    db = SessionLocal()
+    deleted = 0
+    try:
+        for _ in range(EMAIL_SWEEP_MAX_BATCHES):
+            batch = (
+                select(EmailOutbox.id)
+                .where(
+                    EmailOutbox.status != "pending",
+                    EmailOutbox.next_attempt_at < cutoff,
+                )
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(EMAIL_SWEEP_BATCH)
+                .scalar_subquery()
+            )
+            count = db.execute(
+                delete(EmailOutbox)
+                .where(EmailOutbox.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+
+            deleted += count
+            if count < EMAIL_SWEEP_BATCH:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return deleted
+
+
+email_task = register_task(
+    PeriodicTask(
+        "email_outbox",
+        drain_outbox,
+        EMAIL_POLL_INTERVAL,
+        run_on_start=True,
+    )
+)
+
+
+def wake_sender() -> None:
+    """Chiamata dopo il commit di un messaggio in outbox."""
+    email_task.wake()
+
+
+# ===============================
+# STATS
+# ===============================
+def outbox_stats(db: Session) -> dict:
+    by_status = dict(
+        db.execute(
+            select(EmailOutbox.status, func.count(EmailOutbox.id))
+            .group_by(EmailOutbox.status)
+        ).all()
+    )
+
+    oldest = db.execute(
+        select(func.min(EmailOutbox.created_at))
+        .where(EmailOutbox.status == "pending")
+    ).scalar()
+
+    lag_seconds = 0.0
+    if oldest is not None:
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        lag_seconds = round(
+            (datetime.now(timezone.utc) - oldest).total_seconds(), 3
+        )
+
+    return {
+        "pool_size": EMAIL_POOL_SIZE,
+        "idle_connections": smtp_pool.idle_count,
+        "pending": by_status.get("pending", 0),
+        "sent_total": by_status.get("sent", 0),
+        "failed_total": by_status.get("failed", 0),
+        "lag_seconds": lag_seconds,
+        **metrics.snapshot(),
+    }
@@ -0,0 +1,113 @@
+import os
+import time
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import create_cache
+from app.models import Follow
+
+
+# ===============================
+# CONFIG
+# ===============================
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "30"))
+FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "20000"))
+# generazioni scritte per round trip quando si invalidano i follower
+FEED_INVALIDATE_BATCH = int(os.getenv("FEED_INVALIDATE_BATCH", "1000"))
+
+
+# condivisa: un'invalidazione fatta da un worker deve valere per tutti
+feed_cache = create_cache(
+    "feed",
+    max_entries=FEED_CACHE_MAX_ENTRIES,
+    ttl=FEED_CACHE_TTL,
+    shared=True,
+)
+
+
+# ===============================
+# GENERAZIONI (INVALIDAZIONE)
+# ===============================
+# Invece di cercare e cancellare le pagine in cache, ogni evento cambia
+# la "generazione" che entra nella chiave: le voci vecchie non vengono
+# più lette e scadono da sole (TTL / LRU).
+def _generation(key: str) -> int:
+    value = feed_cache.get(key, track=False)
+    if value is None:
+        # generazione persa (eviction/restart): mai ripartire da un valore
+        # già usato, altrimenti tornerebbero visibili pagine vecchie
+        value = time.time_ns()
+        feed_cache.set(key, value, ttl=0)
+    return value
+
+
+def invalidate_user(user_id: int) -> None:
+    """Follow / unfollow: cambia il feed following di un solo utente."""
+    feed_cache.set(f"gen:user:{user_id}", time.time_ns(), ttl=0)
+
+
+def invalidate_followers(db: Session, owner_ids: Iterable[int]) -> int:
+    """
+    Approvazione: il contenuto entra solo nel feed following di chi
+    segue l'autore. La parte discover cambia solo con un nuovo snapshot.
+    Da chiamare dopo il commit.
+    """
+
+    owner_ids = list(set(owner_ids))
+    if not owner_ids:
+        return 0
+
+    follower_ids = db.execute(
+        select(Follow.follower_id)
+        .where(Follow.following_id.in_(owner_ids))
+        .distinct()
+        .execution_options(yield_per=FEED_INVALIDATE_BATCH)
+    ).scalars()
+
+    invalidated = 0
+    for batch in follower_ids.partitions():
+        generation = time.time_ns()
+        feed_cache.set_many(
+            {f"gen:user:{user_id}": generation for user_id in batch},
+            ttl=0,
+        )
+        invalidated += len(batch)
+
+    return invalidated
+
+
+def invalidate_all() -> None:
+    """Rimozione contenuti / reset: può toccare il feed di tutti."""
+    feed_cache.set("gen:global", time.time_ns(), ttl=0)
+
+
+# ===============================
+# LOOKUP
+# ===============================
+def feed_key(
+    user_id: int,
+    cursor: Optional[str],
+    limit: int,
+    offset: int,
+    include_total: bool,
+) -> str:
+    return ":".join([
+        "feed",
+        str(_generation("gen:global")),
+        str(user_id),
+        str(_generation(f"gen:user:{user_id}")),
+        str(limit),
+        str(offset),
+        "t" if include_total else "n",
+        cursor or "",
+    ])
+
+
+def get_feed(key: str) -> Optional[Any]:
+    return feed_cache.get(key)
+
+
+def store_feed(key: str, payload: Any) -> None:
+    feed_cache.set(key, payload)
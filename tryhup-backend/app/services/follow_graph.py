@@ -0,0 +1,278 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.background import PeriodicTask, register_task
+from app.database import SessionLocal
+from app.models import Follow
+
+
+# ===============================
+# CONFIG
+# ===============================
+# false = le domande sulle relazioni vanno sempre su Postgres
+FOLLOW_GRAPH_ENABLED = os.getenv("FOLLOW_GRAPH_ENABLED", "false") == "true"
+FOLLOW_GRAPH_RELOAD_INTERVAL = float(
+    os.getenv("FOLLOW_GRAPH_RELOAD_INTERVAL", "600")
+)
+# righe per giro di fetch durante il caricamento
+FOLLOW_GRAPH_LOAD_CHUNK = int(
+    os.getenv("FOLLOW_GRAPH_LOAD_CHUNK", "200000")
+)
+
+
+# ===============================
+# SNAPSHOT (CSR)
+# ===============================
+def load_graph(db: Session) -> "FollowGraph":
+    # numpy solo con l'indice acceso: lo snapshot sta in follow_graph_csr
+    from app.services.follow_graph_csr import load_graph as load_csr
+
+    return load_csr(db, FOLLOW_GRAPH_LOAD_CHUNK)
+
+
+# ===============================
+# INDICE (SNAPSHOT + OVERLAY)
+# ===============================
+class FollowGraphIndex:
+    """
+    Snapshot CSR più un overlay con i follow/unfollow arrivati dopo:
+    le route lo aggiornano dopo il commit, il reload periodico lo
+    riassorbe. L'overlay è per processo: le modifiche fatte su un altro
+    worker diventano visibili al reload successivo.
+    """
+
+    def __init__(self):
+        self.graph: Optional["FollowGraph"] = None
+        self.load_ms: Optional[float] = None
+        self._lock = threading.Lock()
+        self._added_out: Dict[int, Set[int]] = defaultdict(set)
+        self._removed_out: Dict[int, Set[int]] = defaultdict(set)
+        self._added_in: Dict[int, Set[int]] = defaultdict(set)
+        self._removed_in: Dict[int, Set[int]] = defaultdict(set)
+
+    @property
+    def ready(self) -> bool:
+        return self.graph is not None
+
+    # ---------- aggiornamenti ----------
+
+    # registrati anche prima del primo snapshot: un follow committato
+    # durante il caricamento potrebbe mancare dallo snapshot, e reload()
+    # elimina comunque dall'overlay ciò che lo snapshot già contiene.
+    # Con l'indice spento nessun reload svuoterebbe l'overlay.
+    def on_follow(self, follower_id: int, following_id: int) -> None:
+        if not FOLLOW_GRAPH_ENABLED:
+            return
+        with self._lock:
+            self._added_out[follower_id].add(following_id)
+            self._removed_out[follower_id].discard(following_id)
+            self._added_in[following_id].add(follower_id)
+            self._removed_in[following_id].discard(follower_id)
+
+    def on_unfollow(self, follower_id: int, following_id: int) -> None:
+        if not FOLLOW_GRAPH_ENABLED:
+            return
+        with self._lock:
+            self._removed_out[follower_id].add(following_id)
+            self._added_out[follower_id].discard(following_id)
+            self._removed_in[following_id].add(follower_id)
+            self._added_in[following_id].discard(follower_id)
+
+    def reload(self, db: Session) -> None:
+        started = time.perf_counter()
+        graph = load_graph(db)
+
+        with self._lock:
+            self.graph = graph
+            # resta solo ciò che il nuovo snapshot non riflette ancora
+            # (follow/unfollow committati durante il caricamento)
+            for overlay, present in (
+                (self._added_out, True),
+                (self._removed_out, False),
+            ):
+                for user_id, targets in list(overlay.items()):
+                    targets -= {
+                        t for t in targets
+                        if graph.contains(user_id, t) == present
+                    }
+                    if not targets:
+                        del overlay[user_id]
+
+            self._added_in.clear()
+            self._removed_in.clear()
+            for user_id, targets in self._added_out.items():
+                for t in targets:
+                    self._added_in[t].add(user_id)
+            for user_id, targets in self._removed_out.items():
+                for t in targets:
+                    self._removed_in[t].add(user_id)
+
+        self.load_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    # ---------- letture ----------
+
+    def _merge(self, base, added: Dict, removed: Dict, user_id: int):
+        import numpy as np
+
+        with self._lock:
+            plus = added.get(user_id)
+            minus = removed.get(user_id)
+            plus = list(plus) if plus else None
+            minus = list(minus) if minus else None
+
+        if minus:
+            base = base[~np.isin(base, minus)]
+        if plus:
+            base = np.union1d(base, np.array(plus, dtype=np.int32))
+        return base
+
+    def following(self, user_id: int) -> "np.ndarray":
+        return self._merge(
+            self.graph.following(user_id),
+            self._added_out,
+            self._removed_out,
+            user_id,
+        )
+
+    def followers(self, user_id: int) -> "np.ndarray":
+        return self._merge(
+            self.graph.followers(user_id),
+            self._added_in,
+            self._removed_in,
+            user_id,
+        )
+
+    def is_following(self, follower_id: int, following_id: int) -> bool:
+        with self._lock:
+            if following_id in self._added_out.get(follower_id, ()):
+                return True
+            if following_id in self._removed_out.get(follower_id, ()):
+                return False
+        return self.graph.contains(follower_id, following_id)
+
+    def mutuals(self, user_id: int) -> "np.ndarray":
+        import numpy as np
+
+        return np.intersect1d(
+            self.following(user_id),
+            self.followers(user_id),
+            assume_unique=True,
+        )
+
+    def common_followers(self, user_id: int, other_id: int) -> "np.ndarray":
+        import numpy as np
+
+        return np.intersect1d(
+            self.followers(user_id),
+            self.followers(other_id),
+            assume_unique=True,
+        )
+
+    def stats(self) -> dict:
+        graph = self.graph
+        if graph is None:
+            return {"enabled": FOLLOW_GRAPH_ENABLED, "ready": False}
+
+        with self._lock:
+            overlay = sum(len(t) for t in self._added_out.values()) + sum(
+                len(t) for t in self._removed_out.values()
+            )
+
+        return {
+            "enabled": FOLLOW_GRAPH_ENABLED,
+            "ready": True,
+            "loaded_at": graph.loaded_at,
+            "load_ms": self.load_ms,
+            "users": len(graph.out_offsets) - 1,
+            "edges": graph.edges,
+            "overlay_edges": overlay,
+            "bytes": graph.nbytes,
+            "bytes_per_million_edges": (
+                round(graph.nbytes / graph.edges * 1_000_000)
+                if graph.edges else None
+            ),
+        }
+
+
+follow_graph = FollowGraphIndex()
+
+
+def _reload_graph() -> None:
+    if not FOLLOW_GRAPH_ENABLED:
+        return
+
+    db = SessionLocal()
+    try:
+        follow_graph.reload(db)
+    finally:
+        db.close()
+
+
+register_task(
+    PeriodicTask(
+        "follow-graph",
+        _reload_graph,
+        FOLLOW_GRAPH_RELOAD_INTERVAL,
+        run_on_start=True,
+    )
+)
+
+
+# ===============================
+# DOMANDE SULLE RELAZIONI
+# (indice se pronto, altrimenti SQL)
+# ===============================
+def is_following(db: Session, follower_id: int, following_id: int) -> bool:
+    if follow_graph.ready:
+        return follow_graph.is_following(follower_id, following_id)
+
+    return db.execute(
+        select(Follow.id).where(
+            Follow.follower_id == follower_id,
+            Follow.following_id == following_id,
+        )
+    ).first() is not None
+
+
+def mutual_ids(db: Session, user_id: int, limit: int) -> List[int]:
+    if follow_graph.ready:
+        return follow_graph.mutuals(user_id)[:limit].tolist()
+
+    back = aliased(Follow)
+    return db.execute(
+        select(Follow.following_id)
+        .join(
+            back,
+            (back.follower_id == Follow.following_id)
+            & (back.following_id == Follow.follower_id),
+        )
+        .where(Follow.follower_id == user_id)
+        .order_by(Follow.following_id)
+        .limit(limit)
+    ).scalars().all()
+
+
+def common_follower_ids(
+    db: Session,
+    user_id: int,
+    other_id: int,
+    limit: int,
+) -> List[int]:
+    if follow_graph.ready:
+        common = follow_graph.common_followers(user_id, other_id)
+        return common[:limit].tolist()
+
+    other = aliased(Follow)
+    return db.execute(
+        select(Follow.follower_id)
+        .join(other, other.follower_id == Follow.follower_id)
+        .where(Follow.following_id == user_id, other.following_id == other_id)
+        .order_by(Follow.follower_id)
+        .limit(limit)
+    ).scalars().all()
@@ -0,0 +1,102 @@
+"""
+Snapshot CSR del grafo dei follow (NumPy). Lo importa solo
+app.services.follow_graph quando FOLLOW_GRAPH_ENABLED carica l'indice:
+con l'indice spento numpy non serve.
+"""
+
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Follow
+
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+# ===============================
+# SNAPSHOT (CSR)
+# ===============================
+def _csr(src: np.ndarray, dst: np.ndarray, size: int):
+    """
+    Adiacenza compressa: i vicini di u sono
+    targets[offsets[u]:offsets[u + 1]], ordinati, quindi membership =
+    searchsorted e intersezioni = merge.
+    """
+
+    order = np.lexsort((dst, src))
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=size), out=offsets[1:])
+    return offsets, dst[order]
+
+
+class FollowGraph:
+    """
+    Snapshot immutabile di follows in due CSR (following e follower)
+    indicizzati direttamente per user id. Int32 per gli id: 4 byte per
+    arco per direzione, più 8 byte per utente per direzione (offsets).
+    """
+
+    def __init__(self, followers: np.ndarray, followings: np.ndarray):
+        followers = followers.astype(np.int32, copy=False)
+        followings = followings.astype(np.int32, copy=False)
+
+        size = max(
+            int(followers.max(initial=0)),
+            int(followings.max(initial=0)),
+        ) + 1
+
+        self.edges = len(followers)
+        self.out_offsets, self.out_targets = _csr(followers, followings, size)
+        self.in_offsets, self.in_targets = _csr(followings, followers, size)
+        self.loaded_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _row(offsets: np.ndarray, targets: np.ndarray, user_id: int):
+        if user_id < 0 or user_id >= len(offsets) - 1:
+            return _EMPTY
+        return targets[offsets[user_id]:offsets[user_id + 1]]
+
+    def following(self, user_id: int) -> np.ndarray:
+        return self._row(self.out_offsets, self.out_targets, user_id)
+
+    def followers(self, user_id: int) -> np.ndarray:
+        return self._row(self.in_offsets, self.in_targets, user_id)
+
+    def contains(self, follower_id: int, following_id: int) -> bool:
+        row = self.following(follower_id)
+        i = np.searchsorted(row, following_id)
+        return bool(i < len(row) and row[i] == following_id)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.out_offsets.nbytes
+            + self.out_targets.nbytes
+            + self.in_offsets.nbytes
+            + self.in_targets.nbytes
+        )
+
+
+def load_graph(db: Session, chunk_rows: int) -> FollowGraph:
+    """Legge follows con un cursore server-side, a blocchi di array."""
+
+    followers: List[np.ndarray] = []
+    followings: List[np.ndarray] = []
+
+    result = db.execute(
+        select(Follow.follower_id, Follow.following_id)
+        .execution_options(yield_per=chunk_rows)
+    )
+    for rows in result.partitions():
+        chunk = np.array(rows, dtype=np.int32).reshape(-1, 2)
+        followers.append(chunk[:, 0])
+        followings.append(chunk[:, 1])
+
+    if not followers:
+        return FollowGraph(_EMPTY, _EMPTY)
+
+    return FollowGraph(np.concatenate(followers), np.concatenate(followings))
@@ -0,0 +1,290 @@
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import bindparam, func, select, union, update
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask, register_task
+from app.database import SessionLocal
+from app.models import Comment, Content, JobCheckpoint, Like
+from app.services.jobs import claim_job_run
+
+logger = logging.getLogger(__name__)
+
+
+# ===============================
+# CONFIG
+# ===============================
+GROWTH_BATCH_SIZE = int(os.getenv("GROWTH_BATCH_SIZE", "5000"))
+GROWTH_JOB_NAME = "growth_scores"
+# giro incrementale (solo contenuti toccati) e giro completo periodico
+GROWTH_INTERVAL = float(os.getenv("GROWTH_INTERVAL", "600"))
+GROWTH_FULL_INTERVAL = float(os.getenv("GROWTH_FULL_INTERVAL", "86400"))
+
+# media bayesiana: i primi voti pesano poco finché non diventano tanti
+RATING_PRIOR_WEIGHT = 5.0
+
+# interazioni (like + 2×commenti + voti) che valgono engagement pieno
+ENGAGEMENT_SCALE = 1000.0
+
+QUALITY_WEIGHT = 0.6
+ENGAGEMENT_WEIGHT = 0.4
+
+
+# ===============================
+# FORMULA (VETTORIALE)
+# ===============================
+def compute_growth(
+    rating_avg: "np.ndarray",
+    rating_count: "np.ndarray",
+    likes: "np.ndarray",
+    comments: "np.ndarray",
+):
+    """
+    Calcola (growth_index 1-4, growth_percentage 0-100) per un intero
+    blocco di contenuti in un colpo solo.
+
+    - qualità: voto medio riportato in [0, 1], pesato dalla confidenza
+      (quanti voti ha ricevuto rispetto al prior)
+    - engagement: scala logaritmica delle interazioni
+    """
+
+    import numpy as np
+
+    rating_avg = rating_avg.astype(np.float64)
+    rating_count = rating_count.astype(np.float64)
+
+    quality = np.clip((rating_avg - 1.0) / 4.0, 0.0, 1.0)
+    confidence = rating_count / (rating_count + RATING_PRIOR_WEIGHT)
+
+    interactions = likes + 2.0 * comments + rating_count
+    engagement = np.clip(
+        np.log1p(interactions) / np.log1p(ENGAGEMENT_SCALE),
+        0.0,
+        1.0,
+    )
+
+    score = (
+        QUALITY_WEIGHT * quality * confidence
+        + ENGAGEMENT_WEIGHT * engagement
+    )
+
+    percentage = np.rint(score * 100.0).astype(np.int64)
+    index = np.clip(np.ceil(percentage / 25.0), 1, 4).astype(np.int64)
+
+    return index, percentage
+
+
+# ===============================
+# BATCH
+# ===============================
+def _counts(db: Session, column, ids: List[int], *filters) -> dict:
+    rows = db.execute(
+        select(column, func.count())
+        .where(column.in_(ids), *filters)
+        .group_by(column)
+    )
+    return dict(rows.all())
+
+
+def _score_chunk(db: Session, ids: List[int]) -> int:
+    # numpy serve solo quando il job gira, non all'avvio dell'app
+    import numpy as np
+
+    rows = db.execute(
+        select(
+            Content.id,
+            Content.rating_avg,
+            Content.rating_count,
+            Content.growth_index,
+            Content.growth_percentage,
+        )
+        .where(Content.id.in_(ids))
+        .order_by(Content.id)
+    ).all()
+
+    if not rows:
+        return 0
+
+    content_ids = np.fromiter((r[0] for r in rows), dtype=np.int64)
+    data = np.array([r[1:] for r in rows], dtype=np.float64)
+
+    like_counts = _counts(db, Like.content_id, ids)
+    comment_counts = _counts(
+        db,
+        Comment.content_id,
+        ids,
+        Comment.is_approved.is_(True),
+    )
+
+    likes = np.fromiter(
+        (like_counts.get(i, 0) for i in content_ids.tolist()),
+        dtype=np.float64,
+    )
+    comments = np.fromiter(
+        (comment_counts.get(i, 0) for i in content_ids.tolist()),
+        dtype=np.float64,
+    )
+
+    index, percentage = compute_growth(data[:, 0], data[:, 1], likes, comments)
+
+    # scrive solo le righe che cambiano davvero
+    changed = (index != data[:, 2]) | (percentage != data[:, 3])
+    if not changed.any():
+        return 0
+
+    table = Content.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            growth_index=bindparam("b_index"),
+            growth_percentage=bindparam("b_percentage"),
+            # non è attività: il giro dopo non deve rivedere queste righe
+            updated_at=table.c.updated_at,
+        ),
+        [
+            {"b_id": i, "b_index": g, "b_percentage": p}
+            for i, g, p in zip(
+                content_ids[changed].tolist(),
+                index[changed].tolist(),
+                percentage[changed].tolist(),
+            )
+        ],
+    )
+
+    return int(changed.sum())
+
+
+def _all_ids(db: Session) -> Iterator[List[int]]:
+    last_id = 0
+    while True:
+        ids = db.execute(
+            select(Content.id)
+            .where(Content.id > last_id)
+            .order_by(Content.id)
+            .limit(GROWTH_BATCH_SIZE)
+        ).scalars().all()
+
+        if not ids:
+            return
+
+        yield ids
+        last_id = ids[-1]
+
+
+def _touched_ids(db: Session, since: datetime) -> Iterator[List[int]]:
+    """
+    Contenuti con attività dopo `since`: nuovi o modificati (voti, like
+    persistiti dal flush dei contatori, quindi anche i like rimossi),
+    con nuovi like o con commenti creati, approvati o rifiutati.
+    """
+
+    touched = union(
+        select(Content.id).where(Content.updated_at > since),
+        select(Like.content_id).where(Like.created_at > since),
+        select(Comment.content_id).where(Comment.updated_at > since),
+    ).subquery()
+
+    ids = db.execute(
+        select(touched.c[0]).order_by(touched.c[0])
+    ).scalars().all()
+
+    for start in range(0, len(ids), GROWTH_BATCH_SIZE):
+        yield ids[start:start + GROWTH_BATCH_SIZE]
+
+
+def recompute_growth_scores(db: Session, incremental: bool = False) -> int:
+    """
+    Ricalcola growth_index / growth_percentage a blocchi da GROWTH_BATCH_SIZE.
+    Ogni blocco viene committato: il job si può interrompere e rilanciare.
+    """
+
+    started_at = datetime.now(timezone.utc)
+
+    checkpoint = db.get(JobCheckpoint, GROWTH_JOB_NAME)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=GROWTH_JOB_NAME)
+        db.add(checkpoint)
+
+    chunks: Iterable[List[int]]
+    if incremental and checkpoint.last_run_at is not None:
+        chunks = _touched_ids(db, checkpoint.last_run_at)
+    else:
+        chunks = _all_ids(db)
+
+    updated = 0
+    for ids in chunks:
+        updated += _score_chunk(db, ids)
+        db.commit()
+
+    checkpoint.last_run_at = started_at
+    db.commit()
+
+    return updated
+
+
+# ===============================
+# JOB PERIODICO (UN WORKER PER GIRO)
+# ===============================
+def _run(incremental: bool) -> int:
+    job, interval = (
+        ("growth_incremental", GROWTH_INTERVAL)
+        if incremental
+        else ("growth_full", GROWTH_FULL_INTERVAL)
+    )
+
+    db = SessionLocal()
+    try:
+        if not claim_job_run(db, job, interval):
+            return 0
+        updated = recompute_growth_scores(db, incremental=incremental)
+    finally:
+        db.close()
+
+    if updated:
+        logger.info("Growth scores updated on %s contents", updated)
+    return updated
+
+
+register_task(
+    PeriodicTask(
+        "growth-incremental",
+        lambda: _run(incremental=True),
+        GROWTH_INTERVAL,
+    )
+)
+# rete di sicurezza: quello che l'incrementale non vede (es. righe
+# cancellate a mano) si riallinea al giro completo
+register_task(
+    PeriodicTask(
+        "growth-full",
+        lambda: _run(incremental=False),
+        GROWTH_FULL_INTERVAL,
+    )
+)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ricalcolo growth score")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="solo i contenuti toccati dall'ultima esecuzione",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        updated = recompute_growth_scores(db, incremental=args.incremental)
+    finally:
+        db.close()
+
+    print(f"✅ Growth score aggiornati: {updated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import JobCheckpoint
+
+
+# ===============================
+# UN SOLO WORKER PER GIRO
+# ===============================
+def claim_job_run(db: Session, job: str, interval: float) -> bool:
+    """
+    Prende il turno chi riesce ad avanzare job_checkpoints.last_run_at
+    (UPDATE condizionato, atomico): gli altri worker trovano il
+    checkpoint recente e saltano il giro.
+    """
+
+    now = datetime.now(timezone.utc)
+    # un po' di margine: i worker non partono tutti allo stesso istante
+    due = now - timedelta(seconds=interval * 0.9)
+
+    if db.get(JobCheckpoint, job) is None:
+        db.add(JobCheckpoint(name=job))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+    claimed = db.execute(
+        update(JobCheckpoint)
+        .where(
+            JobCheckpoint.name == job,
+            or_(
+                JobCheckpoint.last_run_at.is_(None),
+                JobCheckpoint.last_run_at < due,
+            ),
+        )
+        .values(last_run_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+
+    return claimed == 1
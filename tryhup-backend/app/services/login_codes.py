@@ -0,0 +1,117 @@
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask, register_task
+from app.database import SessionLocal
+from app.models import LoginCode
+from app.services.email_outbox import sweep_outbox
+
+
+# ===============================
+# CONFIG
+# ===============================
+LOGIN_CODE_TTL_MINUTES = int(os.getenv("LOGIN_CODE_TTL_MINUTES", "10"))
+# i codici scaduti restano ancora un po' (debug / supporto)
+LOGIN_CODE_RETENTION = int(os.getenv("LOGIN_CODE_RETENTION", "3600"))
+LOGIN_CODE_SWEEP_INTERVAL = float(
+    os.getenv("LOGIN_CODE_SWEEP_INTERVAL", "300")
+)
+# righe per DELETE: transazioni brevi, lock brevi
+LOGIN_CODE_SWEEP_BATCH = int(os.getenv("LOGIN_CODE_SWEEP_BATCH", "1000"))
+LOGIN_CODE_SWEEP_MAX_BATCHES = int(
+    os.getenv("LOGIN_CODE_SWEEP_MAX_BATCHES", "50")
+)
+
+
+# ===============================
+# EMISSIONE
+# ===============================
+def issue_login_code(db: Session, email: str) -> str:
+    """
+    Invalida i codici aperti dell'email e ne crea uno nuovo, nella
+    transazione del chiamante (nessun commit qui).
+    """
+
+    db.query(LoginCode).filter(
+        LoginCode.email == email,
+        LoginCode.used.is_(False),
+    ).update({"used": True}, synchronize_session=False)
+
+    code = f"{secrets.randbelow(900000) + 100000}"
+
+    db.add(
+        LoginCode(
+            email=email,
+            code=code,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(minutes=LOGIN_CODE_TTL_MINUTES),
+            used=False,
+        )
+    )
+
+    return code
+
+
+# ===============================
+# SWEEPER
+# ===============================
+def sweep_expired_codes() -> int:
+    """
+    Cancella i codici scaduti da più di LOGIN_CODE_RETENTION secondi,
+    LOGIN_CODE_SWEEP_BATCH righe per volta (un commit per batch).
+    I codici usati scadono comunque entro LOGIN_CODE_TTL_MINUTES,
+    quindi basta il filtro su expires_at (indicizzato).
+    """
+
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        seconds=LOGIN_CODE_RETENTION
+    )
+
+    db = SessionLocal()
+    deleted = 0
+    try:
+        for _ in range(LOGIN_CODE_SWEEP_MAX_BATCHES):
+            batch = (
+                select(LoginCode.id)
+                .where(LoginCode.expires_at < cutoff)
+                .order_by(LoginCode.expires_at)
+                .limit(LOGIN_CODE_SWEEP_BATCH)
+                .scalar_subquery()
+            )
+            count = db.execute(
+                delete(LoginCode)
+                .where(LoginCode.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+
+            deleted += count
+            if count < LOGIN_CODE_SWEEP_BATCH:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return deleted
+
+
+def _sweep() -> None:
+    sweep_expired_codes()
+    # l'outbox conserva i messaggi col codice: stessa pulizia periodica
+    sweep_outbox()
+
+
+login_code_sweeper = register_task(
+    PeriodicTask(
+        "login_code_sweeper",
+        _sweep,
+        LOGIN_CODE_SWEEP_INTERVAL,
+        run_on_start=True,
+    )
+)
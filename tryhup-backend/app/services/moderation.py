@@ -1,39 +1,321 @@
-from typing import Dict
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import create_cache
+
+logger = logging.getLogger(__name__)
 
 
 # ===============================
-# AI MODERATION PIPELINE (V1)
+# CONFIG
 # ===============================
-def moderate_comment(text: str) -> Dict[str, object]:
+MODERATION_RULES_DIR = Path(
+    os.getenv(
+        "MODERATION_RULES_DIR",
+        str(Path(__file__).parent / "moderation_rules"),
+    )
+)
+# ogni quanti secondi si controlla se i file delle regole sono cambiati
+MODERATION_RULES_RELOAD_INTERVAL = float(
+    os.getenv("MODERATION_RULES_RELOAD_INTERVAL", "10")
+)
+
+MODERATION_CACHE_TTL = int(os.getenv("MODERATION_CACHE_TTL", "3600"))
+MODERATION_CACHE_MAX_ENTRIES = int(
+    os.getenv("MODERATION_CACHE_MAX_ENTRIES", "50000")
+)
+
+# file .npy dei pesi del classificatore; vuoto = disattivato
+MODERATION_MODEL_PATH = os.getenv("MODERATION_MODEL_PATH", "")
+MODERATION_MODEL_THRESHOLD = float(
+    os.getenv("MODERATION_MODEL_THRESHOLD", "0.8")
+)
+MODERATION_MODEL_RELOAD_INTERVAL = float(
+    os.getenv("MODERATION_MODEL_RELOAD_INTERVAL", "30")
+)
+
+_VERSION_HEADER = re.compile(r"#\s*version\s*:\s*(\S+)", re.IGNORECASE)
+
+
+def normalize_text(text: str) -> str:
+    """Forma canonica usata sia per le regole sia per i commenti."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+# ===============================
+# RULE SET (REGEX COMPILATA A TRIE)
+# ===============================
+_END = ""
+_PREFIX = "*"
+
+
+def _build_trie(terms: Iterable[str]) -> dict:
+    trie: dict = {}
+    for term in terms:
+        prefix = term.endswith(_PREFIX)
+        word = term[:-1] if prefix else term
+
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[_PREFIX if prefix else _END] = True
+    return trie
+
+
+def _char_pattern(char: str) -> str:
+    # dentro le frasi qualunque sequenza di spazi vale come separatore
+    return r"\s+" if char == " " else re.escape(char)
+
+
+def _trie_pattern(node: dict) -> str:
     """
-    Moderation pipeline centralizzata.
-    In futuro verrà sostituita / estesa con AI reale (LLM).
+    Trasforma il trie in un'alternanza annidata: i prefissi comuni sono
+    scritti una volta sola, quindi il costo per posizione del testo
+    dipende dalla profondità del trie, non dal numero di regole.
     """
 
-    lowered = text.lower()
+    if _PREFIX in node:
+        # "term*": tutto ciò che sta sotto è già coperto
+        return r"\w*"
 
-    # 🔴 blacklist iniziale (placeholder)
-    banned_words = [
-        "idiot",
-        "stupid",
-        "hate",
-        "fuck",
-        "shit",
-        "bastard",
+    branches = [
+        _char_pattern(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != _END
     ]
 
+    if not branches:
+        return ""
+
+    if len(branches) == 1 and _END not in node:
+        return branches[0]
+
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if _END in node else pattern
+
+
+class RuleSet:
+    """
+    Insieme di termini compilato in una sola regex con confini di parola:
+    "hate" non scatta più dentro "whatever".
+    """
+
+    def __init__(self, version: str, terms: List[str]):
+        self.version = version
+        self.terms = terms
+
+        body = _trie_pattern(_build_trie(terms)) if terms else ""
+        self.pattern = (
+            re.compile(r"(?<!\w)(?:" + body + r")(?!\w)") if body else None
+        )
+
+    def match(self, normalized: str) -> Optional[str]:
+        if self.pattern is None:
+            return None
+        found = self.pattern.search(normalized)
+        return found.group(0) if found else None
+
+
+def _read_rule_file(path: Path) -> Tuple[str, List[str]]:
+    version = "0"
+    terms = []
+
+    for raw in path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            header = _VERSION_HEADER.match(line)
+            if header:
+                version = header.group(1)
+            continue
+        terms.append(" ".join(normalize_text(line).split()))
+
+    return version, terms
+
+
+def load_rules(rules_dir: Path) -> RuleSet:
+    """
+    Legge tutti i file *.txt della cartella (uno per lingua) e li fonde.
+    Versione = versione dichiarata di ogni file + digest dei termini.
+    """
+
+    versions = []
+    terms = set()
+
+    for path in sorted(rules_dir.glob("*.txt")):
+        file_version, file_terms = _read_rule_file(path)
+        versions.append(f"{path.stem}@{file_version}")
+        terms.update(file_terms)
+
+    ordered = sorted(terms)
+    digest = hashlib.sha1("\n".join(ordered).encode()).hexdigest()[:8]
+
+    return RuleSet(f"{'+'.join(versions)}:{digest}", ordered)
+
+
+# ===============================
+# ENGINE (HOT RELOAD)
+# ===============================
+class ModerationEngine:
+    """
+    Tiene il RuleSet compilato in memoria e lo ricompila solo quando un
+    file delle regole cambia (controllo mtime al massimo ogni
+    `reload_interval` secondi). Se la ricompilazione fallisce si
+    continua con le regole precedenti.
+    """
+
+    def __init__(self, rules_dir: Path, reload_interval: float):
+        self.rules_dir = rules_dir
+        self.reload_interval = reload_interval
+        self._rules: Optional[RuleSet] = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _files_signature(self):
+        signature = []
+        for path in sorted(self.rules_dir.glob("*.txt")):
+            stat = path.stat()
+            signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def rules(self) -> RuleSet:
+        if self._rules is None:
+            return self.reload()
+
+        # la ricompilazione di liste grandi costa secondi: chi trova il
+        # lock occupato continua con le regole correnti invece di aspettare
+        if (
+            time.monotonic() - self._checked_at >= self.reload_interval
+            and self._lock.acquire(blocking=False)
+        ):
+            try:
+                self._reload_locked(force=False)
+            finally:
+                self._lock.release()
+
+        return self._rules
+
+    def reload(self, force: bool = False) -> RuleSet:
+        with self._lock:
+            return self._reload_locked(force)
+
+    def _reload_locked(self, force: bool) -> RuleSet:
+        self._checked_at = time.monotonic()
+
+        try:
+            signature = self._files_signature()
+            changed = signature != self._signature
+            if force or self._rules is None or changed:
+                rules = load_rules(self.rules_dir)
+                if self._rules is not None:
+                    logger.info(
+                        "Moderation rules reloaded: %s",
+                        rules.version,
+                    )
+                self._rules = rules
+                self._signature = signature
+        except Exception:
+            if self._rules is None:
+                raise
+            logger.exception(
+                "Moderation rules reload failed, keeping %s",
+                self._rules.version,
+            )
+
+        return self._rules
+
+    @property
+    def version(self) -> str:
+        return self.rules().version
+
+
+moderation_engine = ModerationEngine(
+    MODERATION_RULES_DIR,
+    MODERATION_RULES_RELOAD_INTERVAL,
+)
+
+# ===============================
+# CLASSIFICATORE (OPZIONALE, LAZY)
+# ===============================
+_model = None
+_model_signature = None
+_model_checked_at = 0.0
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """
+    ToxicityModel caricato al primo uso; se il file cambia (nuovo build)
+    viene rimappato al controllo successivo. None senza modello.
+    """
+
+    global _model, _model_signature, _model_checked_at
+
+    if not MODERATION_MODEL_PATH:
+        return None
+
+    now = time.monotonic()
+    fresh = now - _model_checked_at < MODERATION_MODEL_RELOAD_INTERVAL
+    if _model is not None and fresh:
+        return _model
+
+    # dipendenza opzionale (numpy): serve solo con il classificatore
+    from app.services.moderation_model import ToxicityModel
+
+    with _model_lock:
+        _model_checked_at = now
+        path = Path(MODERATION_MODEL_PATH)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return _model
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if _model is None or signature != _model_signature:
+            _model = ToxicityModel(path)
+            _model_signature = signature
+
+        return _model
+
+
+verdict_cache = create_cache(
+    "moderation",
+    max_entries=MODERATION_CACHE_MAX_ENTRIES,
+    ttl=MODERATION_CACHE_TTL,
+)
+
+
+# ===============================
+# AI MODERATION PIPELINE (V1)
+# ===============================
+def _verdict(
+    rules: RuleSet,
+    text: str,
+    toxicity: Optional[float] = None,
+) -> Dict[str, object]:
     score = 0
     is_flagged = False
     is_approved = True
     note = "Approved automatically"
 
-    for word in banned_words:
-        if word in lowered:
-            score += 50
-            is_flagged = True
-            is_approved = False
-            note = "Toxic language detected"
-            break
+    # 🔴 blacklist compilata + classificatore locale (se configurato)
+    toxic_by_model = (
+        toxicity is not None and toxicity >= MODERATION_MODEL_THRESHOLD
+    )
+    if rules.match(normalize_text(text)) or toxic_by_model:
+        score += 50
+        is_flagged = True
+        is_approved = False
+        note = "Toxic language detected"
 
     # 🟠 Controllo aggressività passiva (placeholder)
     if "!!!" in text or text.isupper():
@@ -52,3 +334,75 @@ def moderate_comment(text: str) -> Dict[str, object]:
         "score": score,
         "note": note,
     }
+
+
+def moderation_version() -> str:
+    """Versione di regole + modello: cambia quando cambia il verdetto."""
+    model = get_model()
+    version = moderation_engine.version
+    return f"{version}|{model.version}" if model else version
+
+
+# ===============================
+# CACHE DEI VERDETTI
+# ===============================
+def verdict_key(text: str, version: str) -> str:
+    """
+    Hash del testo normalizzato (casefold, spazi compattati) + i tratti
+    del testo originale che cambiano il verdetto (maiuscolo, "!!!").
+    La versione di regole/modello nella chiave invalida tutto da sola.
+    """
+
+    normalized = " ".join(normalize_text(text).split())
+    shouting = "1" if text.isupper() else "0"
+    bangs = "1" if "!!!" in text else "0"
+    digest = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+    return f"{version}:{shouting}{bangs}:{digest}"
+
+
+def moderate_comments(texts: Iterable[str]) -> List[Dict[str, object]]:
+    """
+    Come moderate_comment, per un blocco di testi con lo stesso RuleSet.
+    I testi già visti con la stessa versione escono dalla cache; solo
+    gli altri passano da regole e classificatore (in un solo batch).
+    """
+
+    texts = list(texts)
+    rules = moderation_engine.rules()
+    model = get_model()
+
+    version = f"{rules.version}|{model.version}" if model else rules.version
+    keys = [verdict_key(text, version) for text in texts]
+
+    found: Dict[str, Dict[str, object]] = {}
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key in found or key in missing:
+            # ripetuto nello stesso batch: conta come hit
+            verdict_cache.stats.record(True)
+            continue
+        verdict = verdict_cache.get(key)
+        if verdict is None:
+            missing[key] = text
+        else:
+            found[key] = verdict
+
+    if missing:
+        toxicity = [None] * len(missing)
+        if model is not None:
+            toxicity = model.predict(list(missing.values())).tolist()
+
+        for (key, text), probability in zip(missing.items(), toxicity):
+            verdict = _verdict(rules, text, probability)
+            verdict_cache.set(key, verdict)
+            found[key] = verdict
+
+    return [found[key] for key in keys]
+
+
+def moderate_comment(text: str) -> Dict[str, object]:
+    """
+    Moderation pipeline centralizzata.
+    In futuro verrà sostituita / estesa con AI reale (LLM).
+    """
+    return moderate_comments([text])[0]
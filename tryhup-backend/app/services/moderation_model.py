@@ -0,0 +1,218 @@
+"""
+Classificatore di tossicità (NumPy). Lo importa solo
+app.services.moderation.get_model quando MODERATION_MODEL_PATH è
+impostato: senza modello numpy non serve.
+"""
+
+import argparse
+import os
+import unicodedata
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# ===============================
+# CONFIG
+# ===============================
+NGRAM_SIZES = (3, 4, 5)
+DEFAULT_HASH_BITS = 20
+
+_PRIME = np.uint64(1099511628211)
+_SEPARATOR = 0
+
+
+# ===============================
+# FEATURE HASHING (VETTORIALE)
+# ===============================
+def hash_ngrams(
+    texts: Sequence[str],
+    bits: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    N-gram di caratteri (byte UTF-8) di tutti i testi del batch in un
+    colpo solo: i testi vengono concatenati con un separatore, gli
+    hash calcolati con finestre scorrevoli NumPy e gli n-gram che
+    attraversano il separatore scartati.
+
+    Restituisce (bucket, doc_ids, grams_per_doc).
+    """
+
+    encoded = [
+        f" {unicodedata.normalize('NFKC', t).casefold()} ".encode()
+        for t in texts
+    ]
+    lengths = np.fromiter((len(e) + 1 for e in encoded), dtype=np.int64)
+    data = np.frombuffer(
+        b"".join(e + bytes([_SEPARATOR]) for e in encoded),
+        dtype=np.uint8,
+    ).astype(np.uint64)
+
+    owner = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    mask = np.uint64((1 << bits) - 1)
+
+    buckets = []
+    doc_ids = []
+    for size in NGRAM_SIZES:
+        if data.size < size:
+            continue
+
+        windows = np.lib.stride_tricks.sliding_window_view(data, size)
+        valid = ~(windows == _SEPARATOR).any(axis=1)
+
+        hashed = np.full(windows.shape[0], np.uint64(size), dtype=np.uint64)
+        for column in range(size):
+            hashed = hashed * _PRIME + windows[:, column]
+        hashed ^= hashed >> np.uint64(29)
+
+        buckets.append((hashed[valid] & mask).astype(np.int64))
+        doc_ids.append(owner[: windows.shape[0]][valid])
+
+    if not buckets:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(len(texts), dtype=np.int64)
+
+    bucket = np.concatenate(buckets)
+    doc = np.concatenate(doc_ids)
+
+    order = np.argsort(doc, kind="stable")
+    bucket, doc = bucket[order], doc[order]
+
+    counts = np.bincount(doc, minlength=len(texts))
+    return bucket, doc, counts
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _scale(counts: np.ndarray) -> np.ndarray:
+    # vettore di feature normalizzato L2: testi lunghi non pesano di più
+    return 1.0 / np.sqrt(np.maximum(counts, 1))
+
+
+# ===============================
+# MODELLO LINEARE (MEMORY-MAPPED)
+# ===============================
+class ToxicityModel:
+    """
+    Modello lineare su n-gram hashati: pesi float32 in un .npy
+    (2**bits pesi + bias in coda). np.load(mmap_mode="r") lascia i pesi
+    nella page cache del sistema: tutti i worker leggono le stesse
+    pagine invece di averne ognuno una copia.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.weights = np.load(path, mmap_mode="r")
+
+        dim = self.weights.shape[0] - 1
+        self.bits = dim.bit_length() - 1
+        if dim != 1 << self.bits:
+            raise ValueError(f"Invalid model size {self.weights.shape[0]}")
+
+        stat = path.stat()
+        self.version = f"{path.name}@{stat.st_mtime_ns:x}"
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        """Probabilità di tossicità per ogni testo del batch."""
+
+        if not texts:
+            return np.zeros(0)
+
+        bucket, doc, counts = hash_ngrams(texts, self.bits)
+
+        totals = np.zeros(len(texts))
+        if bucket.size:
+            contributions = np.asarray(self.weights[bucket], dtype=np.float64)
+            # doc è ordinato: un reduceat somma i contributi di ogni testo
+            present = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+            totals[present] = np.add.reduceat(contributions, starts)
+
+        logits = totals * _scale(counts) + float(self.weights[-1])
+        return _sigmoid(logits)
+
+
+# ===============================
+# BUILD (TRAINING OFFLINE)
+# ===============================
+def train(
+    texts: List[str],
+    labels: np.ndarray,
+    bits: int = DEFAULT_HASH_BITS,
+    epochs: int = 50,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+) -> np.ndarray:
+    """
+    Regressione logistica full-batch (AdaGrad) sulle stesse feature di
+    predict: n-gram rari ricevono passi più lunghi di quelli frequenti.
+    """
+
+    dim = 1 << bits
+    weights = np.zeros(dim + 1, dtype=np.float64)
+    squared = np.full(dim + 1, 1e-8)
+
+    bucket, doc, counts = hash_ngrams(texts, bits)
+    scale = _scale(counts)
+    labels = labels.astype(np.float64)
+
+    for _ in range(epochs):
+        totals = np.bincount(
+            doc,
+            weights=weights[bucket],
+            minlength=len(texts),
+        )
+        error = _sigmoid(totals * scale + weights[-1]) - labels
+
+        gradient = np.empty(dim + 1)
+        gradient[:dim] = np.bincount(
+            bucket,
+            weights=(error * scale)[doc],
+            minlength=dim,
+        ) / len(texts) + l2 * weights[:dim]
+        gradient[-1] = error.mean()
+
+        squared += gradient ** 2
+        weights -= learning_rate * gradient / np.sqrt(squared)
+
+    return weights.astype(np.float32)
+
+
+def _read_dataset(path: Path) -> Tuple[List[str], np.ndarray]:
+    """TSV: etichetta (0/1) <TAB> testo."""
+
+    texts = []
+    labels = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        label, _, text = line.partition("\t")
+        labels.append(int(label))
+        texts.append(text)
+    return texts, np.array(labels)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build modello tossicità")
+    parser.add_argument("dataset", type=Path, help="TSV etichetta<TAB>testo")
+    parser.add_argument("output", type=Path, help="file .npy dei pesi")
+    parser.add_argument("--bits", type=int, default=DEFAULT_HASH_BITS)
+    parser.add_argument("--epochs", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    texts, labels = _read_dataset(args.dataset)
+    weights = train(texts, labels, bits=args.bits, epochs=args.epochs)
+
+    # scrittura atomica: i worker rimappano il file solo quando è completo
+    tmp = args.output.with_suffix(".tmp.npy")
+    np.save(tmp, weights)
+    os.replace(tmp, args.output)
+
+    print(f"✅ Modello salvato: {args.output} ({len(texts)} esempi)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicTask, register_task
+from app.database import SessionLocal
+from app.models import Comment
+from app.services.comment_threads import adjust_reply_counts
+from app.services.moderation import moderate_comments, verdict_cache
+
+
+# ===============================
+# CONFIG
+# ===============================
+# false = moderazione inline nella POST (comportamento storico)
+MODERATION_ASYNC = os.getenv("MODERATION_ASYNC", "true") == "true"
+MODERATION_BATCH_SIZE = int(os.getenv("MODERATION_BATCH_SIZE", "200"))
+MODERATION_POLL_INTERVAL = float(os.getenv("MODERATION_POLL_INTERVAL", "2"))
+# tetto di batch per giro: il task non monopolizza il DB sotto picco
+MODERATION_MAX_BATCHES = int(os.getenv("MODERATION_MAX_BATCHES", "50"))
+
+PENDING_NOTE = "Pending moderation"
+
+
+# ===============================
+# METRICHE
+# ===============================
+class _Metrics:
+    def __init__(self):
+        self.processed = 0
+        self.approved = 0
+        self.flagged = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_batch_ms: Optional[float] = None
+        self.last_run_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def record(self, verdicts: List[Dict[str, object]], elapsed: float):
+        with self._lock:
+            self.batches += 1
+            self.processed += len(verdicts)
+            self.approved += sum(1 for v in verdicts if v["is_approved"])
+            self.flagged += sum(1 for v in verdicts if v["is_flagged"])
+            self.last_batch_ms = round(elapsed * 1000, 2)
+            self.last_run_at = datetime.now(timezone.utc)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "processed": self.processed,
+                "approved": self.approved,
+                "flagged": self.flagged,
+                "batches": self.batches,
+                "failures": self.failures,
+                "last_batch_ms": self.last_batch_ms,
+                "last_run_at": self.last_run_at,
+            }
+
+
+metrics = _Metrics()
+
+
+# ===============================
+# BATCH
+# ===============================
+def process_batch(db: Session) -> int:
+    """
+    Prende fino a MODERATION_BATCH_SIZE commenti in coda (FOR UPDATE
+    SKIP LOCKED: più worker/processi non si pestano i piedi), li valuta
+    insieme e scrive i verdetti con un solo UPDATE executemany.
+
+    Niente pool di thread: regex e cache sono Python puro e col GIL non
+    andrebbero in parallelo. Il parallelismo viene dai processi (ogni
+    worker dell'app drena la coda con il suo task).
+    """
+
+    rows = db.execute(
+        select(Comment.id, Comment.text, Comment.parent_id)
+        .where(Comment.moderation_pending.is_(True))
+        .order_by(Comment.id)
+        .limit(MODERATION_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    if not rows:
+        db.rollback()
+        return 0
+
+    started = time.perf_counter()
+    verdicts = moderate_comments([row.text for row in rows])
+
+    table = Comment.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            is_approved=bindparam("b_approved"),
+            is_flagged=bindparam("b_flagged"),
+            moderation_score=bindparam("b_score"),
+            moderation_note=bindparam("b_note"),
+            moderation_pending=False,
+        ),
+        [
+            {
+                "b_id": row.id,
+                "b_approved": verdict["is_approved"],
+                "b_flagged": verdict["is_flagged"],
+                "b_score": verdict["score"],
+                "b_note": verdict["note"],
+            }
+            for row, verdict in zip(rows, verdicts)
+        ],
+    )
+
+    replies: Dict[int, int] = {}
+    for row, verdict in zip(rows, verdicts):
+        if verdict["is_approved"] and row.parent_id is not None:
+            replies[row.parent_id] = replies.get(row.parent_id, 0) + 1
+    adjust_reply_counts(db, replies)
+
+    db.commit()
+
+    metrics.record(verdicts, time.perf_counter() - started)
+    return len(rows)
+
+
+def drain_queue() -> int:
+    db = SessionLocal()
+    processed = 0
+    try:
+        for _ in range(MODERATION_MAX_BATCHES):
+            try:
+                count = process_batch(db)
+            except Exception:
+                db.rollback()
+                metrics.record_failure()
+                raise
+            processed += count
+            if count < MODERATION_BATCH_SIZE:
+                break
+    finally:
+        db.close()
+    return processed
+
+
+moderation_task = register_task(
+    PeriodicTask(
+        "moderation",
+        drain_queue,
+        MODERATION_POLL_INTERVAL,
+        run_on_start=True,
+    )
+)
+
+
+def enqueue_wakeup() -> None:
+    """Chiamata dopo il commit di un commento in coda."""
+    moderation_task.wake()
+
+
+# ===============================
+# STATS
+# ===============================
+def moderation_queue_stats(db: Session) -> dict:
+    depth, oldest = db.execute(
+        select(func.count(Comment.id), func.min(Comment.created_at))
+        .where(Comment.moderation_pending.is_(True))
+    ).one()
+
+    lag_seconds = 0.0
+    if oldest is not None:
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        lag_seconds = round(
+            (datetime.now(timezone.utc) - oldest).total_seconds(), 3
+        )
+
+    return {
+        "async": MODERATION_ASYNC,
+        "batch_size": MODERATION_BATCH_SIZE,
+        "queue_depth": depth,
+        "lag_seconds": lag_seconds,
+        **metrics.snapshot(),
+        "verdict_cache": verdict_cache.info(),
+    }
@@ -0,0 +1,381 @@
+import argparse
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Optional
+
+from sqlalchemy import (
+    Float,
+    and_,
+    bindparam,
+    case,
+    cast,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import Content, Rating
+
+
+# ===============================
+# CONFIG
+# ===============================
+RATINGS_BATCH_SIZE = int(os.getenv("RATINGS_BATCH_SIZE", "5000"))
+
+
+# ===============================
+# SUBMIT (UPSERT + AGGREGATO ATOMICO)
+# ===============================
+def _aggregate_values(score: int, previous, inserted, now: datetime) -> dict:
+    """
+    UPDATE relativo degli aggregati: somma += voto − voto sostituito,
+    conteggio += 1 solo per il primo voto dell'utente.
+    """
+
+    new_sum = Content.rating_sum + score - func.coalesce(previous, 0)
+    new_count = Content.rating_count + case((inserted, 1), else_=0)
+
+    return {
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+        "rating_avg": func.coalesce(
+            cast(new_sum, Float) / func.nullif(new_count, 0),
+            0,
+        ),
+        "last_rated_at": now,
+    }
+
+
+def _rate_postgresql(
+    db: Session,
+    user_id: int,
+    content_id: int,
+    score: int,
+    now: datetime,
+):
+    """
+    Un solo statement (un round trip):
+
+        WITH old AS (SELECT score ... FOR UPDATE),
+             upsert AS (INSERT ... ON CONFLICT DO UPDATE
+                        RETURNING xmax = 0 AS inserted),
+             totals AS (UPDATE contents ... RETURNING ...)
+        SELECT inserted, previous, rating_avg, rating_count
+
+    `old` blocca la riga del voto: un voto concorrente dello stesso utente
+    aspetta il commit e legge il valore nuovo. L'INSERT parte da `old`
+    (LEFT JOIN) così il voto vecchio è letto prima di essere sostituito.
+    """
+
+    old = (
+        select(Rating.score)
+        .where(Rating.user_id == user_id, Rating.content_id == content_id)
+        .with_for_update()
+        .cte("old")
+    )
+
+    source = (
+        select(
+            literal(user_id),
+            literal(content_id),
+            literal(score),
+            literal(now),
+            literal(now),
+        )
+        .select_from(select(literal(1)).subquery("one").outerjoin(old, true()))
+    )
+
+    stmt = postgresql.insert(Rating).from_select(
+        ["user_id", "content_id", "score", "created_at", "updated_at"],
+        source,
+    )
+    upsert = (
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "content_id"],
+            set_={
+                "score": stmt.excluded.score,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        .returning(literal_column("xmax = 0").label("inserted"))
+        .cte("upsert")
+    )
+
+    previous = select(old.c.score).scalar_subquery()
+    inserted = select(upsert.c.inserted).scalar_subquery()
+
+    totals = (
+        update(Content)
+        .where(
+            Content.id == content_id,
+            Content.approved.is_(True),
+            # primo voto concorrente: né inserito né letto in `old`
+            or_(inserted, select(old.c.score).exists()),
+        )
+        .values(_aggregate_values(score, previous, inserted, now))
+        .returning(Content.rating_avg, Content.rating_count)
+        .cte("totals")
+    )
+
+    return db.execute(
+        select(
+            upsert.c.inserted,
+            previous.label("previous"),
+            totals.c.rating_avg,
+            totals.c.rating_count,
+        ).select_from(upsert.outerjoin(totals, true()))
+    ).one()
+
+
+def _rate_sqlite(
+    db: Session,
+    user_id: int,
+    content_id: int,
+    score: int,
+    now: datetime,
+):
+    """
+    Stesso risultato in tre statement: SQLite non ha DML nelle CTE e
+    serializza comunque le scritture (sviluppo / test).
+    """
+
+    previous = db.execute(
+        select(Rating.score)
+        .where(Rating.user_id == user_id, Rating.content_id == content_id)
+    ).scalar()
+
+    stmt = sqlite.insert(Rating).values(
+        user_id=user_id,
+        content_id=content_id,
+        score=score,
+        created_at=now,
+        updated_at=now,
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "content_id"],
+            set_={"score": stmt.excluded.score, "updated_at": now},
+        )
+    )
+
+    inserted = previous is None
+    aggregate = db.execute(
+        update(Content)
+        .where(Content.id == content_id, Content.approved.is_(True))
+        .values(
+            _aggregate_values(score, previous, literal(inserted), now)
+        )
+        .returning(Content.rating_avg, Content.rating_count)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    return SimpleNamespace(
+        inserted=inserted,
+        previous=previous,
+        rating_avg=aggregate.rating_avg if aggregate else None,
+        rating_count=aggregate.rating_count if aggregate else None,
+    )
+
+
+def submit_rating(
+    db: Session,
+    user_id: int,
+    content_id: int,
+    score: int,
+) -> Optional[dict]:
+    """
+    Registra (o sostituisce) il voto dell'utente e aggiorna gli aggregati
+    del contenuto con un solo UPDATE relativo: niente read-modify-write,
+    nessun aggiornamento perso sotto concorrenza.
+    Restituisce None se il contenuto non esiste o non è approvato.
+    """
+
+    rate = (
+        _rate_postgresql
+        if db.get_bind().dialect.name == "postgresql"
+        else _rate_sqlite
+    )
+
+    while True:
+        now = datetime.now(timezone.utc)
+
+        try:
+            row = rate(db, user_id, content_id, score, now)
+        except IntegrityError:
+            # content_id inesistente (FK)
+            db.rollback()
+            return None
+
+        if row.rating_avg is not None:
+            break
+
+        db.rollback()
+        if row.inserted or row.previous is not None:
+            # contenuto inesistente o non approvato
+            return None
+        # primo voto concorrente arrivato prima: ora la riga si vede
+
+    db.commit()
+
+    return {
+        "rating_avg": float(row.rating_avg),
+        "rating_count": row.rating_count,
+    }
+
+
+# ===============================
+# RIPARAZIONE (RI-AGGREGAZIONE BULK)
+# ===============================
+def reaggregate_ratings(db: Session, only_rated: bool = False) -> int:
+    """
+    Ricalcola rating_sum / rating_count / rating_avg dalla tabella ratings,
+    a blocchi di RATINGS_BATCH_SIZE contenuti.
+
+    only_rated=True tocca solo i contenuti con almeno un voto in ratings:
+    conserva gli aggregati storici precedenti alla tabella.
+    """
+
+    table = Content.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            rating_sum=bindparam("b_sum"),
+            rating_count=bindparam("b_count"),
+            rating_avg=bindparam("b_avg"),
+        )
+    )
+
+    updated = 0
+    last_id = 0
+
+    while True:
+        ids: List[int] = db.execute(
+            select(Content.id)
+            .where(Content.id > last_id)
+            .order_by(Content.id)
+            .limit(RATINGS_BATCH_SIZE)
+        ).scalars().all()
+
+        if not ids:
+            break
+
+        aggregates = {
+            row.content_id: (int(row.total), row.count)
+            for row in db.execute(
+                select(
+                    Rating.content_id,
+                    func.sum(Rating.score).label("total"),
+                    func.count().label("count"),
+                )
+                .where(Rating.content_id.in_(ids))
+                .group_by(Rating.content_id)
+            )
+        }
+
+        params = []
+        for content_id in ids:
+            if only_rated and content_id not in aggregates:
+                continue
+            total, count = aggregates.get(content_id, (0, 0))
+            params.append({
+                "b_id": content_id,
+                "b_sum": total,
+                "b_count": count,
+                "b_avg": total / count if count else 0,
+            })
+
+        if params:
+            db.execute(statement, params)
+            updated += len(params)
+
+        db.commit()
+        last_id = ids[-1]
+
+    return updated
+
+
+def backfill_rating_sum(db: Session) -> int:
+    """
+    Migrazione di rating_sum (colonna nuova, default 0): da lanciare una
+    volta, prima di mettere in produzione il nuovo submit_rating, che
+    aggiorna la media a partire da rating_sum.
+    I contenuti con righe in ratings si ri-aggregano da lì, gli altri
+    (solo aggregati storici) ricostruiscono la somma da media × voti.
+    """
+
+    updated = reaggregate_ratings(db, only_rated=True)
+
+    rated = select(Rating.id).where(Rating.content_id == Content.id).exists()
+    last_id = 0
+
+    while True:
+        ids: List[int] = db.execute(
+            select(Content.id)
+            .where(Content.id > last_id)
+            .order_by(Content.id)
+            .limit(RATINGS_BATCH_SIZE)
+        ).scalars().all()
+
+        if not ids:
+            break
+
+        result = db.execute(
+            update(Content)
+            .where(
+                and_(Content.id > last_id, Content.id <= ids[-1]),
+                Content.rating_count > 0,
+                Content.rating_sum == 0,
+                ~rated,
+            )
+            .values(
+                rating_sum=func.round(Content.rating_avg * Content.rating_count)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        updated += result.rowcount
+        last_id = ids[-1]
+
+    return updated
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Ri-aggregazione voti")
+    parser.add_argument(
+        "--only-rated",
+        action="store_true",
+        help="non azzera i contenuti senza righe in ratings",
+    )
+    parser.add_argument(
+        "--backfill-sum",
+        action="store_true",
+        help="migrazione: popola rating_sum (anche dagli aggregati storici)",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.backfill_sum:
+            updated = backfill_rating_sum(db)
+        else:
+            updated = reaggregate_ratings(db, only_rated=args.only_rated)
+    finally:
+        db.close()
+
+    print(f"✅ Aggregati voti ricalcolati: {updated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import os
+from typing import Iterable, List
+
+from sqlalchemy import insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app.models import Content, Follow, TimelineEntry, User
+from app.services.counters import follower_counter
+
+
+# ===============================
+# CONFIG
+# ===============================
+# oltre questa soglia di follower il creator passa a fan-out on read
+TIMELINE_FANOUT_LIMIT = int(os.getenv("TIMELINE_FANOUT_LIMIT", "5000"))
+
+# contenuti recenti copiati in timeline quando si inizia a seguire qualcuno
+TIMELINE_BACKFILL_LIMIT = int(os.getenv("TIMELINE_BACKFILL_LIMIT", "200"))
+
+
+# ===============================
+# FAN-OUT ON WRITE
+# ===============================
+def _push_owners(db: Session, owner_ids: Iterable[int]) -> List[int]:
+    """
+    Tra gli autori dati, quelli ancora in fan-out on write. Chi ha
+    superato TIMELINE_FANOUT_LIMIT passa qui a fan-out on read.
+    """
+
+    owners = db.execute(
+        select(User.id, User.followers_count).where(
+            User.id.in_(set(owner_ids)),
+            User.fanout_on_read.is_(False),
+        )
+    ).all()
+    if not owners:
+        return []
+
+    pending = follower_counter.pending_many([owner.id for owner in owners])
+
+    push: List[int] = []
+    celebrities: List[int] = []
+    for owner in owners:
+        followers_count = max(
+            owner.followers_count + pending.get(owner.id, 0),
+            0,
+        )
+        if followers_count > TIMELINE_FANOUT_LIMIT:
+            celebrities.append(owner.id)
+        else:
+            push.append(owner.id)
+
+    if celebrities:
+        # creator "celebrity": da qui in poi i suoi contenuti
+        # vengono letti al volo, le copie già scritte non servono più
+        db.execute(
+            update(User)
+            .where(User.id.in_(celebrities))
+            .values(fanout_on_read=True)
+        )
+        db.query(TimelineEntry).filter(
+            TimelineEntry.owner_id.in_(celebrities),
+        ).delete(synchronize_session=False)
+
+    return push
+
+
+def fan_out_contents(
+    db: Session,
+    content_ids: List[int],
+    owner_ids: Iterable[int],
+) -> None:
+    """
+    Copia in blocco i contenuti appena approvati nella timeline dei
+    follower dei loro autori: un solo INSERT ... SELECT su follows.
+    Non fa commit: viaggia nella stessa transazione dell'approvazione.
+    """
+
+    if not content_ids:
+        return
+
+    push = _push_owners(db, owner_ids)
+    if not push:
+        return
+
+    db.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "content_id", "owner_id", "created_at"],
+            select(
+                Follow.follower_id,
+                Content.id,
+                Content.owner_id,
+                Content.created_at,
+            )
+            .join(Content, Content.owner_id == Follow.following_id)
+            .where(
+                Content.id.in_(content_ids),
+                Follow.following_id.in_(push),
+            ),
+        )
+    )
+
+
+def fan_out_content(db: Session, content: Content) -> None:
+    """
+    Copia un contenuto appena approvato nella timeline di ogni follower.
+    """
+
+    if content.owner_id is None:
+        return
+
+    fan_out_contents(db, [content.id], [content.owner_id])
+
+
+def on_follow(db: Session, follower_id: int, followed: User) -> None:
+    """
+    Backfill degli ultimi contenuti approvati del creator appena seguito.
+    """
+
+    if followed.fanout_on_read:
+        return
+
+    recent = (
+        select(
+            literal(follower_id),
+            Content.id,
+            Content.owner_id,
+            Content.created_at,
+        )
+        .where(
+            Content.owner_id == followed.id,
+            Content.approved.is_(True),
+        )
+        .order_by(Content.created_at.desc())
+        .limit(TIMELINE_BACKFILL_LIMIT)
+    )
+
+    db.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "content_id", "owner_id", "created_at"],
+            recent,
+        )
+    )
+
+
+def on_unfollow(db: Session, follower_id: int, followed_id: int) -> None:
+    db.query(TimelineEntry).filter(
+        TimelineEntry.user_id == follower_id,
+        TimelineEntry.owner_id == followed_id,
+    ).delete(synchronize_session=False)
+
+
+# ===============================
+# READ PATH (HYBRID)
+# ===============================
+def following_source(user_id: int):
+    """
+    Sorgente ordinabile (created_at, id) del feed following:
+    timeline materializzata + contenuti dei creator in fan-out on read.
+    """
+
+    pushed = (
+        select(
+            TimelineEntry.created_at.label("created_at"),
+            TimelineEntry.content_id.label("id"),
+        )
+        .where(TimelineEntry.user_id == user_id)
+    )
+
+    pull_owners = (
+        select(Follow.following_id)
+        .join(User, User.id == Follow.following_id)
+        .where(
+            Follow.follower_id == user_id,
+            User.fanout_on_read.is_(True),
+        )
+    )
+
+    pulled = (
+        select(
+            Content.created_at.label("created_at"),
+            Content.id.label("id"),
+        )
+        .where(
+            Content.approved.is_(True),
+            Content.owner_id.in_(pull_owners),
+        )
+    )
+
+    return union_all(pushed, pulled).subquery("following_source")
+
+
+# ===============================
+# REBUILD (MIGRAZIONE / RIPARAZIONE)
+# ===============================
+def rebuild_timelines(db: Session) -> None:
+    """
+    Ricostruisce da zero tutte le timeline a partire da follows + contents.
+    """
+
+    db.query(TimelineEntry).delete(synchronize_session=False)
+
+    db.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "content_id", "owner_id", "created_at"],
+            select(
+                Follow.follower_id,
+                Content.id,
+                Content.owner_id,
+                Content.created_at,
+            )
+            .join(Content, Content.owner_id == Follow.following_id)
+            .join(User, User.id == Follow.following_id)
+            .where(
+                Content.approved.is_(True),
+                User.fanout_on_read.is_(False),
+            ),
+        )
+    )
+
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        rebuild_timelines(session)
+    finally:
+        session.close()
+
+    print("✅ Timeline ricostruite")
@@ -0,0 +1,84 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Content, Follow, Like, Rating
+from app.schemas import ViewerStateOut
+
+
+# ===============================
+# CONFIG
+# ===============================
+VIEWER_STATE_MAX_IDS = 100
+
+
+# ===============================
+# RESOLVE (SET-BASED)
+# ===============================
+def resolve_viewer_state(
+    db: Session,
+    user_id: int,
+    content_ids: Iterable[int],
+    owners: Optional[Dict[int, Optional[int]]] = None,
+) -> List[ViewerStateOut]:
+    """
+    Flag "mi piace / ho votato / seguo l'autore" per un blocco di card
+    con un numero fisso di query (una per tabella), non una per card.
+    `owners` (content_id → owner_id) evita la query su contents quando
+    il chiamante ha già i contenuti in mano (es. il feed).
+    """
+
+    ids = list(dict.fromkeys(content_ids))[:VIEWER_STATE_MAX_IDS]
+    if not ids:
+        return []
+
+    if owners is None:
+        owners = dict(
+            db.execute(
+                select(Content.id, Content.owner_id)
+                .where(Content.id.in_(ids))
+            ).all()
+        )
+
+    liked = set(
+        db.execute(
+            select(Like.content_id).where(
+                Like.user_id == user_id,
+                Like.content_id.in_(ids),
+            )
+        ).scalars()
+    )
+
+    my_ratings = dict(
+        db.execute(
+            select(Rating.content_id, Rating.score).where(
+                Rating.user_id == user_id,
+                Rating.content_id.in_(ids),
+            )
+        ).all()
+    )
+
+    owner_ids = {o for o in owners.values() if o is not None}
+    followed = set()
+    if owner_ids:
+        followed = set(
+            db.execute(
+                select(Follow.following_id).where(
+                    Follow.follower_id == user_id,
+                    Follow.following_id.in_(owner_ids),
+                )
+            ).scalars()
+        )
+
+    return [
+        ViewerStateOut(
+            content_id=content_id,
+            liked=content_id in liked,
+            rated=content_id in my_ratings,
+            my_rating=my_ratings.get(content_id),
+            following_owner=owners[content_id] in followed,
+        )
+        for content_id in ids
+        if content_id in owners
+    ]
@@ -0,0 +1,91 @@
+"""
+Benchmark dell'indice in memoria del grafo dei follow.
+
+Costruisce un grafo casuale (distribuzione dei follower a coda lunga),
+misura memoria per milione di archi, membership e intersezioni.
+
+    cd tryhup-backend
+    python -m benchmarks.bench_follow_graph --users 200000 --edges 5000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.follow_graph_csr import FollowGraph  # noqa: E402
+
+
+def _random_edges(rng: np.random.Generator, users: int, edges: int):
+    followers = rng.integers(1, users + 1, size=edges, dtype=np.int32)
+    # pochi creator molto seguiti, molti utenti con pochi follower
+    followings = np.minimum(
+        rng.zipf(1.3, size=edges), users
+    ).astype(np.int32)
+    pairs = np.unique(np.stack([followers, followings], axis=1), axis=0)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _per_call_us(func, args, repeat: int) -> float:
+    started = time.perf_counter()
+    for i in range(repeat):
+        func(*args[i % len(args)])
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark follow graph")
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--edges", type=int, default=2000000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    followers, followings = _random_edges(rng, args.users, args.edges)
+
+    started = time.perf_counter()
+    graph = FollowGraph(followers, followings)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    sample = rng.integers(0, len(followers), size=1000)
+    pairs = [
+        (int(followers[i]), int(followings[i]))
+        for i in sample
+    ]
+    users = [(int(u), int(v)) for u, v in rng.integers(1, 200, size=(1000, 2))]
+
+    membership = _per_call_us(graph.contains, pairs, args.queries)
+    mutuals = _per_call_us(
+        lambda u, _: np.intersect1d(
+            graph.following(u), graph.followers(u), assume_unique=True
+        ),
+        pairs,
+        args.queries,
+    )
+    common = _per_call_us(
+        lambda u, v: np.intersect1d(
+            graph.followers(u), graph.followers(v), assume_unique=True
+        ),
+        users,
+        args.queries // 10,
+    )
+
+    per_million = graph.nbytes / graph.edges * 1e6 / 2**20
+
+    print(f"archi            {graph.edges:>12,}")
+    print(f"build            {build_ms:>12.1f} ms")
+    print(f"memoria          {graph.nbytes / 2**20:>12.1f} MiB")
+    print(f"per 1M archi     {per_million:>12.1f} MiB")
+    print(f"is_following     {membership:>12.2f} µs")
+    print(f"mutuals          {mutuals:>12.2f} µs")
+    print(f"common (top)     {common:>12.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
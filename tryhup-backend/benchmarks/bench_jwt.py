@@ -0,0 +1,55 @@
+"""
+Benchmark di decode_access_token.
+
+Confronta la verifica completa (decode python-jose + HMAC) con il
+percorso in cache per lo stesso token.
+
+    cd tryhup-backend
+    python -m benchmarks.bench_jwt --calls 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app.core.security import (  # noqa: E402
+    _verify_token,
+    create_access_token,
+    decode_access_token,
+    verified_tokens,
+)
+
+
+def _per_call_us(func, token: str, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func(token)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JWT")
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    token = create_access_token("bench@tryhup.local")
+
+    verified_tokens.clear()
+    full = _per_call_us(_verify_token, token, args.calls)
+
+    decode_access_token(token)
+    cached = _per_call_us(decode_access_token, token, args.calls)
+
+    print(f"{'percorso':>10} {'µs/chiamata':>12}")
+    print(f"{'verifica':>10} {full:>12.2f}")
+    print(f"{'cache':>10} {cached:>12.2f}")
+    print(f"speedup x{full / cached:.1f}")
+
+
+if __name__ == "__main__":
+    main()
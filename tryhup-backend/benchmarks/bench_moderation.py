@@ -0,0 +1,97 @@
+"""
+Benchmark del motore di moderazione.
+
+Confronta il costo per commento della regex compilata (RuleSet) con la
+vecchia scansione a sottostringhe, al crescere del numero di regole.
+
+    cd tryhup-backend
+    python -m benchmarks.bench_moderation --sizes 10 1000 10000 50000
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.moderation import RuleSet, normalize_text  # noqa: E402
+
+
+WORDS = (
+    "che bello questo video davvero fatto bene complimenti "
+    "great video love the editing keep going amazing work "
+    "non sono d'accordo ma rispetto il punto di vista "
+    "whatever you think this is interesting thanks for sharing"
+).split()
+
+
+def _random_terms(rng: random.Random, count: int):
+    terms = set()
+    while len(terms) < count:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10)))
+        terms.add(word + "*" if rng.random() < 0.2 else word)
+    return sorted(terms)
+
+
+def _corpus(rng: random.Random, count: int):
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(5, 40)))
+        for _ in range(count)
+    ]
+
+
+def _legacy_scan(terms, texts):
+    banned = [t.rstrip("*") for t in terms]
+    for text in texts:
+        lowered = text.lower()
+        for word in banned:
+            if word in lowered:
+                break
+
+
+def _compiled_scan(rules: RuleSet, texts):
+    for text in texts:
+        rules.match(normalize_text(text))
+
+
+def _per_comment_us(func, texts, *args) -> float:
+    started = time.perf_counter()
+    func(*args, texts)
+    return (time.perf_counter() - started) / len(texts) * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark moderazione")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 10000, 50000],
+    )
+    parser.add_argument("--comments", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    texts = _corpus(rng, args.comments)
+
+    print(f"{'regole':>8} {'compile ms':>11} {'regex µs':>10} {'legacy µs':>10}")
+
+    for size in args.sizes:
+        terms = _random_terms(rng, size)
+
+        started = time.perf_counter()
+        rules = RuleSet("bench", terms)
+        compile_ms = (time.perf_counter() - started) * 1e3
+
+        compiled = _per_comment_us(_compiled_scan, texts, rules)
+        legacy = _per_comment_us(_legacy_scan, texts, terms)
+
+        print(f"{size:>8} {compile_ms:>11.1f} {compiled:>10.2f} {legacy:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
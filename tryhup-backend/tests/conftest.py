@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+# prima di importare app: .env non sovrascrive variabili già impostate
+_db_dir = tempfile.mkdtemp(prefix="tryhup-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/tryhup.db"
+os.environ["DEV_MODE"] = "true"
+# router @async_db su AsyncSession (sqlite+aiosqlite); false = percorso sync
+os.environ.setdefault("DB_ASYNC", "true")
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["COUNTERS_BACKEND"] = "memory"
+os.environ["RATE_LIMIT_BACKEND"] = "none"
+os.environ["MODERATION_ASYNC"] = "false"
+os.environ["SMTP_USER"] = ""
+os.environ["SMTP_PASSWORD"] = ""
+os.environ["EMAIL_FROM"] = "TryHup <noreply@tryhup.test>"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import CACHES
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.services import discover
+
+
+@pytest.fixture(autouse=True)
+def fresh_db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # gli id ripartono da 1: niente voci in cache di un test precedente
+    for cache in CACHES.values():
+        cache.clear()
+    discover.reset_local_cache()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # niente `with`: i task in background non partono nei test
+    return TestClient(app)
+
+
+def dev_headers(email: str, role: str = "user") -> dict:
+    return {"X-DEV-EMAIL": email, "X-DEV-ROLE": role}
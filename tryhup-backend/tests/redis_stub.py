@@ -0,0 +1,96 @@
+import fnmatch
+import threading
+import time
+
+
+class StubRedis:
+    """
+    Stand-in locale di un client redis-py: solo i comandi usati dai
+    backend condivisi. Due oggetti che usano lo stesso StubRedis si
+    comportano come due worker sullo stesso server.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _alive(self, key):
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = self._encode(value)
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            else:
+                self._expires.pop(key, None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            keys = [key for key in list(self._data) if self._alive(key)]
+        return iter([key for key in keys if fnmatch.fnmatchcase(key, match)])
+
+    def pipeline(self):
+        return _StubPipeline(self)
+
+    def register_script(self, script):
+        return _StubScript(script)
+
+
+class _StubScript:
+    # registrazione sì, esecuzione no: il Lua non viene emulato
+    def __init__(self, script):
+        self.script = script
+
+    def __call__(self, keys=(), args=()):
+        raise NotImplementedError("StubRedis non esegue script Lua")
+
+
+class _StubPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        with self._client._lock:
+            results = [
+                method(*args, **kwargs)
+                for method, args, kwargs in self._calls
+            ]
+        self._calls = []
+        return results
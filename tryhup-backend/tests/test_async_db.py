@@ -0,0 +1,100 @@
+import asyncio
+import inspect
+
+import pytest
+
+from app import database
+from app.core.cache import RedisCache
+from app.models import Content, User
+from app.routers.likes import like_content
+from app.services import feed_cache
+from app.services.discover import build_snapshot
+
+from tests.conftest import dev_headers
+
+pytestmark = pytest.mark.skipif(
+    not database.DB_ASYNC,
+    reason="richiede DB_ASYNC=true",
+)
+
+
+class _LoopCheckingRedis:
+    """Client finto: fallisce se chiamato dal thread dell'event loop."""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = 0
+
+    def _check(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.calls += 1
+            return
+        raise AssertionError("Redis chiamato sull'event loop")
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value
+
+    def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+
+def _approved_content(db) -> Content:
+    owner = User(email="owner@x", username="owner", role="creator")
+    db.add(owner)
+    db.flush()
+
+    content = Content(
+        media_type="video",
+        media_url="https://x/v.mp4",
+        creator_description="demo",
+        owner_id=owner.id,
+        approved=True,
+    )
+    db.add(content)
+    db.commit()
+    return content
+
+
+def test_decorated_router_runs_on_async_session(client, db):
+    assert database.async_engine.url.drivername == "sqlite+aiosqlite"
+    assert inspect.iscoroutinefunction(like_content)
+
+    content = _approved_content(db)
+
+    response = client.post(
+        f"/likes/{content.id}",
+        headers=dev_headers("fan@x"),
+    )
+    assert response.status_code == 201
+    assert response.json()["like_count"] == 1
+
+    again = client.post(f"/likes/{content.id}", headers=dev_headers("fan@x"))
+    assert again.status_code == 400
+
+
+def test_redis_cache_stays_off_the_event_loop(client, db, monkeypatch):
+    redis = _LoopCheckingRedis()
+    monkeypatch.setattr(
+        feed_cache,
+        "feed_cache",
+        RedisCache("feed", redis, ttl=30),
+    )
+    _approved_content(db)
+    build_snapshot(db)
+
+    for _ in range(2):
+        response = client.get(
+            "/contents/feed",
+            headers=dev_headers("reader@x"),
+        )
+        assert response.status_code == 200
+
+    assert redis.calls > 0
@@ -0,0 +1,93 @@
+import pytest
+
+from app.core.security import create_access_token
+from app.models import CreatorVerification, User
+from app.services.auth_cache import auth_user_cache, invalidate_auth_user
+
+from tests.conftest import dev_headers
+
+
+def _bearer(email: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(email)}"}
+
+
+@pytest.fixture
+def admin(db):
+    user = User(email="admin@x", username="admin", role="admin")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def _export(client, headers):
+    return client.get("/admin/export/verifications", headers=headers)
+
+
+def test_auth_fields_are_served_from_the_cache(client, db, admin):
+    headers = _bearer("admin@x")
+    assert _export(client, headers).status_code == 200
+    assert auth_user_cache.get("admin@x")["role"] == "admin"
+
+    # cambio fatto alle spalle della cache: visibile solo dopo il TTL
+    db.query(User).filter(User.id == admin).update({"role": "user"})
+    db.commit()
+    assert _export(client, headers).status_code == 200
+
+    invalidate_auth_user("admin@x")
+    assert _export(client, headers).status_code == 403
+
+
+def test_unknown_subject_is_401(client, admin):
+    response = _export(client, _bearer("ghost@x"))
+
+    assert response.status_code == 401
+    assert auth_user_cache.get("ghost@x") is None
+
+
+def test_inactive_user_is_rejected(client, db, admin):
+    db.query(User).filter(User.id == admin).update({"is_active": False})
+    db.commit()
+
+    assert _export(client, _bearer("admin@x")).status_code == 403
+
+
+def test_profile_handlers_load_the_full_row(client, admin):
+    headers = _bearer("admin@x")
+
+    response = client.patch(
+        "/users/me",
+        json={"display_name": "Admin", "profile_image_url": None},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json()["display_name"] == "Admin"
+    # invalidata dopo il commit: la prossima richiesta rilegge la riga
+    assert auth_user_cache.get("admin@x") is None
+    assert client.get("/users/me", headers=headers).json()["username"] == "admin"
+
+
+def test_creator_review_invalidates_the_creator(client, db, admin):
+    creator = User(email="doc@x", username="doc", is_creator=True)
+    db.add(creator)
+    db.flush()
+    verification = CreatorVerification(
+        user_id=creator.id,
+        category="medico",
+        degree_title="Medicina",
+        identity_document_path="id.pdf",
+        degree_document_path="degree.pdf",
+    )
+    db.add(verification)
+    db.commit()
+
+    assert _export(client, _bearer("doc@x")).status_code == 403
+    assert auth_user_cache.get("doc@x")["is_creator_verified"] is False
+
+    response = client.post(
+        f"/admin/creators/{verification.id}/approve",
+        headers=dev_headers("admin@x", "admin"),
+    )
+
+    assert response.status_code == 200
+    assert auth_user_cache.get("doc@x") is None
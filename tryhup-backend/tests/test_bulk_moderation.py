@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import (
+    Comment,
+    Content,
+    CreatorVerification,
+    Follow,
+    TimelineEntry,
+    User,
+)
+from app.services import bulk_moderation, timeline
+
+from tests.conftest import dev_headers
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+ADMIN = dev_headers("admin@x", "admin")
+
+
+@pytest.fixture
+def catalog(db):
+    admin = User(email="admin@x", username="admin", role="admin")
+    readers = [User(email=f"r{i}@x", username=f"r{i}") for i in range(3)]
+    small = User(email="small@x", username="small", followers_count=2)
+    star = User(email="star@x", username="star", followers_count=3)
+    db.add_all([admin, *readers, small, star])
+    db.flush()
+
+    db.add_all(
+        [Follow(follower_id=r.id, following_id=small.id) for r in readers[:2]]
+        + [Follow(follower_id=r.id, following_id=star.id) for r in readers]
+    )
+
+    ids = []
+    for minute, owner in enumerate([small, star, small, star]):
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/{minute}.mp4",
+            creator_description="demo",
+            owner_id=owner.id,
+            approved=minute == 3,
+            created_at=T0 + timedelta(minutes=minute),
+        )
+        db.add(content)
+        db.flush()
+        ids.append(content.id)
+
+    db.commit()
+    return small.id, star.id, ids
+
+
+def _timeline_inserts(run):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("INSERT INTO TIMELINE"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, statements
+
+
+def test_bulk_approve_reports_per_id_outcomes(client, catalog):
+    _, _, ids = catalog
+
+    response = client.post(
+        "/admin/contents/bulk/approve",
+        json={"ids": [ids[0], ids[3], 999999, ids[0]]},
+        headers=ADMIN,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": [ids[0]],
+        "not_found": [999999],
+        "already_processed": [ids[3]],
+    }
+
+
+def test_bulk_fan_out_is_one_insert_per_batch(db, catalog, monkeypatch):
+    small, star, ids = catalog
+    monkeypatch.setattr(bulk_moderation, "BULK_BATCH_SIZE", 2)
+
+    result, inserts = _timeline_inserts(
+        lambda: bulk_moderation.bulk_approve_contents(db, ids[:3])
+    )
+
+    assert result.updated == ids[:3]
+    assert len(inserts) == 2
+    entries = {
+        (e.content_id, e.owner_id) for e in db.query(TimelineEntry)
+    }
+    assert entries == {(ids[0], small), (ids[1], star), (ids[2], small)}
+    assert db.query(TimelineEntry).count() == 2 + 3 + 2
+
+
+def test_bulk_fan_out_switches_only_creators_over_the_limit(
+    db, catalog, monkeypatch
+):
+    small, star, ids = catalog
+    monkeypatch.setattr(timeline, "TIMELINE_FANOUT_LIMIT", 2)
+
+    bulk_moderation.bulk_approve_contents(db, ids[:3])
+
+    db.expire_all()
+    assert db.get(User, star).fanout_on_read is True
+    assert db.get(User, small).fanout_on_read is False
+    owners = {e.owner_id for e in db.query(TimelineEntry)}
+    assert owners == {small}
+
+
+def test_bulk_comments_from_the_queue(client, db, catalog):
+    _, _, ids = catalog
+    top = Comment(content_id=ids[3], user_id=1, text="top", is_approved=True)
+    db.add(top)
+    db.flush()
+    for minute in range(3):
+        db.add(
+            Comment(
+                content_id=ids[3],
+                user_id=1,
+                text=f"reply {minute}",
+                parent_id=top.id,
+                is_approved=False,
+                created_at=T0 + timedelta(minutes=minute),
+            )
+        )
+    db.commit()
+
+    response = client.post(
+        "/admin/comments/bulk/approve",
+        json={"pending_before": (T0 + timedelta(minutes=2)).isoformat()},
+        headers=ADMIN,
+    )
+
+    assert response.status_code == 200
+    assert len(response.json()["updated"]) == 2
+    db.expire_all()
+    assert db.get(Comment, top.id).reply_count == 2
+
+
+def test_bulk_creator_approval_updates_users(client, db, catalog):
+    small, star, _ = catalog
+    rows = [
+        CreatorVerification(
+            user_id=user_id,
+            category="medico",
+            degree_title="Medicina",
+            identity_document_path="id.pdf",
+            degree_document_path="degree.pdf",
+        )
+        for user_id in (small, star)
+    ]
+    db.add_all(rows)
+    db.commit()
+
+    response = client.post(
+        "/admin/creators/bulk/approve",
+        json={"ids": [rows[0].id]},
+        headers=ADMIN,
+    )
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == [rows[0].id]
+    db.expire_all()
+    assert db.get(User, small).is_creator_verified is True
+    assert db.get(User, star).is_creator_verified is False
+
+
+def test_bulk_request_needs_one_selector(client, catalog):
+    response = client.post(
+        "/admin/contents/bulk/approve",
+        json={},
+        headers=ADMIN,
+    )
+
+    assert response.status_code == 422
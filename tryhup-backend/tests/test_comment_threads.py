@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import Comment, Content, User
+from app.services.comment_threads import load_threads, rebuild_reply_counts
+
+from tests.conftest import dev_headers
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def threads(db):
+    author = User(email="author@x", username="author")
+    db.add(author)
+    db.flush()
+
+    content = Content(
+        media_type="video",
+        media_url="https://x/v.mp4",
+        creator_description="demo",
+        owner_id=author.id,
+        approved=True,
+    )
+    db.add(content)
+    db.flush()
+
+    minute = 0
+
+    def comment(parent=None, approved=True):
+        nonlocal minute
+        minute += 1
+        row = Comment(
+            content_id=content.id,
+            user_id=author.id,
+            text=f"comment {minute}",
+            parent_id=parent.id if parent else None,
+            is_approved=approved,
+            created_at=T0 + timedelta(minutes=minute),
+        )
+        db.add(row)
+        db.flush()
+        return row
+
+    tops = [comment() for _ in range(3)]
+    replies = {top.id: [comment(top) for _ in range(4)] for top in tops}
+    # risposta non approvata: mai mostrata né contata
+    comment(tops[0], approved=False)
+    for top in tops:
+        top.reply_count = 4
+
+    db.commit()
+    return content.id, [t.id for t in tops], {
+        k: [r.id for r in v] for k, v in replies.items()
+    }
+
+
+def _threads(client, content_id, **params):
+    response = client.get(f"/comments/{content_id}/threads", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_threads_page_with_reply_previews(client, threads):
+    content_id, tops, replies = threads
+
+    first = _threads(client, content_id, limit=2, replies=2)
+
+    assert [item["id"] for item in first["items"]] == tops[:2]
+    for item in first["items"]:
+        assert [r["id"] for r in item["replies"]] == replies[item["id"]][:2]
+        assert item["replies_cursor"] is not None
+
+    second = _threads(
+        client, content_id, limit=2, replies=2, cursor=first["next_cursor"]
+    )
+    assert [item["id"] for item in second["items"]] == tops[2:]
+    assert second["next_cursor"] is None
+
+
+def test_load_more_replies_follows_the_thread_cursor(client, threads):
+    content_id, tops, replies = threads
+    thread = _threads(client, content_id, limit=1, replies=2)["items"][0]
+
+    response = client.get(
+        f"/comments/{content_id}/replies/{thread['id']}",
+        params={"cursor": thread["replies_cursor"], "limit": 5},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["id"] for r in body["items"]] == replies[tops[0]][2:]
+    assert body["next_cursor"] is None
+
+
+def test_replies_of_unknown_thread_is_404(client, threads):
+    content_id, _, _ = threads
+
+    response = client.get(f"/comments/{content_id}/replies/999999")
+
+    assert response.status_code == 404
+
+
+def test_threads_load_in_one_query(db, threads):
+    content_id, tops, _ = threads
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        loaded, _ = load_threads(db, content_id, None, limit=3, replies=3)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert [top.id for top, _ in loaded] == tops
+    assert len(statements) == 1
+
+
+def test_reply_updates_reply_count_on_top_level(client, db, threads):
+    content_id, tops, replies = threads
+
+    # risposta a una risposta: finisce nel thread top-level
+    response = client.post(
+        f"/comments/{content_id}",
+        json={"text": "bel video", "parent_id": replies[tops[1]][0]},
+        headers=dev_headers("fan@x"),
+    )
+
+    assert response.status_code == 201
+    assert response.json()["parent_id"] == tops[1]
+    db.expire_all()
+    assert db.get(Comment, tops[1]).reply_count == 5
+
+
+def test_rebuild_reply_counts(db, threads):
+    _, tops, _ = threads
+    db.query(Comment).filter(Comment.id == tops[0]).update({"reply_count": 9})
+    db.commit()
+
+    assert rebuild_reply_counts(db) == 1
+    db.expire_all()
+    assert db.get(Comment, tops[0]).reply_count == 4
@@ -0,0 +1,79 @@
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.models import EmailOutbox
+from app.services import email_outbox
+from app.services.email_outbox import drain_outbox, enqueue_email, sweep_outbox
+
+
+class _Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    inbox = _Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+
+    monkeypatch.setattr(email_outbox, "SMTP_HOST", controller.hostname)
+    monkeypatch.setattr(email_outbox, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(email_outbox, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(email_outbox, "SMTP_USER", None)
+
+    yield inbox
+
+    # le connessioni del pool puntano a questo server
+    while email_outbox.smtp_pool.idle_count:
+        email_outbox.smtp_pool.discard(email_outbox.smtp_pool.acquire())
+    controller.stop()
+
+
+def test_drain_outbox_sends_and_clears_body(smtp_server, db):
+    for i in range(3):
+        enqueue_email(db, f"user{i}@x", "Codice", f"Il tuo codice: 12345{i}")
+    db.commit()
+
+    assert drain_outbox() == 3
+
+    assert sorted(m.rcpt_tos[0] for m in smtp_server.messages) == [
+        "user0@x", "user1@x", "user2@x",
+    ]
+    assert any(b"123450" in m.content for m in smtp_server.messages)
+
+    rows = db.query(EmailOutbox).all()
+    assert {row.status for row in rows} == {"sent"}
+    assert all(row.body is None for row in rows)
+    assert all(row.sent_at is not None for row in rows)
+
+
+def test_sweep_outbox_keeps_pending_messages(db):
+    old = datetime.now(timezone.utc) - timedelta(
+        seconds=email_outbox.EMAIL_RETENTION + 60
+    )
+    db.add_all([
+        EmailOutbox(to_address="a@x", subject="s", status="sent",
+                    next_attempt_at=old),
+        EmailOutbox(to_address="b@x", subject="s", status="failed",
+                    next_attempt_at=old),
+        EmailOutbox(to_address="c@x", subject="s", body="b",
+                    next_attempt_at=old),
+    ])
+    db.commit()
+
+    assert sweep_outbox() == 2
+    assert [row.to_address for row in db.query(EmailOutbox)] == ["c@x"]
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.pagination import encode_cursor
+from app.models import Content, Follow, User
+from app.services.discover import build_snapshot
+from app.services.timeline import rebuild_timelines
+
+from tests.conftest import dev_headers
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def feed_world(db):
+    """reader segue `followed` (5 contenuti), `other` ne ha 4 in discover."""
+
+    reader = User(email="reader@x", username="reader")
+    followed = User(email="followed@x", username="followed", role="creator")
+    other = User(email="other@x", username="other", role="creator")
+    db.add_all([reader, followed, other])
+    db.flush()
+
+    db.add(Follow(follower_id=reader.id, following_id=followed.id))
+
+    following_ids = []
+    for i in range(5):
+        # due contenuti per minuto: il keyset deve distinguere per id
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/f{i}.mp4",
+            creator_description="followed",
+            owner_id=followed.id,
+            approved=True,
+            created_at=T0 + timedelta(minutes=i // 2),
+        )
+        db.add(content)
+        db.flush()
+        following_ids.append((i // 2, content.id))
+
+    discover_ids = []
+    for i in range(4):
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/o{i}.mp4",
+            creator_description="other",
+            owner_id=other.id,
+            approved=True,
+            growth_index=i % 2,
+        )
+        db.add(content)
+        db.flush()
+        discover_ids.append(content.id)
+
+    db.commit()
+    rebuild_timelines(db)
+    build_snapshot(db)
+
+    # ordine del feed following: (created_at, id) decrescenti
+    return {
+        "following": [i for _, i in sorted(following_ids, reverse=True)],
+        "discover": set(discover_ids),
+    }
+
+
+def _get(client, **params):
+    return client.get(
+        "/contents/feed",
+        params=params,
+        headers=dev_headers("reader@x"),
+    )
+
+
+def _walk(client, limit, **params):
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, limit=limit)
+        if cursor:
+            query["cursor"] = cursor
+        response = _get(client, **query)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        pages.append(body)
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+        assert len(pages) < 20
+
+
+def test_cursor_walk_hands_off_from_following_to_discover(client, feed_world):
+    pages = _walk(client, limit=2)
+    ids = [item["id"] for page in pages for item in page["items"]]
+
+    assert ids[:5] == feed_world["following"]
+    assert set(ids[5:]) == feed_world["discover"]
+    assert len(ids) == len(set(ids))
+
+    # l'ultima pagina following passa il testimone a discover
+    assert [len(page["items"]) for page in pages[:3]] == [2, 2, 1]
+
+
+def test_next_cursor_ends_at_the_last_page(client, feed_world):
+    pages = _walk(client, limit=50)
+
+    assert len(pages) == 2
+    assert pages[-1]["next_cursor"] is None
+    assert len(pages[-1]["items"]) == 4
+
+
+def test_include_total_false_skips_the_count(client, feed_world):
+    with_total = _get(client, limit=2).json()
+    without_total = _get(client, limit=2, include_total=False).json()
+
+    assert with_total["total"] == 5
+    assert without_total["total"] is None
+    assert without_total["items"] == with_total["items"]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        encode_cursor({"m": "sideways"}),
+        encode_cursor({"m": "following", "k": ["yesterday", 1]}),
+        encode_cursor({"m": "following", "k": [1]}),
+        encode_cursor({"m": "discover", "p": "x"}),
+        # JSON valido ma non un oggetto
+        "WzEsMl0",
+    ],
+)
+def test_invalid_cursor_is_rejected(client, feed_world, cursor):
+    assert _get(client, cursor=cursor).status_code == 400
+
+
+def test_cursor_pages_match_offset_pages(client, feed_world):
+    cursor_pages = _walk(client, limit=2)
+
+    for number, page in enumerate(cursor_pages[:3]):
+        by_offset = _get(client, limit=2, offset=number * 2).json()
+        assert [i["id"] for i in by_offset["items"]] == [
+            i["id"] for i in page["items"]
+        ]
+        assert by_offset["offset"] == number * 2
+        # dal secondo giro in poi la pagina viene dal cursore
+        assert page["offset"] == (0 if number == 0 else None)
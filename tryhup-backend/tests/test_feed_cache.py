@@ -0,0 +1,102 @@
+import pytest
+
+from app.core import cache
+from app.core.cache import RedisCache
+from app.models import Content, Follow, User
+from app.services import feed_cache
+
+from tests.conftest import dev_headers
+from tests.redis_stub import StubRedis
+
+
+@pytest.fixture
+def audience(db):
+    owner = User(email="owner@x", username="owner", role="creator")
+    follower = User(email="follower@x", username="follower")
+    stranger = User(email="stranger@x", username="stranger")
+    admin = User(email="admin@x", username="admin", role="admin")
+    db.add_all([owner, follower, stranger, admin])
+    db.flush()
+
+    db.add(Follow(follower_id=follower.id, following_id=owner.id))
+
+    contents = []
+    for index in range(2):
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/{index}.mp4",
+            creator_description="demo",
+            owner_id=owner.id,
+        )
+        db.add(content)
+        db.flush()
+        contents.append(content.id)
+
+    db.commit()
+    return follower.id, stranger.id, contents
+
+
+def _key(user_id):
+    return feed_cache.feed_key(user_id, None, 20, 0, True)
+
+
+def test_approval_invalidates_only_followers(client, audience):
+    follower, stranger, contents = audience
+    before = {user_id: _key(user_id) for user_id in (follower, stranger)}
+
+    response = client.post(
+        f"/admin/contents/{contents[0]}/approve",
+        headers=dev_headers("admin@x", "admin"),
+    )
+    assert response.status_code == 200
+
+    assert _key(follower) != before[follower]
+    assert _key(stranger) == before[stranger]
+
+
+def test_bulk_approval_invalidates_only_followers(client, audience):
+    follower, stranger, contents = audience
+    before = {user_id: _key(user_id) for user_id in (follower, stranger)}
+
+    response = client.post(
+        "/admin/contents/bulk/approve",
+        json={"ids": contents},
+        headers=dev_headers("admin@x", "admin"),
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == contents
+
+    assert _key(follower) != before[follower]
+    assert _key(stranger) == before[stranger]
+
+
+def test_invalidation_is_shared_across_workers(monkeypatch):
+    server = StubRedis()
+    worker_a = RedisCache("feed", server, ttl=30)
+    worker_b = RedisCache("feed", server, ttl=30)
+
+    monkeypatch.setattr(feed_cache, "feed_cache", worker_a)
+    key = _key(1)
+    feed_cache.store_feed(key, {"items": [1, 2]})
+
+    # l'altro worker legge la stessa pagina e la invalida
+    monkeypatch.setattr(feed_cache, "feed_cache", worker_b)
+    assert _key(1) == key
+    assert feed_cache.get_feed(key) == {"items": [1, 2]}
+    feed_cache.invalidate_user(1)
+
+    monkeypatch.setattr(feed_cache, "feed_cache", worker_a)
+    assert _key(1) != key
+
+
+def test_shared_backend_depends_on_workers(monkeypatch):
+    monkeypatch.setattr(cache, "WEB_CONCURRENCY", 1)
+    assert cache.shared_backend("feed", None) == "memory"
+    assert cache.shared_backend("feed", "memory") == "memory"
+
+    monkeypatch.setattr(cache, "WEB_CONCURRENCY", 4)
+    assert cache.shared_backend("feed", None) == "redis"
+    assert cache.shared_backend("feed", "redis") == "redis"
+
+    with pytest.raises(RuntimeError):
+        cache.shared_backend("feed", "memory")
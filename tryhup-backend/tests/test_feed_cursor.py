@@ -0,0 +1,32 @@
+import pytest
+
+from app.core.pagination import encode_cursor
+from app.services.discover import build_snapshot
+
+from tests.conftest import dev_headers
+
+
+@pytest.mark.parametrize("version", [[1], {"a": 1}, "latest"])
+def test_malformed_discover_version_is_rejected(client, version):
+    cursor = encode_cursor({"m": "discover", "v": version, "p": 0})
+
+    response = client.get(
+        "/contents/feed",
+        params={"cursor": cursor},
+        headers=dev_headers("reader@x"),
+    )
+
+    assert response.status_code == 400
+
+
+def test_discover_cursor_without_version(client, db):
+    build_snapshot(db)
+    cursor = encode_cursor({"m": "discover", "p": 0})
+
+    response = client.get(
+        "/contents/feed",
+        params={"cursor": cursor},
+        headers=dev_headers("reader@x"),
+    )
+
+    assert response.status_code == 200
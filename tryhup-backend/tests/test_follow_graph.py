@@ -0,0 +1,32 @@
+from app.models import Follow, User
+from app.services import follow_graph as graph_module
+from app.services.follow_graph import FollowGraphIndex
+
+
+def test_events_during_first_load_are_kept(db, monkeypatch):
+    monkeypatch.setattr(graph_module, "FOLLOW_GRAPH_ENABLED", True)
+
+    users = [User(email=f"u{i}@x", username=f"user{i}") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    a, b, c = (user.id for user in users)
+
+    db.add(Follow(follower_id=a, following_id=b))
+    db.commit()
+
+    index = FollowGraphIndex()
+    real_load = graph_module.load_graph
+
+    def load_then_follow(session):
+        graph = real_load(session)
+        # committato dopo la lettura, prima che lo snapshot sia pronto
+        index.on_follow(c, b)
+        index.on_unfollow(a, b)
+        return graph
+
+    monkeypatch.setattr(graph_module, "load_graph", load_then_follow)
+    index.reload(db)
+
+    assert index.is_following(c, b)
+    assert not index.is_following(a, b)
+    assert index.followers(b).tolist() == [c]
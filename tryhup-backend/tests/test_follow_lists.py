@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.models import Follow, User
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def audience(db):
+    star = User(email="star@x", username="star")
+    fans = [
+        User(email=f"fan{i}@x", username=f"fan{i}", display_name=f"Fan {i}")
+        for i in range(5)
+    ]
+    db.add_all([star, *fans])
+    db.flush()
+
+    for minute, fan in enumerate(fans):
+        db.add(
+            Follow(
+                follower_id=fan.id,
+                following_id=star.id,
+                created_at=T0 + timedelta(minutes=minute),
+            )
+        )
+    db.add(Follow(follower_id=star.id, following_id=fans[0].id))
+    db.commit()
+    return star.id, [fan.id for fan in fans]
+
+
+def _get(client, path, **params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    return response
+
+
+def test_followers_newest_first_with_cursor(client, audience):
+    star, fans = audience
+
+    first = _get(client, f"/follows/{star}/followers", limit=3).json()
+    second = _get(
+        client,
+        f"/follows/{star}/followers",
+        limit=3,
+        cursor=first["next_cursor"],
+    ).json()
+
+    ids = [u["id"] for u in first["items"] + second["items"]]
+    assert ids == fans[::-1]
+    assert second["next_cursor"] is None
+
+
+def test_items_are_the_public_projection(client, audience):
+    star, fans = audience
+
+    item = _get(client, f"/follows/{star}/following").json()["items"][0]
+
+    assert item["id"] == fans[0]
+    assert item["display_name"] == "Fan 0"
+    assert "email" not in item
+
+
+def test_legacy_list_keeps_the_bare_list(client, audience):
+    star, fans = audience
+
+    response = _get(
+        client,
+        f"/follows/{star}/followers",
+        limit=3,
+        legacy_list="true",
+    )
+
+    assert [u["id"] for u in response.json()] == fans[:1:-1]
+    next_page = _get(
+        client,
+        f"/follows/{star}/followers",
+        cursor=response.headers["X-Next-Cursor"],
+        legacy_list="true",
+    )
+    assert [u["id"] for u in next_page.json()] == fans[1::-1]
+    assert "X-Next-Cursor" not in next_page.headers
+
+
+def test_unknown_user_is_404(client, audience):
+    response = client.get("/follows/999999/followers")
+
+    assert response.status_code == 404
+
+
+def test_only_the_projected_columns_are_fetched(db, client, audience):
+    star, _ = audience
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if "JOIN follows" in statement:
+            statements.append(statement)
+
+    # con DB_ASYNC l'handler passa dall'engine async
+    target = (
+        database.async_engine.sync_engine
+        if database.DB_ASYNC
+        else database.engine
+    )
+
+    event.listen(target, "before_cursor_execute", record)
+    try:
+        _get(client, f"/follows/{star}/followers")
+    finally:
+        event.remove(target, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    selected = statements[0].split("FROM")[0]
+    assert "users.email" not in selected
+    assert "users.bio_description" not in selected
+    assert "users.username" in selected
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from app.models import Comment, Content, JobCheckpoint, Like, User
+from app.services import counters, growth
+from app.services.counters import MemoryCounterStore, flush_counters
+
+from tests.conftest import dev_headers
+
+
+@pytest.fixture(autouse=True)
+def empty_buffers():
+    for counter in counters.COUNTERS.values():
+        counter.store = MemoryCounterStore(counter.name)
+    yield
+
+
+@pytest.fixture
+def world(db):
+    owner = User(email="owner@x", username="owner", role="creator")
+    fan = User(email="fan@x", username="fan")
+    admin = User(email="admin@x", username="admin", role="admin")
+    db.add_all([owner, fan, admin])
+    db.flush()
+
+    contents = []
+    for index in range(3):
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/{index}.mp4",
+            creator_description="demo",
+            owner_id=owner.id,
+            approved=True,
+        )
+        db.add(content)
+        db.flush()
+        contents.append(content.id)
+
+    db.commit()
+    return fan, contents
+
+
+def _percentages(db, ids):
+    db.expire_all()
+    return [db.get(Content, i).growth_percentage for i in ids]
+
+
+def _touched(db):
+    checkpoint = db.get(JobCheckpoint, growth.GROWTH_JOB_NAME)
+    return [
+        i
+        for chunk in growth._touched_ids(db, checkpoint.last_run_at)
+        for i in chunk
+    ]
+
+
+def test_compute_growth_is_vectorised_and_bounded():
+    index, percentage = growth.compute_growth(
+        np.array([0.0, 5.0]),
+        np.array([0, 10_000]),
+        np.array([0, 10_000]),
+        np.array([0, 10_000]),
+    )
+
+    assert percentage.tolist() == [0, 100]
+    assert index.tolist() == [1, 4]
+
+
+def test_full_run_writes_only_changed_rows(db, world):
+    _, contents = world
+
+    assert growth.recompute_growth_scores(db) == len(contents)
+    assert _percentages(db, contents) == [0, 0, 0]
+
+    assert growth.recompute_growth_scores(db) == 0
+    # la scrittura dei punteggi non conta come attività
+    assert _touched(db) == []
+
+
+def test_incremental_sees_comments_approved_later(client, db, world):
+    fan, contents = world
+    comment = Comment(content_id=contents[1], user_id=fan.id, text="ciao")
+    db.add(comment)
+    db.commit()
+
+    growth.recompute_growth_scores(db)
+
+    response = client.patch(
+        f"/admin/comments/{comment.id}/approve",
+        headers=dev_headers("admin@x", "admin"),
+    )
+    assert response.status_code == 200
+
+    assert _touched(db) == [contents[1]]
+    assert growth.recompute_growth_scores(db, incremental=True) == 1
+    assert _percentages(db, contents)[1] > 0
+
+
+def test_incremental_sees_unlikes_after_flush(db, world):
+    fan, contents = world
+    db.add(Like(user_id=fan.id, content_id=contents[2]))
+    db.commit()
+    counters.like_counter.add(contents[2], 1)
+    flush_counters()
+
+    growth.recompute_growth_scores(db)
+    assert _percentages(db, contents)[2] > 0
+
+    db.query(Like).delete()
+    db.commit()
+    counters.like_counter.add(contents[2], -1)
+    flush_counters()
+
+    assert _touched(db) == [contents[2]]
+    assert growth.recompute_growth_scores(db, incremental=True) == 1
+    assert _percentages(db, contents)[2] == 0
+
+
+def test_periodic_run_is_claimed_once(world):
+    assert growth._run(incremental=False) == len(world[1])
+    # un secondo worker nello stesso intervallo salta il giro
+    assert growth._run(incremental=False) == 0
@@ -0,0 +1,64 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.core import security
+from app.core.security import (
+    create_access_token,
+    decode_access_token,
+    verified_tokens,
+)
+
+
+@pytest.fixture
+def verifications(monkeypatch):
+    calls = []
+    verify = security._verify_token
+
+    def counting(token):
+        calls.append(token)
+        return verify(token)
+
+    monkeypatch.setattr(security, "_verify_token", counting)
+    return calls
+
+
+def test_repeat_tokens_skip_signature_checks(verifications):
+    token = create_access_token("fan@x")
+
+    assert decode_access_token(token) == "fan@x"
+    assert decode_access_token(token) == "fan@x"
+
+    assert verifications == [token]
+
+
+def test_cache_key_is_a_digest_not_the_token(verifications):
+    token = create_access_token("fan@x")
+    decode_access_token(token)
+
+    assert verified_tokens.get(token) is None
+    assert verified_tokens.get(security._token_key(token))[0] == "fan@x"
+
+
+def test_invalid_tokens_are_not_cached(verifications):
+    token = create_access_token("fan@x")[:-2] + "xx"
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            decode_access_token(token)
+
+    assert len(verifications) == 2
+
+
+def test_cached_token_is_rejected_after_exp(verifications, monkeypatch):
+    token = create_access_token("fan@x", timedelta(minutes=5))
+    decode_access_token(token)
+
+    later = time.time() + 6 * 60
+    monkeypatch.setattr(security.time, "time", lambda: later)
+
+    with pytest.raises(ValueError):
+        decode_access_token(token)
+    assert verifications == [token]
+    assert verified_tokens.get(security._token_key(token)) is None
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import EmailOutbox, LoginCode
+from app.services import login_codes
+from app.services.login_codes import issue_login_code, sweep_expired_codes
+
+
+def _request_code(client, email="fan@x"):
+    response = client.post("/auth/request-code", json={"email": email})
+    assert response.status_code == 200
+
+
+def _open_codes(db, email="fan@x"):
+    return (
+        db.query(LoginCode)
+        .filter(LoginCode.email == email, LoginCode.used.is_(False))
+        .all()
+    )
+
+
+def test_request_code_keeps_one_open_code(client, db):
+    _request_code(client)
+    _request_code(client)
+
+    codes = _open_codes(db)
+    assert len(codes) == 1
+    assert db.query(LoginCode).count() == 2
+    assert db.query(EmailOutbox).count() == 2
+
+
+def test_issue_does_not_commit(db):
+    issue_login_code(db, "fan@x")
+    db.rollback()
+
+    assert db.query(LoginCode).count() == 0
+
+
+def test_verify_accepts_only_the_latest_code(client, monkeypatch):
+    codes = iter([11111, 22222])
+    monkeypatch.setattr(
+        login_codes.secrets, "randbelow", lambda _: next(codes)
+    )
+    _request_code(client)
+    _request_code(client)
+    old, latest = "111111", "122222"
+
+    response = client.post(
+        "/auth/verify-code",
+        json={"email": "fan@x", "code": old},
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/auth/verify-code",
+        json={"email": "fan@x", "code": latest},
+    )
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    # monouso
+    response = client.post(
+        "/auth/verify-code",
+        json={"email": "fan@x", "code": latest},
+    )
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def aged_codes(db):
+    now = datetime.now(timezone.utc)
+    ages = [-5, 30, 120, 180, 240]  # minuti passati dalla scadenza
+    db.add_all(
+        LoginCode(
+            email=f"u{index}@x",
+            code="123456",
+            expires_at=now - timedelta(minutes=age),
+            used=age > 0,
+        )
+        for index, age in enumerate(ages)
+    )
+    db.commit()
+
+
+def test_sweeper_deletes_only_codes_past_retention(db, aged_codes):
+    assert sweep_expired_codes() == 3
+
+    left = sorted(code.email for code in db.query(LoginCode))
+    assert left == ["u0@x", "u1@x"]
+
+
+def test_sweeper_works_in_bounded_batches(db, aged_codes, monkeypatch):
+    monkeypatch.setattr(login_codes, "LOGIN_CODE_SWEEP_BATCH", 2)
+    deletes = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("DELETE"):
+            deletes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert sweep_expired_codes() == 3
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(deletes) == 2
+
+
+def test_sweeper_stops_after_max_batches(db, aged_codes, monkeypatch):
+    monkeypatch.setattr(login_codes, "LOGIN_CODE_SWEEP_BATCH", 1)
+    monkeypatch.setattr(login_codes, "LOGIN_CODE_SWEEP_MAX_BATCHES", 2)
+
+    assert sweep_expired_codes() == 2
+    assert db.query(LoginCode).count() == 3
@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services import moderation
+from app.services.moderation_model import ToxicityModel, hash_ngrams, train
+
+TEXTS = [
+    "sei proprio uno scemo",
+    "che scemo che sei",
+    "video bellissimo complimenti",
+    "grazie per il video",
+] * 5
+LABELS = np.array([1, 1, 0, 0] * 5)
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    path = tmp_path / "toxicity.npy"
+    np.save(path, train(TEXTS, LABELS, bits=12, epochs=100))
+    return path
+
+
+@pytest.fixture
+def with_model(monkeypatch, model_file):
+    monkeypatch.setattr(moderation, "MODERATION_MODEL_PATH", str(model_file))
+    monkeypatch.setattr(moderation, "_model", None)
+    monkeypatch.setattr(moderation, "_model_signature", None)
+    monkeypatch.setattr(moderation, "_model_checked_at", 0.0)
+    return model_file
+
+
+def test_batch_hashing_matches_one_text_at_a_time():
+    texts = ["ciao", "", "ciao mondo"]
+    bucket, doc, counts = hash_ngrams(texts, 10)
+
+    for index, text in enumerate(texts):
+        single_bucket, _, single_counts = hash_ngrams([text], 10)
+        assert counts[index] == single_counts[0]
+        assert sorted(bucket[doc == index]) == sorted(single_bucket)
+
+
+def test_predict_separates_the_training_classes(model_file):
+    model = ToxicityModel(model_file)
+
+    scores = model.predict(["sei uno scemo", "bellissimo video"])
+
+    assert scores[0] > 0.5 > scores[1]
+    assert model.predict([]).size == 0
+
+
+def test_weights_are_memory_mapped(model_file):
+    model = ToxicityModel(model_file)
+
+    assert isinstance(model.weights, np.memmap)
+    assert model.bits == 12
+
+
+def test_invalid_model_size_is_rejected(tmp_path):
+    path = tmp_path / "bad.npy"
+    np.save(path, np.zeros(100, dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        ToxicityModel(path)
+
+
+def test_model_is_optional(monkeypatch):
+    monkeypatch.setattr(moderation, "MODERATION_MODEL_PATH", "")
+
+    assert moderation.get_model() is None
+
+
+def test_model_loads_lazily_and_follows_new_builds(with_model, monkeypatch):
+    monkeypatch.setattr(moderation, "MODERATION_MODEL_RELOAD_INTERVAL", 0)
+
+    first = moderation.get_model()
+    assert first is moderation.get_model()
+
+    np.save(with_model, train(TEXTS, 1 - LABELS, bits=12, epochs=5))
+    stat = with_model.stat()
+    os.utime(with_model, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    second = moderation.get_model()
+    assert second is not first
+    assert second.version != first.version
+
+
+def test_model_verdict_uses_the_shared_contract(with_model):
+    # "scemo" non è nelle regole: lo segnala solo il classificatore
+    rules = moderation.moderation_engine.rules()
+    assert rules.match("che scemo che sei") is None
+
+    verdicts = moderation.moderate_comments(
+        ["che scemo che sei", "grazie per il video"]
+    )
+
+    assert [(v["is_approved"], v["is_flagged"]) for v in verdicts] == [
+        (False, True),
+        (True, False),
+    ]
+    assert "|toxicity.npy@" in moderation.moderation_version()
@@ -0,0 +1,106 @@
+import pytest
+
+from app.models import Comment, Content, User
+from app.routers import comments as comments_router
+from app.services import moderation_queue
+
+from tests.conftest import dev_headers
+
+
+@pytest.fixture
+def content(db):
+    owner = User(email="owner@x", username="owner", role="creator")
+    admin = User(email="admin@x", username="admin", role="admin")
+    db.add_all([owner, admin])
+    db.flush()
+
+    row = Content(
+        media_type="video",
+        media_url="https://x/v.mp4",
+        creator_description="demo",
+        owner_id=owner.id,
+        approved=True,
+    )
+    db.add(row)
+    db.commit()
+    return row.id
+
+
+@pytest.fixture
+def async_moderation(monkeypatch):
+    wakeups = []
+    monkeypatch.setattr(comments_router, "MODERATION_ASYNC", True)
+    monkeypatch.setattr(
+        moderation_queue.moderation_task,
+        "wake",
+        lambda: wakeups.append(True),
+    )
+    return wakeups
+
+
+def _post(client, content_id, text, parent_id=None):
+    response = client.post(
+        f"/comments/{content_id}",
+        json={"text": text, "parent_id": parent_id},
+        headers=dev_headers("fan@x"),
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_comment_is_queued_and_wakes_the_worker(
+    client, content, async_moderation
+):
+    body = _post(client, content, "che bel video")
+
+    assert body["moderation_pending"] is True
+    assert body["is_approved"] is False
+    assert body["moderation_note"] == moderation_queue.PENDING_NOTE
+    assert async_moderation == [True]
+
+
+def test_drain_writes_verdicts_and_reply_counts(
+    client, db, content, async_moderation
+):
+    top = _post(client, content, "che bel video")
+    moderation_queue.drain_queue()
+
+    _post(client, content, "concordo", parent_id=top["id"])
+    _post(client, content, "sei un idiota", parent_id=top["id"])
+
+    assert moderation_queue.drain_queue() == 2
+
+    db.expire_all()
+    rows = db.query(Comment).order_by(Comment.id).all()
+    assert [(c.is_approved, c.is_flagged, c.moderation_pending) for c in rows] == [
+        (True, False, False),
+        (True, False, False),
+        (False, True, False),
+    ]
+    # solo la risposta approvata conta nel thread
+    assert rows[0].reply_count == 1
+
+
+def test_drain_is_batched(client, db, content, async_moderation, monkeypatch):
+    monkeypatch.setattr(moderation_queue, "MODERATION_BATCH_SIZE", 2)
+    batches = moderation_queue.metrics.batches
+    for index in range(5):
+        _post(client, content, f"commento {index}")
+
+    assert moderation_queue.drain_queue() == 5
+    assert moderation_queue.metrics.batches - batches == 3
+    assert db.query(Comment).filter(Comment.moderation_pending).count() == 0
+
+
+def test_queue_stats(client, content, async_moderation):
+    _post(client, content, "che bel video")
+
+    response = client.get(
+        "/admin/comments/moderation/stats",
+        headers=dev_headers("admin@x", "admin"),
+    )
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["queue_depth"] == 1
+    assert stats["lag_seconds"] >= 0
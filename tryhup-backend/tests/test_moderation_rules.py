@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from app.services.moderation import (
+    ModerationEngine,
+    RuleSet,
+    load_rules,
+    moderate_comment,
+    normalize_text,
+)
+
+
+def _match(rules: RuleSet, text: str):
+    return rules.match(normalize_text(text))
+
+
+def _write(path, version, *terms):
+    path.write_text(
+        "\n".join([f"# version: {version}", *terms]) + "\n",
+        encoding="utf-8",
+    )
+
+
+def test_terms_match_whole_words_only():
+    rules = RuleSet("t", ["hate", "idiot*", "shut up"])
+
+    assert _match(rules, "I HATE this") == "hate"
+    assert _match(rules, "whatever you say") is None
+    assert _match(rules, "what an idiotic take") == "idiotic"
+    assert _match(rules, "please shut    up") == "shut    up"
+    assert _match(rules, "shutter up") is None
+
+
+def test_large_rule_sets_still_match_exactly():
+    terms = [f"term{i:05d}" for i in range(20_000)]
+    rules = RuleSet("t", terms)
+
+    assert _match(rules, "ciao term19999 ciao") == "term19999"
+    assert _match(rules, "term199990") is None
+
+
+def test_rule_files_are_merged_and_versioned(tmp_path):
+    _write(tmp_path / "en.txt", "3", "Hate", "# commento", "")
+    _write(tmp_path / "it.txt", "7", "odio", "hate")
+
+    rules = load_rules(tmp_path)
+
+    assert rules.terms == ["hate", "odio"]
+    assert rules.version.startswith("en@3+it@7:")
+
+
+def test_engine_hot_reloads_changed_files(tmp_path):
+    rule_file = tmp_path / "en.txt"
+    _write(rule_file, "1", "hate")
+    engine = ModerationEngine(tmp_path, reload_interval=0)
+    first = engine.rules()
+
+    _write(rule_file, "2", "hate", "spam")
+    # mtime a risoluzione grossolana su alcuni filesystem
+    stat = rule_file.stat()
+    os.utime(rule_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    second = engine.rules()
+    assert second is not first
+    assert second.version != first.version
+    assert _match(second, "buy spam") == "spam"
+
+
+def test_engine_keeps_previous_rules_when_reload_fails(tmp_path):
+    rule_file = tmp_path / "en.txt"
+    _write(rule_file, "1", "hate")
+    engine = ModerationEngine(tmp_path, reload_interval=0)
+    rules = engine.rules()
+
+    rule_file.write_bytes(b"\xff\xfe not utf-8")
+
+    assert engine.reload(force=True) is rules
+
+
+def test_first_load_errors_are_not_swallowed(tmp_path):
+    engine = ModerationEngine(tmp_path / "missing", reload_interval=0)
+
+    # nessun file: nessuna regola, nessun errore
+    assert engine.rules().pattern is None
+
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    (broken / "en.txt").write_bytes(b"\xff\xfe")
+    with pytest.raises(UnicodeDecodeError):
+        ModerationEngine(broken, reload_interval=0).rules()
+
+
+def test_moderate_comment_contract():
+    assert moderate_comment("che bel video") == {
+        "is_approved": True,
+        "is_flagged": False,
+        "score": 0,
+        "note": "Clean comment",
+    }
+    verdict = moderate_comment("sei un idiota")
+    assert (verdict["is_approved"], verdict["is_flagged"]) == (False, True)
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import approximate_count, keyset_page
+from app.models import Comment, Content, CreatorVerification, User
+
+from tests.conftest import dev_headers
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def contents(db):
+    owner = User(email="owner@x", username="owner", role="creator")
+    admin = User(email="admin@x", username="admin", role="admin")
+    db.add_all([owner, admin])
+    db.flush()
+
+    rows = []
+    for index in range(5):
+        row = Content(
+            media_type="video",
+            media_url=f"https://x/{index}.mp4",
+            creator_description="demo",
+            owner_id=owner.id,
+            approved=index % 2 == 0,
+            # due righe con lo stesso created_at: decide l'id
+            created_at=T0 + timedelta(minutes=min(index, 3)),
+        )
+        db.add(row)
+        rows.append(row)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def _walk(db, limit, descending=True):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(
+            db.query(Content),
+            Content.created_at,
+            Content.id,
+            cursor=cursor,
+            limit=limit,
+            descending=descending,
+        )
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_newest_first(db, contents):
+    pages = _walk(db, limit=2)
+
+    assert pages == [
+        contents[:2:-1],
+        contents[2:0:-1],
+        contents[:1],
+    ]
+
+
+def test_keyset_pages_oldest_first(db, contents):
+    pages = _walk(db, limit=3, descending=False)
+
+    assert pages == [contents[:3], contents[3:]]
+
+
+def test_invalid_cursor_is_400(db, contents):
+    for cursor in ("%%%", "bm90LWpzb24", "eyJrIjpbXX0"):
+        with pytest.raises(HTTPException) as error:
+            keyset_page(
+                db.query(Content),
+                Content.created_at,
+                Content.id,
+                cursor=cursor,
+                limit=2,
+            )
+        assert error.value.status_code == 400
+
+
+def test_approximate_count_is_exact_off_postgres(db, contents):
+    query = db.query(Content).filter(Content.approved.is_(True))
+
+    assert approximate_count(db, query) == 3
+
+
+def test_approximate_count_reads_the_planner_estimate(db, contents):
+    from sqlalchemy.dialects import postgresql
+
+    executed = []
+
+    class PlannerDB:
+        def get_bind(self):
+            return SimpleNamespace(dialect=postgresql.dialect())
+
+        def execute(self, statement):
+            executed.append(str(statement))
+            plan = '[{"Plan": {"Plan Rows": 1234567}}]'
+            return SimpleNamespace(scalar=lambda: plan)
+
+    query = db.query(Content).filter(Content.approved.is_(True))
+
+    assert approximate_count(PlannerDB(), query.order_by(Content.id)) == 1234567
+    assert executed[0].startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "ORDER BY" not in executed[0]
+
+
+def test_admin_contents_page_and_legacy_list(client, contents):
+    headers = dev_headers("admin@x", "admin")
+
+    page = client.get("/admin/contents", params={"limit": 2}, headers=headers)
+    assert page.status_code == 200
+    body = page.json()
+    assert [item["id"] for item in body["items"]] == contents[:2:-1]
+    assert body["approximate_total"] == 5
+
+    legacy = client.get(
+        "/admin/contents",
+        params={"limit": 2, "legacy_list": "true"},
+        headers=headers,
+    )
+    assert legacy.status_code == 200
+    assert [item["id"] for item in legacy.json()] == contents[:2:-1]
+    assert legacy.headers["X-Next-Cursor"] == body["next_cursor"]
+    assert legacy.headers["X-Approximate-Total"] == "5"
+
+
+def test_admin_comments_legacy_list(client, db, contents):
+    db.add(
+        Comment(
+            content_id=contents[0],
+            user_id=1,
+            text="da rivedere",
+            is_approved=False,
+        )
+    )
+    db.commit()
+
+    response = client.get(
+        "/admin/comments",
+        params={"legacy_list": "true"},
+        headers=dev_headers("admin@x", "admin"),
+    )
+
+    assert response.status_code == 200
+    assert [c["text"] for c in response.json()] == ["da rivedere"]
+    assert "X-Next-Cursor" not in response.headers
+    assert response.headers["X-Approximate-Total"] == "1"
+
+
+def test_creator_requests_page_is_fifo(client, db, contents):
+    for index in range(3):
+        user = User(email=f"c{index}@x", username=f"c{index}")
+        db.add(user)
+        db.flush()
+        db.add(
+            CreatorVerification(
+                user_id=user.id,
+                category="medico",
+                degree_title="Medicina",
+                identity_document_path="id.pdf",
+                degree_document_path="degree.pdf",
+                created_at=T0 + timedelta(minutes=index),
+            )
+        )
+    db.commit()
+    headers = dev_headers("admin@x", "admin")
+
+    first = client.get(
+        "/admin/creators", params={"limit": 2}, headers=headers
+    ).json()
+    second = client.get(
+        "/admin/creators",
+        params={"limit": 2, "cursor": first["next_cursor"]},
+        headers=headers,
+    ).json()
+
+    assert [r["degree_title"] for r in first["items"]] == ["Medicina"] * 2
+    ids = [r["id"] for r in first["items"] + second["items"]]
+    assert ids == sorted(ids)
+    assert second["next_cursor"] is None
+    assert first["approximate_total"] == 3
@@ -0,0 +1,118 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import rate_limit
+from app.core.rate_limit import (
+    MemoryLimiter,
+    client_subject,
+    parse_rate,
+)
+from app.core.security import create_access_token
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(rate_limit, "limiter", MemoryLimiter(100))
+
+    app = FastAPI()
+
+    @app.get(
+        "/limited",
+        dependencies=[
+            rate_limit.rate_limit("test", "2/minute", key=client_subject),
+        ],
+    )
+    def limited_route():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_parse_rate():
+    rate = parse_rate("5/minute")
+    assert (rate.capacity, rate.period) == (5, 60)
+    assert parse_rate("10/600").period == 600
+    assert parse_rate("none") is None
+
+
+def test_bucket_refills_over_time(clock):
+    limiter = MemoryLimiter(100)
+    rate = parse_rate("2/minute")
+
+    assert limiter.hit("k", rate) == 0
+    assert limiter.hit("k", rate) == 0
+    assert limiter.hit("k", rate) == pytest.approx(30)
+
+    clock[0] += 30
+    assert limiter.hit("k", rate) == 0
+
+
+def test_evicted_keys_start_full(clock):
+    limiter = MemoryLimiter(2)
+    rate = parse_rate("1/hour")
+
+    limiter.hit("a", rate)
+    limiter.hit("b", rate)
+    limiter.hit("c", rate)
+
+    assert limiter.hit("a", rate) == 0
+    assert limiter.hit("c", rate) > 0
+
+
+def test_rejected_requests_get_retry_after(limited, clock):
+    headers = {"Authorization": f"Bearer {create_access_token('fan@x')}"}
+
+    assert limited.get("/limited", headers=headers).status_code == 200
+    assert limited.get("/limited", headers=headers).status_code == 200
+
+    response = limited.get("/limited", headers=headers)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+
+    # un altro utente ha il suo bucket
+    other = {"Authorization": f"Bearer {create_access_token('other@x')}"}
+    assert limited.get("/limited", headers=other).status_code == 200
+
+
+def test_dev_header_is_ignored_outside_dev_mode(limited, clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "DEV_MODE", False)
+
+    for index in range(2):
+        response = limited.get(
+            "/limited",
+            headers={"X-DEV-EMAIL": f"user{index}@x"},
+        )
+        assert response.status_code == 200
+
+    # stesso IP: un X-DEV-EMAIL nuovo non dà un bucket nuovo
+    response = limited.get("/limited", headers={"X-DEV-EMAIL": "user9@x"})
+    assert response.status_code == 429
+
+
+def test_dev_header_identifies_the_user_in_dev_mode(
+    limited, clock, monkeypatch
+):
+    monkeypatch.setattr(rate_limit, "DEV_MODE", True)
+
+    for index in range(3):
+        response = limited.get(
+            "/limited",
+            headers={"X-DEV-EMAIL": f"user{index}@x"},
+        )
+        assert response.status_code == 200
+
+
+def test_invalid_token_falls_back_to_the_ip(limited, clock):
+    headers = {"Authorization": "Bearer not-a-token"}
+
+    assert limited.get("/limited", headers=headers).status_code == 200
+    assert limited.get("/limited").status_code == 200
+    assert limited.get("/limited", headers=headers).status_code == 429
@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import Content, Rating, User
+from app.services import ratings
+from app.services.ratings import backfill_rating_sum
+
+from tests.conftest import dev_headers
+
+
+def _content(db, **fields) -> Content:
+    owner = User(email="owner@x", username="owner", role="creator")
+    db.add(owner)
+    db.flush()
+
+    content = Content(
+        media_type="video",
+        media_url="https://x/v.mp4",
+        creator_description="demo",
+        owner_id=owner.id,
+        approved=True,
+        **fields,
+    )
+    db.add(content)
+    db.commit()
+    return content
+
+
+def test_rerating_replaces_the_previous_vote(client, db):
+    content = _content(db)
+    url = f"/contents/{content.id}/rate"
+
+    client.post(url, json={"rating": 5}, headers=dev_headers("a@x"))
+    client.post(url, json={"rating": 2}, headers=dev_headers("a@x"))
+    response = client.post(url, json={"rating": 4}, headers=dev_headers("b@x"))
+
+    assert response.status_code == 200
+    db.expire_all()
+    stored = db.get(Content, content.id)
+    assert (stored.rating_sum, stored.rating_count) == (6, 2)
+    assert stored.rating_avg == 3
+    assert db.query(Rating).count() == 2
+
+
+def test_backfill_rating_sum(db):
+    legacy = _content(db, rating_avg=3.5, rating_count=4)
+    rated = Content(
+        media_type="video",
+        media_url="https://x/w.mp4",
+        creator_description="demo",
+        owner_id=legacy.owner_id,
+        approved=True,
+        rating_avg=1,
+        rating_count=1,
+    )
+    db.add(rated)
+    db.flush()
+    db.add(Rating(user_id=legacy.owner_id, content_id=rated.id, score=5))
+    db.commit()
+
+    backfill_rating_sum(db)
+
+    db.expire_all()
+    assert db.get(Content, legacy.id).rating_sum == 14
+    assert db.get(Content, rated.id).rating_sum == 5
+    assert db.get(Content, rated.id).rating_avg == 5
+
+
+def test_rating_unapproved_content_is_rolled_back(client, db):
+    content = _content(db)
+    content.approved = False
+    db.commit()
+
+    response = client.post(
+        f"/contents/{content.id}/rate",
+        json={"rating": 5},
+        headers=dev_headers("a@x"),
+    )
+
+    assert response.status_code == 404
+    assert db.query(Rating).count() == 0
+
+
+def test_postgresql_submit_is_one_statement():
+    executed = []
+
+    class Recorder:
+        def execute(self, statement):
+            executed.append(str(statement.compile(dialect=postgresql.dialect())))
+            return SimpleNamespace(one=lambda: None)
+
+    now = datetime.now(timezone.utc)
+    ratings._rate_postgresql(Recorder(), 1, 2, 5, now)
+
+    assert len(executed) == 1
+    sql = executed[0]
+    assert "FOR UPDATE" in sql
+    assert "ON CONFLICT (user_id, content_id) DO UPDATE" in sql
+    assert "RETURNING xmax = 0 AS inserted" in sql
+    assert "UPDATE contents SET" in sql
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Content, Follow, TimelineEntry, User
+from app.services import timeline
+
+from tests.conftest import dev_headers
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def creators(db):
+    reader = User(email="reader@x", username="reader")
+    small = User(
+        email="small@x", username="small", role="creator", followers_count=1
+    )
+    star = User(
+        email="star@x", username="star", role="creator", followers_count=1
+    )
+    admin = User(email="admin@x", username="admin", role="admin")
+    db.add_all([reader, small, star, admin])
+    db.flush()
+
+    db.add_all([
+        Follow(follower_id=reader.id, following_id=small.id),
+        Follow(follower_id=reader.id, following_id=star.id),
+    ])
+
+    contents = {}
+    for minute, owner in enumerate([small, star, small, star]):
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/{minute}.mp4",
+            creator_description="demo",
+            owner_id=owner.id,
+            created_at=T0 + timedelta(minutes=minute),
+        )
+        db.add(content)
+        db.flush()
+        contents[minute] = content.id
+
+    db.commit()
+    return reader, small, star, contents
+
+
+def _approve(client, content_id):
+    response = client.post(
+        f"/admin/contents/{content_id}/approve",
+        headers=dev_headers("admin@x", "admin"),
+    )
+    assert response.status_code == 200
+
+
+def _following_ids(db, user_id):
+    source = timeline.following_source(user_id)
+    return [
+        row.id
+        for row in db.query(source).order_by(
+            source.c.created_at.desc(),
+            source.c.id.desc(),
+        )
+    ]
+
+
+def test_approval_fans_out_to_followers(client, db, creators):
+    reader, small, _, contents = creators
+
+    _approve(client, contents[0])
+
+    entries = db.query(TimelineEntry).all()
+    assert [(e.user_id, e.content_id, e.owner_id) for e in entries] == [
+        (reader.id, contents[0], small.id),
+    ]
+
+
+def test_following_source_unions_pushed_and_pulled(
+    client, db, creators, monkeypatch
+):
+    reader, small, star, contents = creators
+    db.query(User).filter(User.id == star.id).update({"fanout_on_read": True})
+    db.commit()
+
+    for minute in range(4):
+        _approve(client, contents[minute])
+
+    # il creator in fan-out on read non scrive nelle timeline
+    owners = {e.owner_id for e in db.query(TimelineEntry)}
+    assert owners == {small.id}
+
+    # ma il feed li unisce in un solo ordine (created_at, id)
+    assert _following_ids(db, reader.id) == [
+        contents[3], contents[2], contents[1], contents[0],
+    ]
+
+
+def test_creator_over_the_limit_switches_to_fan_out_on_read(
+    client, db, creators, monkeypatch
+):
+    reader, small, _, contents = creators
+
+    _approve(client, contents[0])
+    monkeypatch.setattr(timeline, "TIMELINE_FANOUT_LIMIT", 0)
+    _approve(client, contents[2])
+
+    db.expire_all()
+    assert db.get(User, small.id).fanout_on_read is True
+    assert db.query(TimelineEntry).count() == 0
+    # nessun contenuto perso nel passaggio
+    assert _following_ids(db, reader.id) == [contents[2], contents[0]]
+
+
+def test_unfollow_clears_the_timeline(client, db, creators):
+    reader, small, _, contents = creators
+    _approve(client, contents[0])
+
+    response = client.delete(
+        f"/follows/{small.id}",
+        headers=dev_headers("reader@x"),
+    )
+    assert response.status_code == 200
+    assert db.query(TimelineEntry).count() == 0
+    assert _following_ids(db, reader.id) == []
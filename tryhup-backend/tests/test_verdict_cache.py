@@ -0,0 +1,70 @@
+import pytest
+
+from app.services import moderation
+from app.services.moderation import RuleSet, verdict_cache, verdict_key
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    calls = []
+    verdict = moderation._verdict
+
+    def counting(rules, text, toxicity=None):
+        calls.append(text)
+        return verdict(rules, text, toxicity)
+
+    monkeypatch.setattr(moderation, "_verdict", counting)
+    return calls
+
+
+def test_key_normalises_case_and_spaces():
+    assert verdict_key("Great  video", "v1") == verdict_key("great video", "v1")
+    assert verdict_key("great video", "v1") != verdict_key("great video", "v2")
+
+
+def test_key_keeps_traits_that_change_the_verdict():
+    base = verdict_key("great video", "v1")
+
+    assert verdict_key("GREAT VIDEO", "v1") != base
+    assert verdict_key("great video!!!", "v1") != verdict_key(
+        "great video", "v1"
+    )
+
+
+def test_repeated_comments_skip_scoring(scored):
+    first = moderation.moderate_comment("🔥🔥🔥")
+    second = moderation.moderate_comment("🔥🔥🔥")
+
+    assert first == second
+    assert scored == ["🔥🔥🔥"]
+
+
+def test_duplicates_in_a_batch_are_scored_once(scored):
+    hits = verdict_cache.stats.hits
+
+    verdicts = moderation.moderate_comments(["bello", "Bello", "bello"])
+
+    assert scored == ["bello"]
+    assert len(verdicts) == 3
+    assert verdict_cache.stats.hits - hits == 2
+
+
+def test_rule_change_invalidates_verdicts(scored, monkeypatch):
+    moderation.moderate_comment("che noia")
+
+    rules = RuleSet("nuove", ["noia"])
+    monkeypatch.setattr(moderation.moderation_engine, "rules", lambda: rules)
+
+    verdict = moderation.moderate_comment("che noia")
+
+    assert scored == ["che noia", "che noia"]
+    assert verdict["is_flagged"] is True
+
+
+def test_hit_ratio_is_reported():
+    moderation.moderate_comment("ok")
+    moderation.moderate_comment("ok")
+
+    info = verdict_cache.info()
+    assert info["hits"] >= 1
+    assert 0 < info["hit_ratio"] <= 1
@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import Content, Follow, Like, Rating, User
+from app.services.discover import build_snapshot
+from app.services.viewer_state import resolve_viewer_state
+
+from tests.conftest import dev_headers
+
+
+@pytest.fixture
+def cards(db):
+    viewer = User(email="viewer@x", username="viewer")
+    followed = User(email="followed@x", username="followed", role="creator")
+    other = User(email="other@x", username="other", role="creator")
+    db.add_all([viewer, followed, other])
+    db.flush()
+
+    db.add(Follow(follower_id=viewer.id, following_id=followed.id))
+
+    ids = []
+    for index in range(30):
+        content = Content(
+            media_type="video",
+            media_url=f"https://x/{index}.mp4",
+            creator_description="demo",
+            owner_id=followed.id if index % 2 == 0 else other.id,
+            approved=True,
+        )
+        db.add(content)
+        db.flush()
+        ids.append(content.id)
+
+    db.add(Like(user_id=viewer.id, content_id=ids[0]))
+    db.add(Rating(user_id=viewer.id, content_id=ids[1], score=4))
+    db.commit()
+    return viewer, ids
+
+
+def _count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    return statements, lambda: event.remove(
+        engine, "before_cursor_execute", record
+    )
+
+
+def test_resolve_flags_in_request_order(db, cards):
+    viewer, ids = cards
+
+    states = resolve_viewer_state(
+        db,
+        viewer.id,
+        [ids[1], ids[0], ids[1], 999_999],
+    )
+
+    # duplicati e id inesistenti esclusi, ordine della richiesta
+    assert [
+        (s.content_id, s.liked, s.rated, s.my_rating, s.following_owner)
+        for s in states
+    ] == [
+        (ids[1], False, True, 4, False),
+        (ids[0], True, False, None, True),
+    ]
+
+
+def test_resolve_uses_a_fixed_number_of_queries(db, cards):
+    viewer, ids = cards
+    viewer_id = viewer.id
+    counts = []
+
+    for size in (3, 30):
+        statements, stop = _count_queries()
+        try:
+            resolve_viewer_state(db, viewer_id, ids[:size])
+        finally:
+            stop()
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1] == 4
+
+
+def test_viewer_state_endpoint(client, cards):
+    _, ids = cards
+
+    response = client.post(
+        "/contents/viewer-state",
+        json={"content_ids": ids[:2]},
+        headers=dev_headers("viewer@x"),
+    )
+
+    assert response.status_code == 200
+    assert [item["liked"] for item in response.json()["items"]] == [True, False]
+
+
+@pytest.mark.parametrize("size", [0, 101])
+def test_viewer_state_endpoint_limits_ids(client, cards, size):
+    response = client.post(
+        "/contents/viewer-state",
+        json={"content_ids": list(range(1, size + 1))},
+        headers=dev_headers("viewer@x"),
+    )
+
+    assert response.status_code == 422
+
+
+def test_feed_can_include_viewer_state(client, db, cards):
+    build_snapshot(db)
+
+    response = client.get(
+        "/contents/feed",
+        params={"limit": 5, "include_viewer_state": True},
+        headers=dev_headers("viewer@x"),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [s["content_id"] for s in body["viewer_state"]] == [
+        item["id"] for item in body["items"]
+    ]